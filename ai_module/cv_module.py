@@ -12,16 +12,10 @@ import time
 import yt_dlp
 from pathlib import Path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from settings import config
+from common.tracing import tracer_from_env
+import profiling
 
-# Load YOLOv8x model for maximum accuracy on Indian traffic
-print("Loading YOLOv8x (best) model for maximum accuracy...")
-model = YOLO('yolov8x.pt')  # Extra large model for best accuracy
-
-# Byte tracker for object tracking
-tracker = sv.ByteTrack()
-
-def preprocess_frame_for_indian_traffic(frame):
+def preprocess_frame_enhanced(frame):
     """Advanced preprocessing optimized for Indian traffic conditions"""
     try:
         # 1. Resize frame for consistent processing (optional - for performance)
@@ -66,21 +60,10 @@ def preprocess_frame_for_indian_traffic(frame):
     except Exception as e:
         print(f"Error in preprocessing: {e}")
         return frame
-import math
-import numpy as np
-from ultralytics import YOLO
-import supervision as sv
-import sys
-import os
-import base64
-import socketio
-import time
-import yt_dlp
-from pathlib import Path
 
-# Load Enhanced YOLO model for Indian traffic
-print("Loading enhanced YOLO model for Indian traffic detection...")
-model = YOLO('yolov8m.pt')  # Medium model for better accuracy on Indian roads
+# YOLO weights are loaded on first use (load_model), so importing this module stays cheap
+MODEL_WEIGHTS = os.environ.get('CV_MODEL', 'yolov8m.pt')  # Medium model for better accuracy on Indian roads
+model = None
 tracker = sv.ByteTrack()
 
 # Enhanced Vehicle classes for Indian traffic
@@ -122,6 +105,13 @@ def preprocess_frame_for_indian_traffic(frame):
     except:
         return frame
 
+# Selectable with CV_PREPROCESS; 'light' is what the detector runs by default
+PREPROCESS_PROFILES = {
+    'light': preprocess_frame_for_indian_traffic,
+    'enhanced': preprocess_frame_enhanced,
+    'none': lambda frame: frame,
+}
+
 def classify_indian_vehicle(class_id, confidence, bbox, frame_shape):
     """Enhanced classification for Indian vehicle types"""
     x1, y1, x2, y2 = bbox
@@ -194,15 +184,15 @@ def get_indian_vehicle_color(vehicle_type):
 
 YOUTUBE_VIDEO_URL = "https://youtu.be/iJZcjZD0fw0?si=3FVnUl3PODxIIBgR"
 
-# If using yt-dlp or similar, update the code to use YOUTUBE_VIDEO_URL as the input source for video processing.
-# For example:
-ydl_opts = {
-    'format': 'best[height<=720]',  # Lower quality for better compatibility
-    'outtmpl': 'input_video.%(ext)s',
-    'noplaylist': True
-}
-with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-    ydl.download([YOUTUBE_VIDEO_URL])
+def download_input_video():
+    """Fetch YOUTUBE_VIDEO_URL to input_video.* (yt-dlp skips it when already downloaded)"""
+    ydl_opts = {
+        'format': 'best[height<=720]',  # Lower quality for better compatibility
+        'outtmpl': 'input_video.%(ext)s',
+        'noplaylist': True
+    }
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        ydl.download([YOUTUBE_VIDEO_URL])
 
 def detect_lanes_stable(frame):
     """Stable lane detection that consistently returns 2 lanes for Indian roads"""
@@ -234,7 +224,151 @@ def detect_lanes_stable(frame):
     # No debug lines drawn on frame - clean output
     return consistent_lanes
 
+def load_model(weights=None):
+    """Load the YOLO weights (CV_MODEL, default yolov8m.pt) into the module-level model"""
+    global model
+    weights = weights or MODEL_WEIGHTS
+    print(f"Loading {weights} for Indian traffic detection...")
+    model = YOLO(weights)
+    return model
+
+def detect(frames):
+    """Run YOLO on a batch of preprocessed frames; one result per frame"""
+    if model is None:
+        load_model()
+    # Optimized parameters for Indian traffic
+    return model.predict(frames,
+                         conf=0.3,      # Higher confidence for YOLOv8x
+                         iou=0.5,       # Standard IoU for best model
+                         max_det=40,    # Reasonable limit for performance
+                         verbose=False)
+
+def process_frame(frame, result, lane_count, profiler):
+    """Track, classify and lane-count one frame's detections, annotating `frame` in place.
+
+    Returns (lane_counts, indian_vehicle_counts).
+    """
+    h, w, _ = frame.shape
+    lane_counts = {f"lane_{i+1}": 0 for i in range(lane_count)}
+
+    # Enhanced Indian vehicle counts
+    indian_vehicle_counts = {
+        'car': 0, 'motorcycle': 0, 'bus': 0, 'truck': 0,
+        'auto_rickshaw': 0, 'bicycle': 0, 'tempo': 0, 'person': 0
+    }
+
+    detections = sv.Detections.from_ultralytics(result)
+    
+    # Filter detections by size (remove very small detections)
+    if len(detections) > 0:
+        areas = (detections.xyxy[:, 2] - detections.xyxy[:, 0]) * (detections.xyxy[:, 3] - detections.xyxy[:, 1])
+        min_area = (w * h) * 0.001  # Minimum 0.1% of frame area
+        size_filter = areas > min_area
+        detections = detections[size_filter]
+    profiler.lap('inference')
+    
+    tracked = tracker.update_with_detections(detections)
+    profiler.lap('tracking')
+
+    # Process detections with proper indexing
+    for i, (xyxy, cls_id, tracker_id) in enumerate(zip(tracked.xyxy, tracked.class_id, tracked.tracker_id)):
+        # Get confidence score safely
+        if len(detections.confidence) > 0:
+            # Find matching detection by trying to match coordinates
+            confidence = 0.5  # Default confidence
+            for j, det_xyxy in enumerate(detections.xyxy):
+                if j < len(detections.confidence) and abs(det_xyxy[0] - xyxy[0]) < 5:
+                    confidence = detections.confidence[j]
+                    break
+        else:
+            confidence = 0.5
+        
+        # Enhanced Indian vehicle classification
+        indian_vehicle_type = classify_indian_vehicle(
+            int(cls_id), confidence, xyxy, frame.shape
+        )
+        profiler.lap('classification')
+        
+        if indian_vehicle_type:
+            # Count the vehicle
+            indian_vehicle_counts[indian_vehicle_type] += 1
+            
+            x1, y1, x2, y2 = map(int, xyxy)
+            cx = int((x1 + x2) / 2)
+            cy = int((y1 + y2) / 2)
+
+            # Enhanced lane assignment with position weighting
+            # Vehicles closer to camera (bottom of frame) are weighted more heavily
+            weight_factor = cy / h  # 0 to 1, higher for vehicles at bottom
+            
+            # Calculate lane assignment with road perspective
+            # Account for perspective distortion in video
+            normalized_x = cx / w
+            
+            if lane_count == 2:
+                # For 2-lane roads: left lane (0-0.5), right lane (0.5-1.0)
+                if normalized_x < 0.5:
+                    lane_index = 0
+                else:
+                    lane_index = 1
+            else:
+                # For multi-lane roads
+                lane_index = min(int(normalized_x * lane_count), lane_count - 1)
+            
+            lane_counts[f"lane_{lane_index+1}"] += 1
+            profiler.lap('classification')
+
+            # Draw box with Indian vehicle color coding
+            color = get_indian_vehicle_color(indian_vehicle_type)
+            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+            
+            # Enhanced label with vehicle type and confidence
+            label = f"{indian_vehicle_type}: {confidence:.2f}"
+            label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 2)[0]
+            
+            # Background for text
+            cv2.rectangle(frame, (x1, y1-25), (x1 + label_size[0], y1), color, -1)
+            cv2.putText(frame, label, (x1, y1-5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 2)
+            profiler.lap('draw')
+
+    # Clean information overlay (no debug lines)
+    total_vehicles = sum(indian_vehicle_counts.values())
+    
+    # Create clean background for information
+    overlay_bg = np.zeros((120, 600, 3), dtype=np.uint8)
+    overlay_bg[:] = (0, 0, 0)  # Black background
+    
+    # Add clean text information
+    info_lines = [
+        f"YOLOv8x Model | Lanes: {lane_count} (Fixed)",
+        f"Total Vehicles: {total_vehicles}",
+        f"Lane 1: {lane_counts.get('lane_1', 0)} | Lane 2: {lane_counts.get('lane_2', 0)}",
+        " | ".join([f"{k.title()}: {v}" for k, v in indian_vehicle_counts.items() if v > 0])
+    ]
+    
+    # Draw information on overlay
+    for i, line in enumerate(info_lines):
+        if line.strip():  # Only draw non-empty lines
+            cv2.putText(overlay_bg, line, (10, 25 + i*25), 
+                      cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+    
+    # Blend overlay with main frame
+    frame[10:130, 10:610] = cv2.addWeighted(
+        frame[10:130, 10:610], 0.3, overlay_bg, 0.7, 0
+    )
+    profiler.lap('draw')
+
+    return lane_counts, indian_vehicle_counts
+
+def encode_frame(frame):
+    """JPEG + base64, as sent in cv_frame"""
+    _, jpeg = cv2.imencode('.jpg', frame)
+    return base64.b64encode(jpeg.tobytes()).decode('utf-8')
+
 def run_detection():
+    from settings import config  # resolves the YouTube stream on import, so only when actually running
+
+    download_input_video()
     # Find the downloaded video file
     video_files = list(Path('.').glob('input_video.*'))
     if not video_files:
@@ -248,8 +382,12 @@ def run_detection():
     output_file = Path(config["save_counts"])
     output_file.parent.mkdir(exist_ok=True)
 
+    load_model()
+    preprocess = PREPROCESS_PROFILES[os.environ.get('CV_PREPROCESS', 'light')]
     sio = socketio.Client()
     sio.connect('http://localhost:5050')
+    tracer = tracer_from_env('cv_module')
+    profiler = profiling.from_env()  # per-stage timings at http://127.0.0.1:5061/stats
     
     with open(output_file, "a") as f:
         while True:  # Infinite loop for continuous detection
@@ -257,135 +395,36 @@ def run_detection():
             print(f"Starting video loop iteration (frame_id: {frame_id})")
             
             while cap.isOpened():
+                profiler.begin(frame_id)
                 ret, frame = cap.read()
                 if not ret:
                     print("End of video reached, restarting...")
                     break  # Break inner loop to restart video
+                trace_id = tracer.start('capture', frame=frame_id)
+                profiler.lap('decode')
 
                 # Enhanced preprocessing for Indian traffic
-                processed_frame = preprocess_frame_for_indian_traffic(frame)
-                h, w, _ = frame.shape
+                processed_frame = preprocess(frame)
 
                 # Stable lane detection (always 2 lanes)
                 lane_count = detect_lanes_stable(frame)
-                lane_width = w // lane_count
-                lane_counts = {f"lane_{i+1}": 0 for i in range(lane_count)}
-
-                # Enhanced Indian vehicle counts
-                indian_vehicle_counts = {
-                    'car': 0, 'motorcycle': 0, 'bus': 0, 'truck': 0,
-                    'auto_rickshaw': 0, 'bicycle': 0, 'tempo': 0, 'person': 0
-                }
-
-                # Run YOLOv8x with optimized parameters for maximum accuracy
-                results = model.predict(processed_frame, 
-                                      conf=0.3,      # Higher confidence for YOLOv8x
-                                      iou=0.5,       # Standard IoU for best model
-                                      max_det=40,    # Reasonable limit for performance
-                                      verbose=False)
-                                      
-                detections = sv.Detections.from_ultralytics(results[0])
-                
-                # Filter detections by size (remove very small detections)
-                if len(detections) > 0:
-                    areas = (detections.xyxy[:, 2] - detections.xyxy[:, 0]) * (detections.xyxy[:, 3] - detections.xyxy[:, 1])
-                    min_area = (w * h) * 0.001  # Minimum 0.1% of frame area
-                    size_filter = areas > min_area
-                    detections = detections[size_filter]
-                
-                tracked = tracker.update_with_detections(detections)
-
-                # Process detections with proper indexing
-                for i, (xyxy, cls_id, tracker_id) in enumerate(zip(tracked.xyxy, tracked.class_id, tracked.tracker_id)):
-                    # Get confidence score safely
-                    if len(detections.confidence) > 0:
-                        # Find matching detection by trying to match coordinates
-                        confidence = 0.5  # Default confidence
-                        for j, det_xyxy in enumerate(detections.xyxy):
-                            if j < len(detections.confidence) and abs(det_xyxy[0] - xyxy[0]) < 5:
-                                confidence = detections.confidence[j]
-                                break
-                    else:
-                        confidence = 0.5
-                    
-                    # Enhanced Indian vehicle classification
-                    indian_vehicle_type = classify_indian_vehicle(
-                        int(cls_id), confidence, xyxy, frame.shape
-                    )
-                    
-                    if indian_vehicle_type:
-                        # Count the vehicle
-                        indian_vehicle_counts[indian_vehicle_type] += 1
-                        
-                        x1, y1, x2, y2 = map(int, xyxy)
-                        cx = int((x1 + x2) / 2)
-                        cy = int((y1 + y2) / 2)
-
-                        # Enhanced lane assignment with position weighting
-                        # Vehicles closer to camera (bottom of frame) are weighted more heavily
-                        weight_factor = cy / h  # 0 to 1, higher for vehicles at bottom
-                        
-                        # Calculate lane assignment with road perspective
-                        # Account for perspective distortion in video
-                        normalized_x = cx / w
-                        
-                        if lane_count == 2:
-                            # For 2-lane roads: left lane (0-0.5), right lane (0.5-1.0)
-                            if normalized_x < 0.5:
-                                lane_index = 0
-                            else:
-                                lane_index = 1
-                        else:
-                            # For multi-lane roads
-                            lane_index = min(int(normalized_x * lane_count), lane_count - 1)
-                        
-                        lane_counts[f"lane_{lane_index+1}"] += 1
-
-                        # Draw box with Indian vehicle color coding
-                        color = get_indian_vehicle_color(indian_vehicle_type)
-                        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-                        
-                        # Enhanced label with vehicle type and confidence
-                        label = f"{indian_vehicle_type}: {confidence:.2f}"
-                        label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 2)[0]
-                        
-                        # Background for text
-                        cv2.rectangle(frame, (x1, y1-25), (x1 + label_size[0], y1), color, -1)
-                        cv2.putText(frame, label, (x1, y1-5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 2)
-
-                # Clean information overlay (no debug lines)
-                total_vehicles = sum(indian_vehicle_counts.values())
-                
-                # Create clean background for information
-                overlay_bg = np.zeros((120, 600, 3), dtype=np.uint8)
-                overlay_bg[:] = (0, 0, 0)  # Black background
-                
-                # Add clean text information
-                info_lines = [
-                    f"YOLOv8x Model | Lanes: {lane_count} (Fixed)",
-                    f"Total Vehicles: {total_vehicles}",
-                    f"Lane 1: {lane_counts.get('lane_1', 0)} | Lane 2: {lane_counts.get('lane_2', 0)}",
-                    " | ".join([f"{k.title()}: {v}" for k, v in indian_vehicle_counts.items() if v > 0])
-                ]
-                
-                # Draw information on overlay
-                for i, line in enumerate(info_lines):
-                    if line.strip():  # Only draw non-empty lines
-                        cv2.putText(overlay_bg, line, (10, 25 + i*25), 
-                                  cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-                
-                # Blend overlay with main frame
-                frame[10:130, 10:610] = cv2.addWeighted(
-                    frame[10:130, 10:610], 0.3, overlay_bg, 0.7, 0
-                )
+                profiler.lap('preprocess')
+
+                result = detect([processed_frame])[0]
+                tracer.stamp(trace_id, 'inference', frame=frame_id)
+                lane_counts, indian_vehicle_counts = process_frame(frame, result, lane_count, profiler)
 
                 # Encode frame as JPEG and base64
-                _, jpeg = cv2.imencode('.jpg', frame)
-                b64_frame = base64.b64encode(jpeg.tobytes()).decode('utf-8')
+                b64_frame = encode_frame(frame)
+                profiler.lap('encode')
                 sio.emit('cv_frame', {'frame': frame_id, 'lane_counts': lane_counts, 'image': b64_frame})
 
-                # Save counts
-                f.write(json.dumps({"frame": frame_id, "lane_counts": lane_counts}) + "\n")
+                # Save counts; flush so the orchestrator sees them now, not when the buffer fills
+                f.write(json.dumps({"frame": frame_id, "lane_counts": lane_counts, "trace": trace_id}) + "\n")
+                f.flush()
+                tracer.stamp(trace_id, 'publish', frame=frame_id)
+                profiler.lap('emit')
+                profiler.end()
                 frame_id += 1
 
                 if cv2.waitKey(1) & 0xFF == ord("q"):
@@ -397,21 +436,6 @@ def run_detection():
 
             cap.release()
             # Video ended, continue to restart the loop
-
-            # Encode frame as JPEG and base64
-            _, jpeg = cv2.imencode('.jpg', frame)
-            b64_frame = base64.b64encode(jpeg.tobytes()).decode('utf-8')
-            sio.emit('cv_frame', {'frame': frame_id, 'lane_counts': lane_counts, 'image': b64_frame})
-
-            # Save counts
-            f.write(json.dumps({"frame": frame_id, "lane_counts": lane_counts}) + "\n")
-            frame_id += 1
-
-            if cv2.waitKey(1) & 0xFF == ord("q"):
-                break
-
-            cap.release()
-            # Video ended, continue to restart the loop
             
     # This should never be reached due to infinite loop
     cv2.destroyAllWindows()
@@ -11,13 +11,14 @@ import socketio
 import time
 import yt_dlp
 from pathlib import Path
+import profiling
 
 # Enhanced Indian Traffic Detection System
 class IndianTrafficDetector:
-    def __init__(self):
+    def __init__(self, weights='yolov8m.pt', connect=True, profiler=None):
         # Use medium YOLO model for better accuracy (you can upgrade to yolov8l.pt for even better results)
-        print("Loading YOLOv8 medium model for enhanced Indian traffic detection...")
-        self.model = YOLO('yolov8m.pt')  # Download will happen automatically if not present
+        print(f"Loading {weights} for enhanced Indian traffic detection...")
+        self.model = YOLO(weights)  # Download will happen automatically if not present
         
         # Byte tracker for vehicle tracking
         self.tracker = sv.ByteTrack()
@@ -54,10 +55,12 @@ class IndianTrafficDetector:
         # Frame processing
         self.frame_count = 0
         self.total_frames_processed = 0
+        self.profiler = profiler or profiling.from_env()  # per-stage timings at http://127.0.0.1:5061/stats
         
         # Socket.IO client for backend communication
         self.sio = socketio.Client()
-        self.connect_to_backend()
+        if connect:
+            self.connect_to_backend()
         
         # Create output directory
         os.makedirs('output', exist_ok=True)
@@ -237,16 +240,27 @@ class IndianTrafficDetector:
             print(f"Lane detection error: {e}")
             return 2
     
-    def process_frame(self, frame):
-        """Main frame processing with Indian traffic optimization"""
-        # Preprocess frame
-        processed_frame = self.preprocess_frame(frame)
-        
-        # Run YOLO detection with optimized parameters for Indian traffic
-        results = self.model(processed_frame, 
-                           conf=0.2,      # Lower confidence to catch more vehicles
-                           iou=0.4,       # Lower IoU for dense traffic
-                           verbose=False)
+    def detect(self, frames):
+        """Run YOLO on a batch of preprocessed frames; one result per frame"""
+        # Optimized parameters for Indian traffic
+        return self.model(frames,
+                          conf=0.2,      # Lower confidence to catch more vehicles
+                          iou=0.4,       # Lower IoU for dense traffic
+                          verbose=False)
+
+    def process_frame(self, frame, results=None):
+        """Main frame processing with Indian traffic optimization
+
+        `results` lets a caller that already ran detect() on a batch skip
+        preprocessing and inference for this frame.
+        """
+        if results is None:
+            # Preprocess frame
+            processed_frame = self.preprocess_frame(frame)
+            self.profiler.lap('preprocess')
+            
+            results = self.detect(processed_frame)
+        self.profiler.lap('inference')
         
         # Reset counts for this frame
         frame_vehicle_counts = {
@@ -271,6 +285,7 @@ class IndianTrafficDetector:
                     vehicle_type = self.classify_indian_vehicle(
                         class_id, confidence, [x1, y1, x2, y2], frame.shape
                     )
+                    self.profiler.lap('classification')
                     
                     if vehicle_type:
                         frame_vehicle_counts[vehicle_type] += 1
@@ -301,6 +316,7 @@ class IndianTrafficDetector:
                             'confidence': float(confidence),
                             'bbox': [float(x1), float(y1), float(x2), float(y2)]
                         })
+                        self.profiler.lap('draw')
         
         # Lane detection and assignment
         num_lanes = self.detect_lanes(frame)
@@ -317,9 +333,11 @@ class IndianTrafficDetector:
         # Update cumulative counts
         for vehicle_type, count in frame_vehicle_counts.items():
             self.vehicle_counts[vehicle_type] += count
+        self.profiler.lap('classification')
         
         # Add statistics overlay
         self.add_statistics_overlay(annotated_frame, frame_vehicle_counts, lane_counts)
+        self.profiler.lap('draw')
         
         return annotated_frame, frame_vehicle_counts, lane_counts, detections
     
@@ -366,6 +384,7 @@ class IndianTrafficDetector:
             # Encode frame to base64
             _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
             frame_base64 = base64.b64encode(buffer).decode('utf-8')
+            self.profiler.lap('encode')
             
             # Prepare comprehensive data
             data = {
@@ -383,6 +402,7 @@ class IndianTrafficDetector:
             # Send to backend via Socket.IO
             if self.sio.connected:
                 self.sio.emit('cv_frame', data)
+            self.profiler.lap('emit')
             
         except Exception as e:
             print(f"Error sending data: {e}")
@@ -411,6 +431,8 @@ class IndianTrafficDetector:
         
         # Detection loop
         while True:
+            # Skipped frames never reach end(), so only processed frames are timed
+            self.profiler.begin(self.total_frames_processed)
             ret, frame = cap.read()
             
             if not ret:
@@ -420,6 +442,7 @@ class IndianTrafficDetector:
                 self.frame_count = 0
                 continue
             
+            self.profiler.lap('decode')
             self.frame_count += 1
             self.total_frames_processed += 1
             
@@ -431,6 +454,7 @@ class IndianTrafficDetector:
                     
                     # Send data to backend
                     self.send_detection_data(annotated_frame, vehicle_counts, lane_counts, detections)
+                    self.profiler.end()
                     
                     # Print progress
                     if self.frame_count % 60 == 0:  # Every 2 seconds at 30fps
@@ -0,0 +1,280 @@
+"""
+Per-frame stage timing for the CV pipeline.
+
+The detection loops mark the end of each stage with lap():
+
+    profiler.begin(frame_no)
+    ret, frame = cap.read();        profiler.lap('decode')
+    processed = preprocess(frame);  profiler.lap('preprocess')
+    ...
+    profiler.end()
+
+Each lap charges the time since the previous mark to the named stage. Laps
+with the same name add up, so work interleaved in a per-detection loop
+(classification, drawing) can be split without restructuring the loop.
+Marking costs one perf_counter() call and a dict update.
+
+- Rolling stats (mean / p50 / p95 / max per stage over the last `window`
+  frames) are served as JSON at http://127.0.0.1:CV_PROFILE_PORT/stats.
+- CV_PROFILE_CSV appends one row per frame.
+- CV_PROFILE_EVERY=N profiles CV_PROFILE_FRAMES consecutive frames out of every
+  N, with cProfile or pyinstrument (CV_PROFILE_SAMPLER). It writes the report
+  to CV_PROFILE_DIR and serves it at /profile. GET /profile?frames=K profiles
+  the next K frames on demand, without restarting the detector.
+
+Profiled frames are left out of the rolling stats because the profiler slows
+them down.
+"""
+
+import cProfile
+import csv
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+try:
+    import pyinstrument
+except Exception:
+    pyinstrument = None
+
+STAGES = ('decode', 'preprocess', 'inference', 'tracking', 'classification', 'draw', 'encode', 'emit')
+
+
+def _percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(p / 100.0 * len(sorted_values)))]
+
+
+class StageProfiler:
+    def __init__(self, window=300, csv_path=None, profile_every=0, profile_frames=5,
+                 profile_dir=None, sampler='cprofile', top=30):
+        self.window = window
+        self.frames = deque(maxlen=window)  # (frame_no, total_ms, {stage: ms})
+        self.frame_count = 0
+        self.profiled_count = 0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._frame_no = None
+        self._frame_start = 0.0
+        self._mark = 0.0
+        self._laps = {}
+
+        self.csv_path = Path(csv_path) if csv_path else None
+        self._csv_file = None
+        self._csv = None
+
+        self.profile_every = profile_every
+        self.profile_frames = profile_frames
+        self.profile_dir = Path(profile_dir) if profile_dir else None
+        self.sampler = sampler if sampler != 'pyinstrument' or pyinstrument is not None else 'cprofile'
+        self.top = top
+        self._armed = 0  # frames still to profile
+        self._profiler = None
+        self.last_profile = None
+        self._server = None
+
+    # --- timing ----------------------------------------------------------------
+    def begin(self, frame_no):
+        if self.profile_every and frame_no % self.profile_every == 0:
+            self._armed = max(self._armed, self.profile_frames)
+        if self._armed and self._profiler is None:
+            self._start_profile(frame_no)
+        self._frame_no = frame_no
+        self._laps = {}
+        self._frame_start = self._mark = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self._laps[stage] = self._laps.get(stage, 0.0) + (now - self._mark)
+        self._mark = now
+
+    def end(self):
+        if self._frame_no is None:
+            return
+        total_ms = (time.perf_counter() - self._frame_start) * 1000
+        laps = {stage: seconds * 1000 for stage, seconds in self._laps.items()}
+        frame_no, self._frame_no = self._frame_no, None
+        if self._profiler is not None:
+            self._armed -= 1
+            self.profiled_count += 1
+            if self._armed <= 0:
+                self._finish_profile(frame_no)
+        else:
+            with self._lock:
+                self.frames.append((frame_no, total_ms, laps))
+                self.frame_count += 1
+        if self.csv_path is not None:
+            self._write_csv(frame_no, total_ms, laps)
+
+    # --- rolling stats -----------------------------------------------------------
+    def stats(self):
+        with self._lock:
+            frames = list(self.frames)
+        result = {
+            'frames_timed': self.frame_count,
+            'frames_profiled': self.profiled_count,
+            'window': len(frames),
+            'stages': {},
+        }
+        if not frames:
+            return result
+        names = list(STAGES) + sorted({s for _, _, laps in frames for s in laps} - set(STAGES))
+        totals = sorted(total for _, total, _ in frames)
+        mean_total = sum(totals) / len(totals)
+        for name in names:
+            values = sorted(laps.get(name, 0.0) for _, _, laps in frames)
+            mean = sum(values) / len(values)
+            result['stages'][name] = {
+                'mean_ms': round(mean, 3),
+                'p50_ms': round(_percentile(values, 50), 3),
+                'p95_ms': round(_percentile(values, 95), 3),
+                'max_ms': round(values[-1], 3),
+                'share': round(mean / mean_total, 3) if mean_total else 0.0,
+            }
+        result['frame'] = {
+            'mean_ms': round(mean_total, 3),
+            'p50_ms': round(_percentile(totals, 50), 3),
+            'p95_ms': round(_percentile(totals, 95), 3),
+            'max_ms': round(totals[-1], 3),
+            'fps': round(1000.0 / mean_total, 2) if mean_total else None,
+        }
+        return result
+
+    # --- CSV ---------------------------------------------------------------------
+    def _write_csv(self, frame_no, total_ms, laps):
+        try:
+            if self._csv is None:
+                self.csv_path.parent.mkdir(parents=True, exist_ok=True)
+                new_file = not self.csv_path.exists() or self.csv_path.stat().st_size == 0
+                self._csv_file = open(self.csv_path, 'a', newline='')
+                self._csv = csv.writer(self._csv_file)
+                if new_file:
+                    self._csv.writerow(('frame', 'wall', 'total_ms') + STAGES + ('other_ms',))
+            other = sum(ms for stage, ms in laps.items() if stage not in STAGES)
+            self._csv.writerow([frame_no, round(time.time(), 3), round(total_ms, 3)]
+                               + [round(laps.get(stage, 0.0), 3) for stage in STAGES]
+                               + [round(other, 3)])
+            if frame_no % 50 == 0:
+                self._csv_file.flush()
+        except OSError as e:
+            print(f"⚠️ Stage timing CSV disabled: {e}")
+            self.csv_path = None
+
+    # --- sampling profiler ---------------------------------------------------------
+    def request_profile(self, frames):
+        """Profile the next `frames` frames (used by GET /profile?frames=N)"""
+        self._armed = max(self._armed, int(frames))
+
+    def _start_profile(self, frame_no):
+        try:
+            if self.sampler == 'pyinstrument':
+                profiler = pyinstrument.Profiler()
+                profiler.start()
+            else:
+                profiler = cProfile.Profile()
+                profiler.enable()
+        except Exception as e:  # e.g. the process already runs under a profiler
+            print(f"⚠️ Could not start CPU profile: {e}")
+            self._armed = 0
+            return
+        self._profiler = profiler
+        self._profile_first = frame_no
+
+    def _finish_profile(self, frame_no):
+        profiler, self._profiler = self._profiler, None
+        self._armed = 0
+        header = f"# frames {self._profile_first}-{frame_no} ({self.sampler})\n"
+        if self.sampler == 'pyinstrument':
+            profiler.stop()
+            text = profiler.output_text(unicode=True)
+        else:
+            profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(self.top)
+            text = out.getvalue()
+        self.last_profile = header + text
+        if self.profile_dir is not None:
+            try:
+                self.profile_dir.mkdir(parents=True, exist_ok=True)
+                path = self.profile_dir / f"profile_{self._profile_first}-{frame_no}.txt"
+                path.write_text(self.last_profile)
+                print(f"🔬 CPU profile of frames {self._profile_first}-{frame_no} → {path}")
+            except OSError as e:
+                print(f"⚠️ Could not write profile: {e}")
+
+    # --- local endpoint ------------------------------------------------------------
+    def serve(self, port, host='127.0.0.1'):
+        """Serve /stats and /profile from a daemon thread; returns False if the port is taken"""
+        profiler = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == '/stats':
+                    self._send(200, 'application/json', json.dumps(profiler.stats(), indent=2))
+                elif url.path == '/profile':
+                    frames = parse_qs(url.query).get('frames')
+                    if frames and not frames[0].isdigit():
+                        self._send(400, 'text/plain', "frames must be a positive integer\n")
+                    elif frames:
+                        profiler.request_profile(frames[0])
+                        self._send(202, 'text/plain', f"profiling the next {frames[0]} frames\n")
+                    else:
+                        self._send(200, 'text/plain', profiler.last_profile or "no profile yet; try /profile?frames=10\n")
+                else:
+                    self._send(404, 'text/plain', "endpoints: /stats, /profile, /profile?frames=N\n")
+
+            def _send(self, status, content_type, body):
+                body = body.encode()
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e:
+            print(f"⚠️ Stage timing endpoint not started on port {port}: {e}")
+            return False
+        self._server.daemon_threads = True
+        threading.Thread(name='stageProfilerHttp', target=self._server.serve_forever, daemon=True).start()
+        print(f"⏱️ Stage timings at http://{host}:{port}/stats")
+        return True
+
+    def close(self):
+        if self._profiler is not None:
+            profiler, self._profiler = self._profiler, None
+            profiler.stop() if self.sampler == 'pyinstrument' else profiler.disable()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._csv_file is not None:
+            self._csv_file.close()
+            self._csv_file = self._csv = None
+
+
+def from_env(default_port=5061):
+    """Profiler configured by CV_PROFILE_* env vars, with its endpoint started (CV_PROFILE_PORT=0 disables it)"""
+    profiler = StageProfiler(
+        window=int(os.environ.get('CV_PROFILE_WINDOW', '300')),
+        csv_path=os.environ.get('CV_PROFILE_CSV') or None,
+        profile_every=int(os.environ.get('CV_PROFILE_EVERY', '0')),
+        profile_frames=int(os.environ.get('CV_PROFILE_FRAMES', '5')),
+        profile_dir=os.environ.get('CV_PROFILE_DIR', str(Path(__file__).resolve().parent / 'profiles')),
+        sampler=os.environ.get('CV_PROFILE_SAMPLER', 'cprofile'),
+    )
+    port = int(os.environ.get('CV_PROFILE_PORT', str(default_port)))
+    if port:
+        profiler.serve(port)
+    return profiler
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+CV throughput benchmark for both detector frame paths.
+
+    python benchmarks/cv_benchmark.py --models n s m --preprocess light enhanced --batch 1 4
+
+Each combination of path (cv_module / detector), model tier, preprocessing
+profile and batch size runs in its own process against the same clip. It
+reports FPS, per-frame latency of every stage (as timed by
+ai_module/profiling.py) and peak RSS. Results go to
+benchmarks/results/cv-<commit>-<time>.json. Pass --baseline with an earlier
+results file to flag FPS and latency regressions.
+
+Everything runs offline:
+- The clip is a synthetic one, generated once from the simulation's vehicle
+  sprites and cached under benchmarks/.cache/. Use --clip for a real recording.
+- Weights are read from --weights-dir and never downloaded. Missing tiers are
+  skipped.
+- Nothing is emitted. The emit stage is measured by the detectors themselves
+  (see the /stats endpoint).
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from benchmarks.harness import CACHE_DIR, REPO_ROOT, compare, peak_rss_mb, run_isolated, write_results  # noqa: E402
+
+PATHS = ("cv_module", "detector")
+SPRITES = ("car", "bus", "truck", "bike", "rickshaw")
+KEY_FIELDS = ("path", "model", "preprocess", "batch")
+
+
+# --- synthetic clip ----------------------------------------------------------------
+def make_clip(path, frames=240, size=(1280, 720), fps=30, seed=7):
+    """Vehicles driving across the junction background in four lanes; same seed, same clip"""
+    import cv2
+    import numpy as np
+
+    images = REPO_ROOT / "simulation" / "images"
+    background = cv2.resize(cv2.imread(str(images / "intersection.png")), size)
+    sprites = {}
+    for direction in ("right", "left"):
+        for name in SPRITES:
+            sprite = cv2.imread(str(images / direction / f"{name}.png"), cv2.IMREAD_UNCHANGED)
+            sprites[direction, name] = cv2.resize(sprite, None, fx=2.5, fy=2.5)
+
+    rng = random.Random(seed)
+    w, h = size
+    lanes = [("right", int(h * 0.42)), ("right", int(h * 0.48)), ("left", int(h * 0.54)), ("left", int(h * 0.60))]
+    vehicles = []
+    for i in range(24):
+        direction, y = rng.choice(lanes)
+        vehicles.append({"sprite": sprites[direction, rng.choice(SPRITES)], "y": y,
+                         "x": rng.uniform(-w, w), "speed": rng.uniform(4, 12) * (1 if direction == "right" else -1)})
+
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+    for _ in range(frames):
+        frame = background.copy()
+        for v in vehicles:
+            v["x"] += v["speed"]
+            if v["x"] > w:
+                v["x"] -= w + 200
+            elif v["x"] < -200:
+                v["x"] += w + 200
+            sprite = v["sprite"]
+            sh, sw = sprite.shape[:2]
+            x, y = int(v["x"]), v["y"] - sh // 2
+            x0, x1 = max(x, 0), min(x + sw, w)
+            if x1 <= x0:
+                continue
+            patch = sprite[:, x0 - x:x1 - x]
+            region = frame[y:y + sh, x0:x1]
+            if patch.shape[2] == 4:
+                alpha = patch[:, :, 3:] / 255.0
+                region[:] = (alpha * patch[:, :, :3] + (1 - alpha) * region).astype(np.uint8)
+            else:
+                region[:] = patch
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+# --- worker ------------------------------------------------------------------------
+def read_batch(cap, batch):
+    import cv2
+
+    frames = []
+    rewound = False
+    while len(frames) < batch:
+        ret, frame = cap.read()
+        if not ret:
+            if rewound:
+                raise SystemExit("clip has no readable frames")
+            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)  # loop the clip
+            rewound = True
+            continue
+        rewound = False
+        frames.append(frame)
+    return frames
+
+
+def run_worker(config):
+    import cv2
+
+    sys.path.insert(0, str(REPO_ROOT / "ai_module"))
+    os.environ.setdefault("TRACE_LOG", "off")
+    import cv_module
+    from profiling import StageProfiler
+
+    batch = config["batch"]
+    if config["path"] == "cv_module":
+        cv_module.load_model(config["weights"])
+        preprocess = cv_module.PREPROCESS_PROFILES[config["preprocess"]]
+
+        def step(frames, profiler):
+            processed = [preprocess(frame) for frame in frames]
+            lanes = [cv_module.detect_lanes_stable(frame) for frame in frames]
+            profiler.lap("preprocess")
+            results = cv_module.detect(processed)
+            for frame, result, lane_count in zip(frames, results, lanes):
+                cv_module.process_frame(frame, result, lane_count, profiler)
+                cv_module.encode_frame(frame)
+                profiler.lap("encode")
+    else:
+        from indian_traffic_detector import IndianTrafficDetector
+        detector = IndianTrafficDetector(weights=config["weights"], connect=False, profiler=StageProfiler())
+        preprocess = {"light": detector.preprocess_frame}.get(config["preprocess"]) \
+            or cv_module.PREPROCESS_PROFILES[config["preprocess"]]
+
+        def step(frames, profiler):
+            detector.profiler = profiler
+            processed = [preprocess(frame) for frame in frames]
+            profiler.lap("preprocess")
+            results = detector.detect(processed)
+            for frame, result in zip(frames, results):
+                annotated, vehicle_counts, lane_counts, detections = detector.process_frame(frame, results=[result])
+                detector.send_detection_data(annotated, vehicle_counts, lane_counts, detections)
+
+    cap = cv2.VideoCapture(config["clip"])
+    if not cap.isOpened():
+        raise SystemExit(f"cannot open clip {config['clip']}")
+
+    warmup = StageProfiler()
+    for _ in range(config["warmup"]):
+        step(read_batch(cap, batch), warmup)
+
+    batches = max(1, config["frames"] // batch)
+    profiler = StageProfiler(window=batches)
+    started = time.perf_counter()
+    for i in range(batches):
+        profiler.begin(i)
+        frames = read_batch(cap, batch)
+        profiler.lap("decode")
+        step(frames, profiler)
+        profiler.end()
+    elapsed = time.perf_counter() - started
+
+    stats = profiler.stats()
+    per_frame = lambda ms: round(ms / batch, 3)  # noqa: E731
+    return {
+        **{k: config[k] for k in KEY_FIELDS},
+        "frames": batches * batch,
+        "fps": round(batches * batch / elapsed, 2),
+        "p95_ms": per_frame(stats["frame"]["p95_ms"]),
+        "frame_ms": {k: per_frame(v) for k, v in stats["frame"].items() if k.endswith("_ms")},
+        "stages_ms": {stage: {k: per_frame(v) for k, v in s.items() if k.endswith("_ms")}
+                      for stage, s in stats["stages"].items()},
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+# --- driver ------------------------------------------------------------------------
+def resolve_weights(tier, weights_dir):
+    name = tier if tier.endswith(".pt") else f"yolov8{tier}.pt"
+    for folder in (Path(weights_dir), REPO_ROOT / "ai_module", REPO_ROOT):
+        candidate = folder / name
+        if candidate.exists():
+            return str(candidate.resolve())
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CV detector throughput benchmark")
+    parser.add_argument("--paths", nargs="+", choices=PATHS, default=list(PATHS))
+    parser.add_argument("--models", nargs="+", default=["n", "m"], help="YOLOv8 tiers (n s m l x) or .pt files")
+    parser.add_argument("--preprocess", nargs="+", choices=("light", "enhanced", "none"), default=["light"])
+    parser.add_argument("--batch", nargs="+", type=int, default=[1])
+    parser.add_argument("--frames", type=int, default=120, help="frames timed per configuration")
+    parser.add_argument("--warmup", type=int, default=5, help="untimed batches first (model warm-up)")
+    parser.add_argument("--clip", help="video file to use instead of the synthetic clip")
+    parser.add_argument("--weights-dir", default=str(REPO_ROOT / "ai_module"))
+    parser.add_argument("--out", default=None, help="results directory (default benchmarks/results)")
+    parser.add_argument("--baseline", help="earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative change that counts as a regression")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(json.loads(args.worker))))
+        return 0
+
+    configs = []
+    for model in args.models:
+        weights = resolve_weights(model, args.weights_dir)
+        if weights is None:
+            print(f"⚠️ Skipping {model}: weights not found in {args.weights_dir} (the benchmark never downloads)")
+            continue
+        for path in args.paths:
+            for preprocess in args.preprocess:
+                for batch in args.batch:
+                    configs.append({"path": path, "model": model, "weights": weights, "preprocess": preprocess,
+                                    "batch": batch, "frames": args.frames, "warmup": args.warmup})
+    if not configs:
+        print("❌ Nothing to run")
+        return 1
+
+    clip = args.clip
+    if clip is None:
+        clip = CACHE_DIR / "synthetic_240f_1280x720_seed7.mp4"
+        if not clip.exists():
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            print(f"🎬 Generating synthetic clip → {clip}")
+            make_clip(clip)
+    clip = str(Path(clip).resolve())
+    for config in configs:
+        config["clip"] = clip
+
+    results = []
+    print(f"{'path':<10}{'model':<7}{'prep':<10}{'batch':>6}{'fps':>9}{'p50 ms':>9}{'p95 ms':>9}{'rss MB':>9}")
+    for config in configs:
+        result = run_isolated(__file__, config)
+        result.update({k: config[k] for k in KEY_FIELDS})
+        results.append(result)
+        if "error" in result:
+            print(f"{config['path']:<10}{config['model']:<7}{config['preprocess']:<10}{config['batch']:>6}  ❌ {result['error']}")
+            continue
+        print(f"{result['path']:<10}{result['model']:<7}{result['preprocess']:<10}{result['batch']:>6}"
+              f"{result['fps']:>9}{result['frame_ms']['p50_ms']:>9}{result['p95_ms']:>9}"
+              f"{result['peak_rss_mb'] or '-':>9}")
+
+    params = {k: v for k, v in vars(args).items() if k not in ("worker", "baseline", "out")}
+    params["clip"] = clip
+    path = write_results("cv", params, results, **({"out_dir": args.out} if args.out else {}))
+    print(f"💾 Results → {path}")
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, KEY_FIELDS, {"fps": True, "p95_ms": False}, args.threshold)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
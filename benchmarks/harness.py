@@ -0,0 +1,126 @@
+"""
+Shared plumbing for the benchmark suites.
+
+- Each configuration runs in its own worker process (run_isolated), so peak RSS
+  is per configuration and one tier's caches or allocator state do not leak
+  into the next.
+- Results are written as JSON with the git commit, dirty flag and machine
+  details (write_results). compare() diffs a run against a baseline file from
+  another commit and flags metrics that regressed beyond a threshold.
+"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import resource
+except Exception:
+    resource = None
+
+try:
+    import psutil
+except Exception:
+    psutil = None
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = REPO_ROOT / "benchmarks" / "results"
+CACHE_DIR = REPO_ROOT / "benchmarks" / ".cache"
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return round(getattr(info, "peak_wset", info.rss) / (1024 * 1024), 1)
+    return None
+
+
+def git_revision():
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=REPO_ROOT, capture_output=True, text=True, timeout=10).stdout.strip()
+    try:
+        return {"commit": git("rev-parse", "--short", "HEAD") or None,
+                "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+    except Exception:
+        return {"commit": None, "dirty": None}
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run_isolated(script, config, timeout=1800):
+    """Run `script --worker <config json>` and return the JSON it prints last, or an error dict"""
+    started = time.perf_counter()
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)  # workers run here, so stray output files land in the cache
+    try:
+        proc = subprocess.run([sys.executable, str(script), "--worker", json.dumps(config)],
+                              capture_output=True, text=True, timeout=timeout, cwd=str(CACHE_DIR))
+    except subprocess.TimeoutExpired:
+        return {"error": f"timed out after {timeout}s"}
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith("{"):
+            result = json.loads(line)
+            result["wall_s"] = round(time.perf_counter() - started, 1)
+            return result
+    tail = (proc.stderr or proc.stdout).strip().splitlines()[-5:]
+    return {"error": f"worker exited with {proc.returncode}: " + " | ".join(tail)}
+
+
+def write_results(suite, params, results, out_dir=RESULTS_DIR):
+    revision = git_revision()
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = Path(out_dir) / f"{suite}-{revision['commit'] or 'nogit'}-{stamp}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "suite": suite,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "git": revision,
+        "env": environment(),
+        "params": params,
+        "results": results,
+    }
+    path.write_text(json.dumps(payload, indent=2))
+    return path
+
+
+def compare(results, baseline_path, key_fields, metrics, threshold=0.1):
+    """
+    Print each metric next to the baseline run's value.
+
+    `metrics` maps a metric name to True when higher is better. Returns the
+    number of regressions, i.e. changes for the worse larger than `threshold`.
+    """
+    baseline = json.loads(Path(baseline_path).read_text())
+    before = {tuple(r.get(k) for k in key_fields): r for r in baseline["results"] if "error" not in r}
+    print(f"\n📊 Against {Path(baseline_path).name} ({baseline['git'].get('commit')})")
+    regressions = 0
+    for result in results:
+        key = tuple(result.get(k) for k in key_fields)
+        old = before.get(key)
+        if old is None or "error" in result:
+            continue
+        for metric, higher_is_better in metrics.items():
+            new_value, old_value = result.get(metric), old.get(metric)
+            if not new_value or not old_value:
+                continue
+            change = (new_value - old_value) / old_value
+            worse = -change if higher_is_better else change
+            flag = "❌" if worse > threshold else "✅"
+            regressions += worse > threshold
+            print(f"{flag} {'/'.join(map(str, key))} {metric}: {old_value} → {new_value} ({change:+.1%})")
+    return regressions
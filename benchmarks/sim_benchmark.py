@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Simulation engine benchmark.
+
+    python benchmarks/sim_benchmark.py --vehicles 100 1000 10000
+
+Both engines run headless on SDL's dummy video driver:
+- simulation.py: the scheduler step (moveVehicles plus the signal tick), then
+  Main.draw() for rendering.
+- manual_simulation.py: ManualSimulation.update_vehicles(), then render().
+
+For each fixed starting population, each engine runs in its own process. The
+vehicles are spawned up front, queued back from the stop lines; spawning is
+then switched off. The benchmark reports:
+- ticks/s of the update step alone
+- update and render time per tick (mean / p95)
+- allocation churn per tick, from a separate tracemalloc pass so tracing does
+  not slow the timed ticks. alloc_kb_per_tick is the transient peak above
+  the tick's starting memory; alloc_blocks_per_tick is the net growth in
+  allocated blocks
+- gen-0 GC collections per 1000 ticks
+- spawn cost and peak RSS
+
+Results go to benchmarks/results/sim-<commit>-<time>.json. --baseline compares
+against an earlier run.
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from benchmarks.harness import REPO_ROOT, compare, peak_rss_mb, run_isolated, write_results  # noqa: E402
+
+ENGINES = ("simulation", "manual")
+KEY_FIELDS = ("engine", "vehicles")
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 4),
+        "p95_ms": round(samples[min(len(samples) - 1, int(0.95 * len(samples)))] * 1000, 4),
+    }
+
+
+# --- engines -----------------------------------------------------------------------
+def setup_simulation(vehicles, seed):
+    """simulation.py's module-level engine with `vehicles` queued in random lanes"""
+    os.environ.update({"SIM_HEADLESS": "1", "SIM_QUIET": "1", "SIM_SEED": str(seed)})
+    import simulation as sim
+
+    main = sim.Main(run=False)
+    sim.autoSpawn = False
+    rng = random.Random(seed)
+    for _ in range(vehicles):
+        vehicle_type = rng.randint(0, 4)  # no ambulances: they would force signal preemption
+        lane = 0 if vehicle_type == 4 else rng.randint(1, 2)
+        sim.spawnVehicle(vehicle_type, lane, rng.randint(0, 3), rng.randint(0, 1) if lane == 2 else 0)
+
+    def update():
+        sim.scheduler.run_until(sim.scheduler.now + sim.stepInterval)
+
+    return update, main.draw, lambda: len(sim.simulation)
+
+
+def setup_manual(vehicles, seed):
+    """ManualSimulation with `vehicles` spawned and spaced back along their lanes"""
+    import manual_simulation as manual
+
+    manual.socketio = None  # no dashboard connection attempts
+    random.seed(seed)
+    sim = manual.ManualSimulation()
+    for _ in range(vehicles):
+        sim.spawn_vehicle()
+    spacing = 45  # longest sprite plus the 30 px following distance
+    for queue in sim.lane_queues.values():
+        for k, vehicle in enumerate(queue):
+            vehicle.x -= vehicle.dx * k * spacing
+            vehicle.y -= vehicle.dy * k * spacing
+    for direction in manual.DIRECTION_NAMES:  # one approach flowing, the rest queued
+        sim.set_signal_state(direction, manual.SIGNAL_GREEN if direction == manual.EAST else manual.SIGNAL_RED)
+
+    return sim.update_vehicles, sim.render, lambda: len(sim.vehicles)
+
+
+def run_worker(config):
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    os.environ.setdefault("TRACE_LOG", "off")
+    sys.path.insert(0, str(REPO_ROOT / "simulation"))
+
+    setup = setup_simulation if config["engine"] == "simulation" else setup_manual
+    started = time.perf_counter()
+    update, render, population = setup(config["vehicles"], config["seed"])
+    spawn_s = time.perf_counter() - started
+    population_start = population()
+
+    for _ in range(config["warmup"]):
+        update()
+        render()
+
+    collections = [0]
+
+    def on_gc(phase, info):
+        if phase == "start" and info["generation"] == 0:
+            collections[0] += 1
+
+    gc.callbacks.append(on_gc)
+    update_times, render_times = [], []
+    clock = time.perf_counter
+    for _ in range(config["ticks"]):
+        t0 = clock()
+        update()
+        t1 = clock()
+        render()
+        t2 = clock()
+        update_times.append(t1 - t0)
+        render_times.append(t2 - t1)
+    gc.callbacks.remove(on_gc)
+
+    # Allocation pass, separate from the timed ticks
+    tracemalloc.start()
+    peaks, blocks = [], []
+    for _ in range(config["alloc_ticks"]):
+        start_bytes = tracemalloc.get_traced_memory()[0]
+        start_blocks = sys.getallocatedblocks()
+        tracemalloc.reset_peak()
+        update()
+        render()
+        peaks.append(tracemalloc.get_traced_memory()[1] - start_bytes)
+        blocks.append(sys.getallocatedblocks() - start_blocks)
+    tracemalloc.stop()
+
+    update_total = sum(update_times)
+    return {
+        **{k: config[k] for k in KEY_FIELDS},
+        "ticks": config["ticks"],
+        "ticks_per_s": round(len(update_times) / update_total, 1) if update_total else None,
+        "update": summarize(update_times),
+        "render": summarize(render_times),
+        "render_ms": summarize(render_times)["mean_ms"],
+        "alloc_kb_per_tick": round(sum(peaks) / len(peaks) / 1024, 2) if peaks else None,
+        "alloc_blocks_per_tick": round(sum(blocks) / len(blocks), 1) if blocks else None,
+        "gc_gen0_per_1k_ticks": round(collections[0] * 1000 / config["ticks"], 1),
+        "spawn_s": round(spawn_s, 3),
+        "population_start": population_start,
+        "population_end": population(),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+# --- driver ------------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Headless simulation engine benchmark")
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=list(ENGINES))
+    parser.add_argument("--vehicles", nargs="+", type=int, default=[100, 1000, 10000])
+    parser.add_argument("--ticks", type=int, default=300, help="timed ticks (60 per simulated second)")
+    parser.add_argument("--warmup", type=int, default=30)
+    parser.add_argument("--alloc-ticks", type=int, default=30, help="ticks traced with tracemalloc")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", default=None, help="results directory (default benchmarks/results)")
+    parser.add_argument("--baseline", help="earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative change that counts as a regression")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(json.loads(args.worker))))
+        return 0
+
+    results = []
+    print(f"{'engine':<12}{'vehicles':>9}{'ticks/s':>10}{'update ms':>11}{'render ms':>11}"
+          f"{'alloc KB':>10}{'gc/1k':>8}{'rss MB':>9}")
+    for engine in args.engines:
+        for vehicles in args.vehicles:
+            config = {"engine": engine, "vehicles": vehicles, "ticks": args.ticks, "warmup": args.warmup,
+                      "alloc_ticks": args.alloc_ticks, "seed": args.seed}
+            result = run_isolated(__file__, config)
+            result.update({k: config[k] for k in KEY_FIELDS})
+            results.append(result)
+            if "error" in result:
+                print(f"{engine:<12}{vehicles:>9}  ❌ {result['error']}")
+                continue
+            print(f"{engine:<12}{vehicles:>9}{result['ticks_per_s']:>10}{result['update']['mean_ms']:>11}"
+                  f"{result['render']['mean_ms']:>11}{result['alloc_kb_per_tick']:>10}"
+                  f"{result['gc_gen0_per_1k_ticks']:>8}{result['peak_rss_mb'] or '-':>9}")
+
+    params = {k: v for k, v in vars(args).items() if k not in ("worker", "baseline", "out")}
+    path = write_results("sim", params, results, **({"out_dir": args.out} if args.out else {}))
+    print(f"💾 Results → {path}")
+
+    if args.baseline:
+        metrics = {"ticks_per_s": True, "render_ms": False, "alloc_kb_per_tick": False}
+        return 1 if compare(results, args.baseline, KEY_FIELDS, metrics, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+Fixed-shape vehicle count snapshots shared by providers, the simulation and controllers.
+
+A snapshot holds the counts for 4 directions x 3 lanes in one flat integer array,
+an ambulance direction index (-1 when there is none) and a version number that
+increases with every publish. Read-only views expose it through the Mapping
+protocol, so code written for the nested-dict payloads keeps working:
+
+    snapshot["right"]["lane1"]           # -> int
+    controller.decide(snapshot["right"])  # lane -> count, like cv lane_counts
+    controller.decide(snapshot.totals)    # direction -> total
+
+The views are created once per snapshot, so reading allocates nothing.
+"""
+
+from array import array
+from collections.abc import Mapping
+from typing import Iterator, Optional
+
+DIRECTIONS = ("right", "down", "left", "up")
+LANES = ("lane0", "lane1", "lane2")
+DIRECTION_INDEX = {d: i for i, d in enumerate(DIRECTIONS)}
+LANE_INDEX = {lane: i for i, lane in enumerate(LANES)}
+N_LANES = len(LANES)
+
+
+class LaneCounts(Mapping):
+    """Read-only lane -> count view of one direction"""
+
+    __slots__ = ("_counts", "_base")
+
+    def __init__(self, counts: array, direction_index: int):
+        self._counts = counts
+        self._base = direction_index * N_LANES
+
+    def __getitem__(self, lane: str) -> int:
+        return self._counts[self._base + LANE_INDEX[lane]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(LANES)
+
+    def __len__(self) -> int:
+        return N_LANES
+
+
+class DirectionTotals(Mapping):
+    """Read-only direction -> total vehicles view"""
+
+    __slots__ = ("_counts",)
+
+    def __init__(self, counts: array):
+        self._counts = counts
+
+    def __getitem__(self, direction: str) -> int:
+        base = DIRECTION_INDEX[direction] * N_LANES
+        counts = self._counts
+        return counts[base] + counts[base + 1] + counts[base + 2]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(DIRECTIONS)
+
+    def __len__(self) -> int:
+        return len(DIRECTIONS)
+
+
+class CountSnapshot(Mapping):
+    """Counts per direction x lane plus ambulance flag; a Mapping of direction -> LaneCounts"""
+
+    __slots__ = ("counts", "ambulance_index", "version", "_views", "totals")
+
+    def __init__(self):
+        self.counts = array("i", [0] * (len(DIRECTIONS) * N_LANES))
+        self.ambulance_index = -1
+        self.version = 0
+        self._views = {d: LaneCounts(self.counts, i) for i, d in enumerate(DIRECTIONS)}
+        self.totals = DirectionTotals(self.counts)
+
+    def __getitem__(self, direction: str) -> LaneCounts:
+        return self._views[direction]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(DIRECTIONS)
+
+    def __len__(self) -> int:
+        return len(DIRECTIONS)
+
+    def count(self, direction_index: int, lane_index: int) -> int:
+        return self.counts[direction_index * N_LANES + lane_index]
+
+    @property
+    def ambulance_direction(self) -> Optional[str]:
+        return DIRECTIONS[self.ambulance_index] if self.ambulance_index >= 0 else None
+
+    def copy_from(self, other: "CountSnapshot") -> None:
+        self.counts[:] = other.counts
+        self.ambulance_index = other.ambulance_index
+        self.version = other.version
+
+    def to_payload(self) -> dict:
+        """The nested-dict provider schema (for logging, JSON and older consumers)"""
+        ambulance = self.ambulance_direction
+        return {
+            "counts": {d: dict(self._views[d]) for d in DIRECTIONS},
+            "ambulance": {"direction": ambulance or "right", "present": ambulance is not None},
+        }
+
+
+class CountPublisher:
+    """
+    Double-buffered snapshot publisher.
+
+    A writer fills `back` in place and calls publish(), which swaps the buffers, so
+    publishing allocates nothing. Readers use `current` directly. A reference stays
+    valid until the next-but-one publish. Readers that keep a snapshot longer than
+    that should copy it.
+    """
+
+    def __init__(self):
+        self.current = CountSnapshot()
+        self.back = CountSnapshot()
+
+    def begin(self) -> CountSnapshot:
+        """Back buffer pre-filled with the current values, ready for in-place updates"""
+        self.back.copy_from(self.current)
+        return self.back
+
+    def publish(self) -> CountSnapshot:
+        self.back.version = self.current.version + 1
+        self.current, self.back = self.back, self.current
+        return self.current
@@ -0,0 +1,282 @@
+"""
+Process supervisor for the traffic system's components.
+
+- Readiness probes (HTTP, TCP port, file freshness) replace fixed warm-up sleeps.
+- Children that exit are restarted with exponential backoff. The backoff resets
+  once a child has stayed up for `stable_after` seconds.
+- A name -> process registry makes "is it already running?" an O(1) check
+  instead of a walk over every process on the machine.
+- stats() reports per-child CPU% and RSS (including the child's own children,
+  e.g. node under npm) when psutil is available.
+"""
+
+import os
+import socket
+import subprocess
+import threading
+import time
+import urllib.request
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+try:
+    import psutil
+except Exception:
+    psutil = None
+
+
+def http_probe(url: str, timeout: float = 1.0) -> Callable[[], bool]:
+    def probe() -> bool:
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as resp:
+                return 200 <= resp.status < 400
+        except Exception:
+            return False
+    return probe
+
+
+def port_probe(host: str, port: int, timeout: float = 0.5) -> Callable[[], bool]:
+    def probe() -> bool:
+        try:
+            with socket.create_connection((host, port), timeout=timeout):
+                return True
+        except OSError:
+            return False
+    return probe
+
+
+def file_probe(path: os.PathLike, since: Optional[float] = None) -> Callable[[], bool]:
+    """Ready once the file exists and was modified after `since` (default: probe creation)"""
+    since = time.time() if since is None else since
+
+    def probe() -> bool:
+        try:
+            return os.stat(path).st_mtime >= since
+        except OSError:
+            return False
+    return probe
+
+
+@dataclass
+class ProcessSpec:
+    name: str
+    cmd: List[str]
+    cwd: Optional[str] = None
+    env: Optional[Dict[str, str]] = None
+    ready: Optional[Callable[[], bool]] = None
+    ready_timeout: float = 60.0
+    restart: str = "on-failure"  # "always" | "on-failure" | "never"
+    max_restarts: int = 5
+    backoff: float = 1.0
+    max_backoff: float = 60.0
+    stable_after: float = 60.0
+
+
+@dataclass
+class ManagedProcess:
+    spec: ProcessSpec
+    proc: Optional[subprocess.Popen] = None
+    state: str = "stopped"  # starting | ready | backoff | failed | exited | stopped
+    started_at: float = 0.0
+    restarts: int = 0
+    next_start_at: float = 0.0
+    exit_code: Optional[int] = None
+    ps: object = field(default=None, repr=False)
+    # psutil handles of descendants, kept so their CPU counters accumulate between reads
+    family: Dict[int, object] = field(default_factory=dict, repr=False)
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.proc.pid if self.proc is not None else None
+
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
+
+
+class Supervisor:
+    def __init__(self):
+        self._procs: Dict[str, ManagedProcess] = {}
+        self._by_pid: Dict[int, str] = {}
+        self._lock = threading.RLock()
+
+    # --- registry -------------------------------------------------------------
+    def is_running(self, name: str) -> bool:
+        with self._lock:
+            managed = self._procs.get(name)
+            return managed is not None and managed.alive()
+
+    def get(self, name: str) -> Optional[ManagedProcess]:
+        return self._procs.get(name)
+
+    def name_of(self, pid: int) -> Optional[str]:
+        return self._by_pid.get(pid)
+
+    # --- lifecycle ------------------------------------------------------------
+    def start(self, spec: ProcessSpec, wait_ready: bool = True) -> ManagedProcess:
+        with self._lock:
+            managed = self._procs.get(spec.name)
+            if managed is not None and managed.alive():
+                return managed
+            if managed is None:
+                managed = ManagedProcess(spec=spec)
+                self._procs[spec.name] = managed
+            else:
+                managed.spec = spec
+            self._launch(managed)
+        if wait_ready:
+            self.wait_ready(spec.name)
+        return managed
+
+    def spawn(self, spec: ProcessSpec) -> tuple:
+        """Start on demand unless already running; returns (managed process, started)"""
+        with self._lock:
+            if self.is_running(spec.name):
+                return self._procs[spec.name], False
+            return self.start(spec, wait_ready=False), True
+
+    def _launch(self, managed: ManagedProcess) -> None:
+        spec = managed.spec
+        if managed.pid is not None:
+            self._by_pid.pop(managed.pid, None)
+        managed.proc = subprocess.Popen(spec.cmd, cwd=spec.cwd, env=spec.env)
+        managed.state = "starting" if spec.ready is not None else "ready"
+        managed.started_at = time.monotonic()
+        managed.exit_code = None
+        managed.ps = None
+        managed.family = {}
+        if psutil is not None:
+            try:
+                managed.ps = psutil.Process(managed.proc.pid)
+                managed.ps.cpu_percent(None)  # prime the CPU counter
+            except Exception:
+                managed.ps = None
+        self._by_pid[managed.proc.pid] = spec.name
+        print(f"▶️  {spec.name} started (pid {managed.proc.pid})")
+
+    def wait_ready(self, name: str) -> bool:
+        managed = self._procs[name]
+        spec = managed.spec
+        if spec.ready is None:
+            return True
+        deadline = time.monotonic() + spec.ready_timeout
+        delay = 0.1
+        while time.monotonic() < deadline:
+            if not managed.alive():
+                print(f"❌ {name} exited before becoming ready")
+                return False
+            if spec.ready():
+                managed.state = "ready"
+                print(f"✅ {name} ready after {time.monotonic() - managed.started_at:.1f}s")
+                return True
+            time.sleep(delay)
+            delay = min(delay * 2, 1.0)
+        print(f"⚠️ {name} not ready after {spec.ready_timeout:.0f}s, continuing")
+        return False
+
+    def poll(self) -> None:
+        """Check children once: update readiness, schedule and perform restarts"""
+        now = time.monotonic()
+        with self._lock:
+            for name, managed in self._procs.items():
+                spec = managed.spec
+                if managed.state == "starting" and managed.alive() and spec.ready():
+                    managed.state = "ready"
+                if managed.state == "backoff":
+                    if now >= managed.next_start_at:
+                        self._launch(managed)
+                    continue
+                if managed.proc is None or managed.alive() or managed.state in ("failed", "exited", "stopped"):
+                    continue
+
+                managed.exit_code = managed.proc.returncode
+                self._by_pid.pop(managed.proc.pid, None)
+                if now - managed.started_at >= spec.stable_after:
+                    managed.restarts = 0  # it ran fine for a while: start backoff from scratch
+                wants_restart = spec.restart == "always" or (spec.restart == "on-failure" and managed.exit_code != 0)
+                if not wants_restart:
+                    managed.state = "exited"
+                    print(f"ℹ️ {name} exited with code {managed.exit_code}")
+                elif managed.restarts >= spec.max_restarts:
+                    managed.state = "failed"
+                    print(f"❌ {name} exited with code {managed.exit_code}; giving up after {managed.restarts} restarts")
+                else:
+                    delay = min(spec.backoff * (2 ** managed.restarts), spec.max_backoff)
+                    managed.restarts += 1
+                    managed.state = "backoff"
+                    managed.next_start_at = now + delay
+                    print(f"🔁 {name} exited with code {managed.exit_code}; restarting in {delay:.1f}s")
+
+    def stop_all(self, timeout: float = 5.0) -> None:
+        with self._lock:
+            procs = [m for m in self._procs.values() if m.alive()]
+            for managed in procs:
+                managed.proc.terminate()
+            deadline = time.monotonic() + timeout
+            for managed in procs:
+                try:
+                    managed.proc.wait(timeout=max(0.0, deadline - time.monotonic()))
+                except subprocess.TimeoutExpired:
+                    managed.proc.kill()
+                managed.state = "stopped"
+            self._by_pid.clear()
+
+    # --- resource accounting ----------------------------------------------------
+    def stats(self) -> List[Dict[str, object]]:
+        rows = []
+        with self._lock:
+            for name, managed in self._procs.items():
+                state = managed.state
+                if state in ("starting", "ready") and not managed.alive():
+                    state = "exited"  # noticed by the next poll()
+                row = {
+                    "name": name,
+                    "pid": managed.pid,
+                    "state": state,
+                    "restarts": managed.restarts,
+                    "exit_code": managed.exit_code,
+                    "uptime_s": round(time.monotonic() - managed.started_at, 1) if managed.alive() else 0.0,
+                    "cpu_percent": None,
+                    "rss_mb": None,
+                }
+                if managed.ps is not None and managed.alive():
+                    cpu, rss = _usage(managed)
+                    row["cpu_percent"] = round(cpu, 1)
+                    row["rss_mb"] = round(rss / (1024 * 1024), 1)
+                rows.append(row)
+        return rows
+
+    def print_stats(self) -> None:
+        for row in self.stats():
+            usage = ""
+            if row["cpu_percent"] is not None:
+                usage = f" cpu {row['cpu_percent']:5.1f}%  rss {row['rss_mb']:7.1f} MB"
+            print(f"   {row['name']:<20} {row['state']:<8} pid {row['pid']}{usage}")
+
+    def run_forever(self, interval: float = 1.0, report_every: float = 30.0) -> None:
+        last_report = time.monotonic()
+        while True:
+            self.poll()
+            if time.monotonic() - last_report >= report_every:
+                last_report = time.monotonic()
+                print("📊 Process usage:")
+                self.print_stats()
+            time.sleep(interval)
+
+
+def _usage(managed: ManagedProcess) -> tuple:
+    """CPU% and RSS of a process plus all of its descendants"""
+    family = {managed.ps.pid: managed.ps}
+    try:
+        for child in managed.ps.children(recursive=True):
+            family[child.pid] = managed.family.get(child.pid, child)
+    except Exception:
+        pass
+    managed.family = family
+    cpu = rss = 0.0
+    for proc in family.values():
+        try:
+            cpu += proc.cpu_percent(None)
+            rss += proc.memory_info().rss
+        except Exception:
+            continue
+    return cpu, rss
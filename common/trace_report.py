@@ -0,0 +1,110 @@
+"""
+Per-hop latency report for the trace log written by common/tracing.py.
+
+    python -m common.trace_report [TRACE_LOG] [--last SECONDS] [--json]
+
+Hops are measured between the first stamp of consecutive stages of one trace.
+The orchestrator re-plans from the latest counts until new ones arrive, so a
+single trace can have several plan and actuate stamps. The "age" rows use
+every one of those stamps: each row shows how old the counts were, measured
+from capture, when a plan was computed or applied.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.tracing import DEFAULT_TRACE_LOG, STAGES  # noqa: E402
+
+HOPS = list(zip(STAGES, STAGES[1:])) + [("capture", "actuate")]
+AGES = ("plan", "actuate")
+
+
+def load(path, last=None):
+    """{trace_id: {stage: [monotonic stamps, ...]}} from the log, skipping torn lines"""
+    records = []
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    if last is not None and records:
+        cutoff = max(r.get("wall", 0) for r in records) - last
+        records = [r for r in records if r.get("wall", 0) >= cutoff]
+    traces = {}
+    for r in records:
+        traces.setdefault(r["trace"], {}).setdefault(r["stage"], []).append(r["t"])
+    return traces
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-p * len(sorted_values) // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(values):
+    values = sorted(values)
+    return {
+        "n": len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": values[-1] if values else None,
+    }
+
+
+def report(traces):
+    """Rows of {name, n, p50, p95, p99, max}, latencies in milliseconds"""
+    hops = {hop: [] for hop in HOPS}
+    ages = {stage: [] for stage in AGES}
+    for stages in traces.values():
+        first = {stage: min(stamps) for stage, stamps in stages.items()}
+        for start, end in HOPS:
+            if start in first and end in first:
+                hops[(start, end)].append((first[end] - first[start]) * 1000)
+        if "capture" in first:
+            for stage in AGES:
+                ages[stage].extend((t - first["capture"]) * 1000 for t in stages.get(stage, ()))
+
+    rows = [dict(name=f"{start} → {end}", **summarize(values)) for (start, end), values in hops.items()]
+    rows += [dict(name=f"counts age at {stage}", **summarize(values)) for stage, values in ages.items()]
+    return rows
+
+
+def print_table(rows, n_traces):
+    print(f"📈 Detection → signal latency ({n_traces} traces, ms)")
+    print(f"{'hop':<26}{'n':>7}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for row in rows:
+        cells = "".join(f"{row[k]:>10.1f}" if row[k] is not None else f"{'-':>10}"
+                        for k in ("p50", "p95", "p99", "max"))
+        print(f"{row['name']:<26}{row['n']:>7}{cells}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-hop latency percentiles from the trace log")
+    parser.add_argument("path", nargs="?", default=str(DEFAULT_TRACE_LOG))
+    parser.add_argument("--last", type=float, help="only the last N seconds of the log")
+    parser.add_argument("--json", action="store_true", help="print rows as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        traces = load(args.path, last=args.last)
+    except OSError as e:
+        print(f"❌ Cannot read trace log: {e}")
+        return 1
+    rows = report(traces)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print_table(rows, len(traces))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
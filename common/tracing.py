@@ -0,0 +1,100 @@
+"""
+Latency tracing for the detection -> signal pipeline.
+
+cv_module gives each frame a trace ID when it is captured. The ID travels with
+the counts through the counts JSONL, the orchestrator, signal_plan.json and
+the /events POST. Each process stamps it at its stage with time.monotonic().
+On one machine that clock (CLOCK_MONOTONIC) is shared by every process, so
+stamps written by different components can be subtracted directly.
+
+Tracing is off unless TRACE_LOG is set, in the environment of every component:
+TRACE_LOG=on appends to ai_module/latency_trace.jsonl, any other value is the
+path of the trace log. Stamps are appended as JSON lines; each line goes out in
+one O_APPEND write, so several processes can share the file without locking.
+The file is never trimmed, so only every TRACE_SAMPLE-th frame is traced
+(default 10).
+
+Stages, in pipeline order:
+    capture    frame read from the video
+    inference  detector returned
+    publish    counts flushed to the counts JSONL and sent to the backend
+    plan       orchestrator computed a plan from those counts
+    actuate    backend received the plan
+
+common/trace_report.py turns the log into per-hop percentiles.
+"""
+
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+
+STAGES = ("capture", "inference", "publish", "plan", "actuate")
+DEFAULT_TRACE_LOG = Path(__file__).resolve().parent.parent / "ai_module" / "latency_trace.jsonl"
+DEFAULT_SAMPLE = 10
+
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+class Tracer:
+    def __init__(self, path: Optional[os.PathLike], component: str, sample: int = 1):
+        self.path = Path(path) if path else None
+        self.component = component
+        self.sample = max(1, int(sample))
+        self._fd = None
+        self._started = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def start(self, stage: str = "capture", **fields) -> Optional[str]:
+        """New trace ID stamped at its first stage; None when disabled or not sampled"""
+        if self.path is None:
+            return None
+        self._started += 1
+        if (self._started - 1) % self.sample:
+            return None
+        trace_id = new_trace_id()
+        self.stamp(trace_id, stage, **fields)
+        return trace_id
+
+    def stamp(self, trace_id: Optional[str], stage: str, t: Optional[float] = None, **fields) -> None:
+        """Record that `trace_id` reached `stage`; a no-op for a missing ID"""
+        if not trace_id or self.path is None:
+            return
+        record = {
+            "trace": trace_id,
+            "stage": stage,
+            "t": round(time.monotonic() if t is None else t, 6),
+            "wall": round(time.time(), 3),
+            "component": self.component,
+        }
+        record.update(fields)
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode()
+        try:
+            if self._fd is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._fd = os.open(str(self.path), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            os.write(self._fd, line)
+        except OSError as e:
+            print(f"⚠️ Tracing disabled, cannot write {self.path}: {e}")
+            self.path = None
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+def tracer_from_env(component: str) -> Tracer:
+    path = os.environ.get("TRACE_LOG", "").strip()
+    if path.lower() in ("", "0", "off", "false", "none"):
+        path = None
+    elif path.lower() in ("1", "on", "true"):
+        path = DEFAULT_TRACE_LOG
+    return Tracer(path, component, sample=int(os.environ.get("TRACE_SAMPLE", DEFAULT_SAMPLE)))
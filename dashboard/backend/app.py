@@ -1,3 +1,13 @@
+import os
+
+# Async worker model: 'threading' (Werkzeug dev server, default) or 'eventlet' (one process,
+# green threads, hundreds of concurrent Socket.IO / MJPEG clients). The eventlet hub has to
+# patch the standard library before anything else imports socket/threading.
+ASYNC_MODE = os.environ.get('SOCKETIO_ASYNC_MODE', 'threading')
+if ASYNC_MODE == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+
 from flask import Flask, jsonify, request, Response
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
@@ -5,31 +15,61 @@ import random
 import time
 import threading
 from datetime import datetime, timedelta
-import json
-import subprocess
-import cv2
-import numpy as np
-import base64
-import os
-import psutil
+import sys
+import uuid
+
+import what_if
+from frame_hub import FrameHub
+from broadcaster import Broadcaster
+from state_sync import VersionedState
+import timeseries
+from kpi import CO2_PER_VEHICLE, KpiAggregator, estimated_wait
+from junction_cache import JunctionCache
+from metrics import Metrics
+
+# Shared modules (common/) live at the repository root
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+from common.supervisor import ProcessSpec, Supervisor  # noqa: E402
+from common.tracing import tracer_from_env  # noqa: E402
+
+# Simulations launched from the dashboard, tracked by name so duplicate checks are O(1)
+supervisor = Supervisor()
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'smart-traffic-secret-key'
-CORS(app, origins=["http://localhost:3000", "http://localhost:3001"])
-socketio = SocketIO(app, cors_allowed_origins=["http://localhost:3000", "http://localhost:3001"], async_mode='threading')
+CORS(app, origins=["http://localhost:3000", "http://localhost:3001"], expose_headers=['ETag'])
+socketio = SocketIO(app, cors_allowed_origins=["http://localhost:3000", "http://localhost:3001"], async_mode=ASYNC_MODE)
+
+# Per-route / per-event latency, sizes and stream counts, scraped from /api/metrics
+metrics = Metrics()
+metrics.init_app(app)
 
 # Global variable to store the latest CV frame
 latest_cv_frame = None
+cv_frame_seq = 0  # frames received since start; cv_module's own numbering restarts with it
+cv_frame_received_at = None
 cv_data_lock = threading.Lock()
+# Latest CV frame as a ready-to-send MJPEG chunk, shared by all /api/cv-stream viewers
+frame_hub = FrameHub(max_fps=10)
+
+# High-rate events go through the broadcaster: rate-limited, coalesced, dropped for slow clients
+broadcaster = Broadcaster(socketio)
+broadcaster.topic('cv_frame_update', max_rate=float(os.environ.get('BROADCAST_CV_RATE', '5')))
+broadcaster.topic('signal_state_update', max_rate=float(os.environ.get('BROADCAST_SIGNAL_RATE', '10')))
+
+# Real counts, events and plans over time; /api/analytics reads its precomputed rollups
+store = timeseries.from_env(os.path.dirname(os.path.abspath(__file__)))
+
+# Running KPIs, updated per CV frame / simulation event so /api/stats is a plain read
+kpis = KpiAggregator(window=float(os.environ.get('KPI_WINDOW', '300')))
 
-# Load signals vehicle data
-signals_vehicle_data = {}
-try:
-    with open(os.path.join(os.path.dirname(__file__), 'signals_vehicle_data.json'), 'r') as f:
-        signals_vehicle_data = json.load(f)
-except Exception as e:
-    print(f"Warning: Could not load signals_vehicle_data.json: {e}")
-    signals_vehicle_data = {"signals_vehicle_data": [], "system_totals": {"total_vehicles_detected": 0}}
+# Detection -> signal latency stamps (actuate stage); see common/trace_report.py
+tracer = tracer_from_env('backend')
+
+# Junction metadata: immutable snapshots, reloaded when signals_vehicle_data.json changes on disk
+junctions = JunctionCache(os.path.join(os.path.dirname(__file__), 'signals_vehicle_data.json'))
 
 # Mock data storage
 traffic_data = {
@@ -171,66 +211,101 @@ def initialize_mock_data():
         {'location': 'Main St & 1st Ave', 'congestion_level': 68, 'trend': 'decreasing'}
     ]
 
+# What dashboards display, versioned: clients get JSON-patch deltas, REST gets ETags
+dashboard_state = VersionedState()
+
+def sync_state(*sections):
+    """Diff traffic_data into the versioned state (all sections, or just the named ones) and push the delta"""
+    current = {
+        'stats': lambda: {
+            'vehicles_detected': traffic_data['vehicles_detected'],
+            'co2_saved': traffic_data['co2_saved'],
+            'avg_wait_time': traffic_data['avg_wait_time'],
+            'mode': traffic_data['mode'],
+            'kpis': traffic_data.get('kpis'),
+        },
+        'signals': lambda: traffic_data['signals'],
+        'emergency_vehicles': lambda: traffic_data['emergency_vehicles'],
+        'alerts': lambda: traffic_data['alerts'],
+    }
+    patch = dashboard_state.update(**{name: current[name]() for name in (sections or current)})
+    if patch:
+        socketio.emit('state_patch', patch)
+    return patch
+
+def conditional_json(etag, build):
+    """Answer If-None-Match with 304 before the body is built or serialized"""
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'  # always revalidate, but reuse the cached body
+    return response
+
 # Calculate aggregate stats
-def calculate_stats():
-    # Use CV data if available, otherwise use JSON data or mock data
-    total_vehicles = 0
+def calculate_stats(jitter=0):
+    # Use CV data if available (precomputed as frames arrive), otherwise use JSON data or mock data;
+    # `jitter` (from the background updater) nudges the JSON total to simulate real-time changes
+    cv_stats = kpis.stats()
+    if cv_stats is not None:
+        traffic_data.update(cv_stats)
+        return
     
-    # If we have CV frame data, use the lane counts
-    if latest_cv_frame and 'lane_counts' in latest_cv_frame:
-        lane_counts = latest_cv_frame['lane_counts']
-        total_vehicles = sum(lane_counts.values()) if lane_counts else 0
-        # Multiply by number of signals to simulate system-wide detection
-        total_vehicles = total_vehicles * len(traffic_data['signals'])
-    elif signals_vehicle_data and 'system_totals' in signals_vehicle_data:
+    junction_data = junctions.get().data
+    if 'system_totals' in junction_data:
         # Use data from JSON file
-        total_vehicles = signals_vehicle_data['system_totals'].get('total_vehicles_detected', 0)
-        # Add some randomization to simulate real-time changes
-        total_vehicles += random.randint(-10, 15)
+        total_vehicles = junction_data['system_totals'].get('total_vehicles_detected', 0) + jitter
     else:
         # Fallback to existing calculation
         total_vehicles = sum(signal['vehicles_detected'] for signal in traffic_data['signals'])
     
-    total_co2_saved = total_vehicles * 0.25  # Estimated CO2 saved per vehicle
-    avg_wait = 45 if total_vehicles > 100 else 30 if total_vehicles > 50 else 20
+    total_co2_saved = total_vehicles * CO2_PER_VEHICLE  # Estimated CO2 saved per vehicle
     
     traffic_data['vehicles_detected'] = max(0, total_vehicles)
     traffic_data['co2_saved'] = round(total_co2_saved, 1)
-    traffic_data['avg_wait_time'] = avg_wait
+    traffic_data['avg_wait_time'] = estimated_wait(total_vehicles)
 
 # API Endpoints
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
-    calculate_stats()
-    return jsonify({
-        'vehicles_detected': traffic_data['vehicles_detected'],
-        'co2_saved': traffic_data['co2_saved'],
-        'avg_wait_time': traffic_data['avg_wait_time'],
-        'mode': traffic_data['mode'],
-        'timestamp': datetime.now().isoformat()
-    })
+    # Stats are refreshed as CV frames arrive and by the background updater; polling only reads
+    etag, state = dashboard_state.read('stats')
+    return conditional_json(etag, lambda: dict(state['stats'], timestamp=datetime.now().isoformat()))
 
+# Bodies come from the synced state, not live traffic_data, so they always match their ETag
 @app.route('/api/alerts', methods=['GET'])
 def get_alerts():
-    return jsonify({
-        'alerts': traffic_data['alerts'],
+    etag, state = dashboard_state.read('alerts')
+    return conditional_json(etag, lambda: {
+        'alerts': state['alerts'],
         'timestamp': datetime.now().isoformat()
     })
 
 @app.route('/api/map-data', methods=['GET'])
 def get_map_data():
-    return jsonify({
-        'signals': traffic_data['signals'],
-        'emergency_vehicles': traffic_data['emergency_vehicles'],
+    etag, state = dashboard_state.read('signals', 'emergency_vehicles')
+    return conditional_json(etag, lambda: {
+        'signals': state['signals'],
+        'emergency_vehicles': state['emergency_vehicles'],
         'timestamp': datetime.now().isoformat()
     })
 
 @app.route('/api/analytics', methods=['GET'])
 def get_analytics():
+    try:
+        analytics = store.analytics()
+    except Exception as e:
+        print(f"⚠️ Time-series query failed: {e}")
+        analytics = None
+    if analytics is None:
+        # Nothing recorded yet: fall back to the mock series
+        analytics = traffic_data['analytics']
     return jsonify({
-        'hourly_traffic': traffic_data['analytics']['hourly_traffic'],
-        'co2_trends': traffic_data['analytics']['co2_trends'],
-        'congestion_hotspots': traffic_data['analytics']['congestion_hotspots'],
+        'hourly_traffic': analytics['hourly_traffic'],
+        'co2_trends': analytics['co2_trends'],
+        'congestion_hotspots': analytics['congestion_hotspots'],
+        'source': 'mock' if analytics is traffic_data['analytics'] else 'timeseries',
         'timestamp': datetime.now().isoformat()
     })
 
@@ -242,6 +317,7 @@ def toggle_mode():
     if new_mode in ['automation', 'manual']:
         traffic_data['mode'] = new_mode
         socketio.emit('mode_changed', {'mode': new_mode})
+        sync_state()
         return jsonify({'success': True, 'mode': new_mode})
     
     return jsonify({'success': False, 'error': 'Invalid mode'}), 400
@@ -259,28 +335,8 @@ def get_camera_feed(signal_id):
 @app.route('/api/cv-stream')
 def cv_video_stream():
     """Stream the latest CV processed video frames"""
-    def generate_frames():
-        while True:
-            with cv_data_lock:
-                if latest_cv_frame and 'image' in latest_cv_frame:
-                    try:
-                        # Decode base64 image
-                        img_data = base64.b64decode(latest_cv_frame['image'])
-                        # Convert to OpenCV format
-                        np_arr = np.frombuffer(img_data, np.uint8)
-                        frame = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
-                        
-                        # Encode frame as JPEG
-                        ret, buffer = cv2.imencode('.jpg', frame)
-                        if ret:
-                            frame_bytes = buffer.tobytes()
-                            yield (b'--frame\r\n'
-                                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-                    except Exception as e:
-                        print(f"Error processing CV frame: {e}")
-            time.sleep(0.1)  # 10 FPS
-    
-    return Response(generate_frames(),
+    # All viewers share one hub: each frame is decoded once, not once per viewer per tick
+    return Response(frame_hub.frames(sleep=socketio.sleep),
                     mimetype='multipart/x-mixed-replace; boundary=frame')
 
 @app.route('/api/cv-data')
@@ -298,30 +354,52 @@ def get_cv_data():
 @app.route('/api/signals-vehicle-data', methods=['GET'])
 def get_signals_vehicle_data():
     """Get detailed vehicle counts for all signals"""
-    # Enhance with real-time CV data if available
-    enhanced_data = signals_vehicle_data.copy() if signals_vehicle_data else {"signals_vehicle_data": []}
+    # The document changes with the junction file or a new CV frame; together they are its version
+    junction = junctions.get()
+    with cv_data_lock:
+        cv_frame, seq, received_at = latest_cv_frame, cv_frame_seq, cv_frame_received_at
+    etag = f"{dashboard_state.epoch}-{junction.version}-cv-{seq}"
+    return conditional_json(etag, lambda: build_signals_vehicle_data(etag, junction, cv_frame, seq, received_at))
+
+_signals_vehicle_doc = (None, None)
+
+def build_signals_vehicle_data(etag, junction, cv_frame, seq, received_at):
+    """Built once per version and shared by all clients fetching it"""
+    global _signals_vehicle_doc
+    if _signals_vehicle_doc[0] == etag:
+        return _signals_vehicle_doc[1]
+    base = junction.data
+    if not (cv_frame and 'lane_counts' in cv_frame):
+        return base  # frozen snapshot data serializes as-is
+
+    # Enhance with real-time CV data: copy-on-write overlay, the snapshot itself is never touched
+    cv_lane_counts = cv_frame['lane_counts']
+    total_cv_vehicles = sum(cv_lane_counts.values()) if cv_lane_counts else 0
+    enhanced_data = dict(base)
     
-    if latest_cv_frame and 'lane_counts' in latest_cv_frame:
-        cv_lane_counts = latest_cv_frame['lane_counts']
-        total_cv_vehicles = sum(cv_lane_counts.values()) if cv_lane_counts else 0
-        
-        # Update system totals with real CV data
-        if 'system_totals' not in enhanced_data:
-            enhanced_data['system_totals'] = {}
-        enhanced_data['system_totals']['total_vehicles_detected'] = total_cv_vehicles * len(traffic_data['signals'])
-        enhanced_data['system_totals']['cv_active'] = True
-        enhanced_data['system_totals']['last_updated'] = datetime.now().isoformat()
-        
-        # Update individual signal data with CV data simulation
-        if 'signals_vehicle_data' in enhanced_data:
-            for i, signal_data in enumerate(enhanced_data['signals_vehicle_data']):
-                # Distribute CV counts among signals with some variation
-                base_count = total_cv_vehicles // len(enhanced_data['signals_vehicle_data'])
-                variation = random.randint(-3, 5)
-                signal_data['total_current'] = max(0, base_count + variation + (i * 2))
-                signal_data['cv_updated'] = True
+    # Update system totals with real CV data
+    enhanced_data['system_totals'] = dict(
+        base.get('system_totals', {}),
+        total_vehicles_detected=total_cv_vehicles * len(traffic_data['signals']),
+        cv_active=True,
+        last_updated=received_at.isoformat(),
+    )
     
-    return jsonify(enhanced_data)
+    # Update individual signal data with CV data simulation
+    if 'signals_vehicle_data' in base:
+        signals = base['signals_vehicle_data']
+        # Seeded per frame so every client (and every revalidation) sees the same numbers
+        rng = random.Random(seq)
+        overlaid = []
+        for i, signal_data in enumerate(signals):
+            # Distribute CV counts among signals with some variation
+            base_count = total_cv_vehicles // len(signals)
+            variation = rng.randint(-3, 5)
+            overlaid.append(dict(signal_data, total_current=max(0, base_count + variation + (i * 2)), cv_updated=True))
+        enhanced_data['signals_vehicle_data'] = overlaid
+    
+    _signals_vehicle_doc = (etag, enhanced_data)
+    return enhanced_data
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -341,14 +419,105 @@ def start_simulation():
         script_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../simulation/simulation.py'))
         project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
         print(f"[DEBUG] Launching simulation: {script_path} (cwd={project_root})")
-        proc = subprocess.Popen(['python3', script_path], cwd=project_root)
-        print(f"[DEBUG] Simulation process started with PID: {proc.pid}")
-        return jsonify({'status': 'success', 'message': 'Simulation started.'}), 200
+        managed, started = supervisor.spawn(ProcessSpec(
+            name='simulation', cmd=['python3', script_path], cwd=project_root, restart='never'))
+        if not started:
+            return jsonify({'status': 'success', 'message': 'Simulation already running.', 'pid': managed.pid}), 200
+        print(f"[DEBUG] Simulation process started with PID: {managed.pid}")
+        return jsonify({'status': 'success', 'message': 'Simulation started.', 'pid': managed.pid}), 200
     except Exception as e:
         print(f"[ERROR] Failed to start simulation: {e}")
         print(traceback.format_exc())
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+@app.route('/api/processes', methods=['GET'])
+def get_processes():
+    """Processes launched by the backend with state, CPU% and RSS"""
+    supervisor.poll()
+    return jsonify({'processes': supervisor.stats(), 'timestamp': datetime.now().isoformat()})
+
+@app.route('/api/broadcast-stats', methods=['GET'])
+def get_broadcast_stats():
+    """Per-topic publish/coalesce counts and per-client drops of the Socket.IO broadcaster"""
+    return jsonify(dict(broadcaster.stats(), mjpeg=frame_hub.stats(), timestamp=datetime.now().isoformat()))
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus text exposition of request, Socket.IO, broadcast and stream metrics"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@metrics.collector
+def fanout_metrics():
+    stats = broadcaster.stats()
+    hub = frame_hub.stats()
+    yield 'socketio_clients', 'Connected Socket.IO clients', {(): stats['clients']}
+    yield 'broadcast_sent_total', 'Messages sent by the broadcaster', {(): stats['sent']}, 'counter'
+    yield 'broadcast_dropped_total', 'Versions skipped for slow clients', {(): stats['dropped']}, 'counter'
+    yield 'broadcast_slow_clients', 'Clients currently held back', {(): stats['slow_clients']}
+    yield 'broadcast_published_total', 'Values published per topic', {
+        (('topic', name),): topic['published'] for name, topic in stats['topics'].items()}, 'counter'
+    yield 'broadcast_coalesced_total', 'Values replaced before being sent', {
+        (('topic', name),): topic['coalesced'] for name, topic in stats['topics'].items()}, 'counter'
+    yield 'mjpeg_viewers', 'Open /api/cv-stream viewers', {(): hub['subscribers']}
+    yield 'mjpeg_frames_published_total', 'CV frames received by the MJPEG hub', {(): hub['frames_published']}, 'counter'
+    yield 'mjpeg_frames_encoded_total', 'MJPEG chunks built (once per frame)', {(): hub['frames_encoded']}, 'counter'
+
+# === NEW: Fast-forward what-if runs (headless simulation in a worker pool) ===
+# Jobs by id for GET /api/what-if/<job_id>; beyond WHAT_IF_KEEP the oldest finished ones are dropped
+WHAT_IF_KEEP = 50
+what_if_jobs = {}
+what_if_jobs_lock = threading.Lock()
+
+def update_what_if_job(job_id, **fields):
+    with what_if_jobs_lock:
+        what_if_jobs.setdefault(job_id, {}).update(fields)
+        finished = [key for key, entry in what_if_jobs.items() if entry['status'] != 'running']
+        for key in finished[:max(0, len(what_if_jobs) - WHAT_IF_KEEP)]:
+            del what_if_jobs[key]
+
+def run_what_if_job(job_id, job):
+    """Background task: runs the job and reports progress and the result as events and for polling"""
+    def on_progress(update):
+        update_what_if_job(job_id, progress=update)
+        socketio.emit('what_if_progress', dict(update, job_id=job_id))
+
+    try:
+        kpis = what_if.run_job(job, on_progress=on_progress, sleep=socketio.sleep)
+    except Exception as e:
+        print(f"[ERROR] What-if run {job_id} failed: {e}")
+        update_what_if_job(job_id, status='error', message=str(e))
+        socketio.emit('what_if_result', {'job_id': job_id, 'status': 'error', 'message': str(e)})
+        return
+    update_what_if_job(job_id, status='success', kpis=kpis)
+    socketio.emit('what_if_result', {'job_id': job_id, 'status': 'success', 'kpis': kpis})
+
+@app.route('/api/what-if', methods=['POST'])
+def what_if_analysis():
+    """Start a headless accelerated simulation for a demand profile and controller.
+
+    Answers 202 with a job id straight away; progress and KPIs follow as what_if_progress /
+    what_if_result events, or can be polled from GET /api/what-if/<job_id>.
+    """
+    body = request.get_json(silent=True)
+    try:
+        job = what_if.normalize_params({} if body is None else body)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    job_id = uuid.uuid4().hex[:12]
+    update_what_if_job(job_id, status='running', controller=job['controller'], progress=None)
+    socketio.start_background_task(run_what_if_job, job_id, job)
+    return jsonify({'status': 'accepted', 'job_id': job_id, 'result_url': f'/api/what-if/{job_id}'}), 202
+
+@app.route('/api/what-if/<job_id>', methods=['GET'])
+def get_what_if_job(job_id):
+    """Status of a what-if job: running (with the latest progress), success (with KPIs) or error"""
+    with what_if_jobs_lock:
+        entry = dict(what_if_jobs[job_id]) if job_id in what_if_jobs else None
+    if entry is None:
+        return jsonify({'status': 'error', 'message': 'unknown what-if job'}), 404
+    return jsonify(dict(entry, job_id=job_id))
+
 # === NEW: Separate endpoints for simulation vs CV data ===
 
 # Global simulation data to maintain consistency
@@ -497,6 +666,10 @@ def handle_simulation_events():
     """Endpoint to receive events from simulation"""
     try:
         event_data = request.get_json()
+        store.record_event(event_data.get('event', 'unknown'), event_data, ts=event_data.get('ts'))
+        wait = event_data.get('wait_time', event_data.get('stopped_for_secs'))
+        if isinstance(wait, (int, float)):
+            kpis.on_wait(wait)
         
         # Handle ambulance detection events
         if event_data.get('event') == 'ambulance_detected':
@@ -536,31 +709,74 @@ def handle_simulation_events():
         print(f"Error handling simulation event: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/events', methods=['POST'])
+def handle_plan_events():
+    """Signal plans posted by simulation/orchestrator.py"""
+    data = request.get_json(silent=True) or {}
+    tracer.stamp(data.get('trace'), 'actuate')
+    ts = data.get('timestamp')
+    store.record_event('plan', data, ts=ts)
+    plan = data.get('plan')
+    if isinstance(plan, dict) and all(isinstance(v, (int, float)) for v in plan.values()):
+        store.record_counts('plan_green', plan, ts=ts)
+    return jsonify({'status': 'success'}), 200
+
 # WebSocket Events
 @socketio.on('connect')
 def handle_connect():
     print('Client connected')
+    # Also started here, not only in start_background_tasks(), for servers that import app:app
+    broadcaster.start()
+    broadcaster.add_client(request.sid)
     emit('connected', {'message': 'Connected to traffic management system'})
 
 @socketio.on('disconnect')
 def handle_disconnect():
     print('Client disconnected')
+    broadcaster.remove_client(request.sid)
 
 @socketio.on('subscribe_to_updates')
+@metrics.socket_event('subscribe_to_updates')
 def handle_subscribe():
     print('Client subscribed to real-time updates')
     emit('subscription_confirmed', {'message': 'Subscribed to real-time updates'})
 
+@socketio.on('state_resync')
+@metrics.socket_event('state_resync')
+def handle_state_resync(data):
+    """Client at {epoch, version} catches up: one combined patch if the history reaches back, else a snapshot"""
+    data = data or {}
+    patch = None
+    if data.get('version') is not None:
+        patch = dashboard_state.since(int(data['version']), epoch=data.get('epoch'))
+    if patch is not None:
+        emit('state_patch', patch)
+    else:
+        emit('state_snapshot', dashboard_state.snapshot())
+
 @socketio.on('cv_frame')
+@metrics.socket_event('cv_frame')
 def handle_cv_frame(data):
     """Handle CV frames from cv_module.py"""
-    global latest_cv_frame
+    global latest_cv_frame, cv_frame_seq, cv_frame_received_at
     with cv_data_lock:
         latest_cv_frame = data
-    # Broadcast the frame to connected dashboard clients
-    emit('cv_frame_update', data, broadcast=True)
+        cv_frame_seq += 1
+        cv_frame_received_at = datetime.now()
+    lane_counts = data.get('lane_counts')
+    if isinstance(lane_counts, dict):
+        store.record_counts('vehicles', lane_counts)
+        # Multiplied by the number of signals to simulate system-wide detection
+        kpis.on_counts(lane_counts, scale=len(traffic_data['signals']))
+        calculate_stats()
+        sync_state('stats')  # a small dict diff, pushed only when the stats changed
+    if 'image' in data:
+        frame_hub.publish(data.get('frame'), data['image'])
+    # Dashboard clients get counts only; the picture goes out once per viewer via /api/cv-stream
+    broadcaster.publish('cv_frame_update', {k: v for k, v in data.items() if k != 'image'})
 
 @socketio.on('manual_signal_change')
+@metrics.socket_event('manual_signal_change')
 def handle_manual_signal_change(data):
     """Handle manual signal changes from dashboard"""
     print(f"📡 Manual signal change: {data}")
@@ -577,6 +793,7 @@ def handle_manual_signal_change(data):
     }, broadcast=True)
 
 @socketio.on('manual_mode_toggle')
+@metrics.socket_event('manual_mode_toggle')
 def handle_manual_mode_toggle(data):
     """Handle manual mode toggle from dashboard"""
     print(f"🎛️ Manual mode toggle: {data}")
@@ -590,32 +807,21 @@ def handle_manual_mode_toggle(data):
             script_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../simulation/manual_simulation.py'))
             project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
             
-            # Check if manual simulation is already running
-            import psutil
-            manual_sim_running = False
-            for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-                try:
-                    if proc.info['cmdline'] and 'manual_simulation.py' in ' '.join(proc.info['cmdline']):
-                        manual_sim_running = True
-                        break
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                    pass
-            
-            if not manual_sim_running:
+            # Use the virtual environment python
+            venv_python = os.path.join(project_root, '.venv', 'bin', 'python')
+            python = venv_python if os.path.exists(venv_python) else 'python3'
+            managed, started = supervisor.spawn(ProcessSpec(
+                name='manual_simulation', cmd=[python, script_path], cwd=project_root, restart='never'))
+
+            if started:
                 print(f"🚀 Launching manual simulation: {script_path}")
-                # Use the virtual environment python
-                venv_python = os.path.join(project_root, '.venv', 'bin', 'python')
-                if os.path.exists(venv_python):
-                    proc = subprocess.Popen([venv_python, script_path], cwd=project_root)
-                else:
-                    proc = subprocess.Popen(['python3', script_path], cwd=project_root)
-                print(f"✅ Manual simulation started with PID: {proc.pid}")
+                print(f"✅ Manual simulation started with PID: {managed.pid}")
                 
                 # Emit success message
                 emit('manual_simulation_status', {
                     'status': 'started',
                     'message': 'Manual simulation launched successfully',
-                    'pid': proc.pid
+                    'pid': managed.pid
                 }, broadcast=True)
             else:
                 print("ℹ️ Manual simulation already running")
@@ -643,18 +849,17 @@ def handle_manual_mode_toggle(data):
     }, broadcast=True)
 
 @socketio.on('signal_state_update')
+@metrics.socket_event('signal_state_update')
 def handle_signal_state_update(data):
     """Handle signal state updates from simulation and broadcast to dashboard clients"""
-    print(f"🚦 Signal state update from simulation: {data}")
-    
-    # Broadcast to all dashboard clients
-    emit('signal_state_update', data, broadcast=True)
+    # Coalesced: bursts from the simulation reach clients as the latest state only
+    broadcaster.publish('signal_state_update', data)
 
 # Background task to simulate real-time data updates
 def background_updates():
     update_counter = 0
     while True:
-        time.sleep(15)  # Update every 15 seconds (slower, more realistic)
+        socketio.sleep(15)  # Update every 15 seconds (slower, more realistic)
         update_counter += 1
         
         # Update traffic signal data - smaller, more realistic changes
@@ -670,21 +875,7 @@ def background_updates():
             signal['queue_length'] += random.randint(-1, 2)
             signal['queue_length'] = max(0, min(25, signal['queue_length']))
         
-        # Calculate and emit stats
-        calculate_stats()
-        socketio.emit('stats_update', {
-            'vehicles_detected': traffic_data['vehicles_detected'],
-            'co2_saved': traffic_data['co2_saved'],
-            'avg_wait_time': traffic_data['avg_wait_time'],
-            'timestamp': datetime.now().isoformat()
-        })
-        
-        # Emit signal updates
-        socketio.emit('signals_update', {
-            'signals': traffic_data['signals'],
-            'emergency_vehicles': traffic_data['emergency_vehicles'],
-            'timestamp': datetime.now().isoformat()
-        })
+        calculate_stats(jitter=random.randint(-10, 15))
         
         # Occasionally add new alerts
         if random.random() < 0.1:  # 10% chance every 5 seconds
@@ -710,13 +901,29 @@ def background_updates():
             traffic_data['alerts'] = traffic_data['alerts'][:20]
             
             socketio.emit('new_alert', new_alert)
+        
+        # Push only what changed in stats, signals, emergency vehicles and alerts as one state_patch
+        sync_state()
 
-if __name__ == '__main__':
+_background_started = False
+
+def start_background_tasks():
+    """Seed mock data and start the update loop (a thread or a green thread, per ASYNC_MODE)"""
+    global _background_started
+    if _background_started:
+        return
+    _background_started = True
     initialize_mock_data()
+    calculate_stats()
+    sync_state()
+    socketio.start_background_task(background_updates)
+    broadcaster.start()
+    store.start()
+
+if __name__ == '__main__':
+    start_background_tasks()
     
-    # Start background updates in a separate thread
-    update_thread = threading.Thread(target=background_updates)
-    update_thread.daemon = True
-    update_thread.start()
-    
-    socketio.run(app, debug=True, host='0.0.0.0', port=5050)
+    if ASYNC_MODE == 'threading':
+        socketio.run(app, debug=True, host='0.0.0.0', port=5050)
+    else:
+        socketio.run(app, host='0.0.0.0', port=5050)
@@ -0,0 +1,156 @@
+"""
+Rate-limited, coalescing Socket.IO broadcasts with per-client backpressure.
+
+publish() only stores the latest value of a topic. A background task flushes
+each topic at most once per `min_interval`, so values published in between are
+coalesced into the newest one. Messages are sent to each client individually
+with an ack callback. A client that has `max_inflight` unacknowledged messages
+for a topic is skipped, and the versions it misses are counted as drops. Once
+it acks, it gets the newest value, never a backlog. Acks that do not arrive
+within `ack_timeout` are written off, so clients that never ack still get about
+one message per timeout.
+
+The python-socketio client acks automatically. Browser handlers must call the
+ack function they receive as their last argument.
+"""
+
+import threading
+import time
+
+
+class Topic:
+    def __init__(self, name, min_interval, event=None):
+        self.name = name
+        self.event = event or name
+        self.min_interval = min_interval
+        self.value = None
+        self.version = 0
+        self.last_flush = 0.0
+        self.flushed_version = 0
+        self.published = 0
+        self.coalesced = 0  # published values replaced before they were ever sent
+
+
+class ClientState:
+    def __init__(self, sid):
+        self.sid = sid
+        self.sent_version = {}
+        self.inflight = {}
+        self.last_send = {}
+        self.sent = 0
+        self.dropped = 0
+
+
+class Broadcaster:
+    def __init__(self, socketio, tick=0.02, max_inflight=2, ack_timeout=2.0):
+        self.socketio = socketio
+        self.tick = tick
+        self.max_inflight = max_inflight
+        self.ack_timeout = ack_timeout
+        self.topics = {}
+        self.clients = {}
+        self._lock = threading.Lock()
+        self._started = False
+        self.sent = 0
+        self.dropped = 0
+
+    def topic(self, name, max_rate, event=None):
+        """Register a topic sent at most `max_rate` times per second"""
+        self.topics[name] = Topic(name, 1.0 / max_rate if max_rate > 0 else 0.0, event)
+
+    def add_client(self, sid):
+        with self._lock:
+            client = ClientState(sid)
+            # A new client gets the current value of every topic on the next flush
+            for topic in self.topics.values():
+                client.sent_version[topic.name] = 0
+            self.clients[sid] = client
+
+    def remove_client(self, sid):
+        with self._lock:
+            self.clients.pop(sid, None)
+
+    def publish(self, name, value):
+        with self._lock:
+            topic = self.topics[name]
+            if topic.version > topic.flushed_version:
+                topic.coalesced += 1
+            topic.value = value
+            topic.version += 1
+            topic.published += 1
+
+    def start(self):
+        """Start the flush loop once; safe to call from every connect handler"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        self.socketio.start_background_task(self._run)
+
+    def _run(self):
+        while True:
+            self.socketio.sleep(self.tick)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Broadcast flush failed: {e}")
+
+    def flush(self, now=None):
+        """Send due topics to every client that is behind and has room; returns messages sent"""
+        now = time.monotonic() if now is None else now
+        sends = []
+        with self._lock:
+            for topic in self.topics.values():
+                if topic.version == 0 or now - topic.last_flush < topic.min_interval:
+                    continue
+                flushed = False
+                for client in self.clients.values():
+                    seen = client.sent_version.get(topic.name, 0)
+                    if seen >= topic.version:
+                        continue
+                    inflight = client.inflight.get(topic.name, 0)
+                    if inflight >= self.max_inflight:
+                        if now - client.last_send.get(topic.name, 0.0) < self.ack_timeout:
+                            continue  # slow client: leave it behind, it gets the newest value later
+                        inflight = 0  # acks never came; stop waiting for them
+                    if seen:
+                        client.dropped += topic.version - seen - 1
+                        self.dropped += topic.version - seen - 1
+                    client.sent_version[topic.name] = topic.version
+                    client.inflight[topic.name] = inflight + 1
+                    client.last_send[topic.name] = now
+                    client.sent += 1
+                    self.sent += 1
+                    sends.append((topic.event, topic.value, client.sid, self._ack(client, topic.name)))
+                    flushed = True
+                if flushed:
+                    topic.last_flush = now
+                    topic.flushed_version = topic.version
+        for event, value, sid, ack in sends:
+            self.socketio.emit(event, value, to=sid, callback=ack)
+        return len(sends)
+
+    def _ack(self, client, name):
+        def ack(*args):
+            with self._lock:
+                if client.inflight.get(name, 0) > 0:
+                    client.inflight[name] -= 1
+        return ack
+
+    def stats(self):
+        with self._lock:
+            return {
+                'clients': len(self.clients),
+                'topics': {
+                    t.name: {
+                        'max_rate': round(1.0 / t.min_interval, 1) if t.min_interval else None,
+                        'published': t.published,
+                        'coalesced': t.coalesced,
+                        'version': t.version,
+                    } for t in self.topics.values()
+                },
+                'sent': self.sent,
+                'dropped': self.dropped,
+                'slow_clients': sum(1 for c in self.clients.values()
+                                    if any(n >= self.max_inflight for n in c.inflight.values())),
+            }
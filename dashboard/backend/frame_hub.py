@@ -0,0 +1,114 @@
+"""
+Shared MJPEG fan-out for /api/cv-stream.
+
+cv_module.py publishes base64 JPEG frames over Socket.IO. The hub keeps only the
+newest one. It turns that frame into a ready-to-send multipart chunk at most once
+per frame number, the first time any viewer needs it. Viewers block on a
+condition until the sequence number moves and then all yield the same bytes
+object, so per-frame CPU does not grow with the number of viewers. Frames
+re-published with the same frame number are ignored.
+"""
+
+import base64
+import threading
+import time
+
+try:
+    import cv2
+    import numpy as np
+except Exception:
+    cv2 = None
+    np = None
+
+JPEG_MAGIC = b'\xff\xd8'
+
+
+def _to_jpeg(image_b64):
+    data = base64.b64decode(image_b64)
+    if data[:2] == JPEG_MAGIC:
+        return data  # cv_module already sends JPEG: pass it through untouched
+    if cv2 is None:
+        raise ValueError('frame is not a JPEG and OpenCV is not available to re-encode it')
+    frame = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    ok, buffer = cv2.imencode('.jpg', frame)
+    if not ok:
+        raise ValueError('could not encode frame as JPEG')
+    return buffer.tobytes()
+
+
+class FrameHub:
+    def __init__(self, max_fps=10.0, keepalive=5.0):
+        self.min_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.keepalive = keepalive
+        self._cond = threading.Condition()
+        self._seq = 0  # bumps on every new frame; frame numbers may restart with cv_module
+        self._frame_no = None
+        self._pending = None  # base64 image not yet turned into a chunk
+        self._chunk = None
+        self._chunk_seq = 0
+
+        self.subscribers = 0
+        self.frames_published = 0
+        self.frames_encoded = 0
+        self.frames_skipped = 0
+
+    def publish(self, frame_no, image_b64):
+        """Called for every incoming CV frame; cheap, the decode happens on first use"""
+        with self._cond:
+            if frame_no is not None and frame_no == self._frame_no:
+                self.frames_skipped += 1
+                return
+            self._frame_no = frame_no
+            self._pending = image_b64
+            self._seq += 1
+            self.frames_published += 1
+            self._cond.notify_all()
+
+    def _current_chunk(self):
+        # Caller holds the lock: materialize the newest frame once for all viewers
+        if self._chunk_seq != self._seq and self._pending is not None:
+            jpeg = _to_jpeg(self._pending)
+            self._chunk = (b'--frame\r\n'
+                           b'Content-Type: image/jpeg\r\n'
+                           b'Content-Length: ' + str(len(jpeg)).encode() + b'\r\n\r\n' + jpeg + b'\r\n')
+            self._chunk_seq = self._seq
+            self._pending = None
+            self.frames_encoded += 1
+        return self._chunk
+
+    def frames(self, sleep=time.sleep):
+        """Generator for one viewer: yields each new frame once, at most max_fps"""
+        with self._cond:
+            self.subscribers += 1
+        seen = -1
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._seq != seen, timeout=self.keepalive)
+                    if self._seq == seen:
+                        continue  # nothing new; the next frame will also reveal a dropped client
+                    try:
+                        chunk = self._current_chunk()
+                    except Exception as e:
+                        print(f"Error processing CV frame: {e}")
+                        self._pending = None
+                        self._chunk = None
+                        self._chunk_seq = self._seq
+                        chunk = None
+                    seen = self._chunk_seq
+                if chunk is not None:
+                    yield chunk
+                if self.min_interval:
+                    sleep(self.min_interval)
+        finally:
+            with self._cond:
+                self.subscribers -= 1
+
+    def stats(self):
+        with self._cond:
+            return {
+                'subscribers': self.subscribers,
+                'frames_published': self.frames_published,
+                'frames_encoded': self.frames_encoded,
+                'frames_skipped': self.frames_skipped,
+            }
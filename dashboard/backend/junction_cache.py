@@ -0,0 +1,100 @@
+"""
+Immutable, versioned snapshots of the junction metadata (signals_vehicle_data.json).
+
+get() returns the current snapshot. It stats the file at most once per
+`check_interval`, and when the mtime or size changed it parses the file into a
+new snapshot with the next version. A file that fails to parse keeps the
+previous snapshot. Snapshot data is frozen: dicts reject mutation and lists
+become tuples. Request handlers therefore build their responses as
+copy-on-write overlays, copying only the dicts they change and sharing the rest.
+"""
+
+import json
+import os
+import threading
+import time
+
+EMPTY = {"signals_vehicle_data": [], "system_totals": {"total_vehicles_detected": 0}}
+
+
+class FrozenDict(dict):
+    """A dict that refuses mutation; still a dict, so json and jsonify serialize it directly"""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("junction snapshot data is read-only; overlay it instead")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+
+def freeze(value):
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def thaw(value):
+    if isinstance(value, dict):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(v) for v in value]
+    return value
+
+
+class JunctionSnapshot:
+    __slots__ = ("data", "version", "mtime", "loaded_at")
+
+    def __init__(self, data, version, mtime):
+        self.data = freeze(data)
+        self.version = version
+        self.mtime = mtime
+        self.loaded_at = time.time()
+
+
+class JunctionCache:
+    def __init__(self, path, check_interval=1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._next_check = 0.0
+        self._snapshot = JunctionSnapshot(EMPTY, 0, None)
+        self._reload(force=True)
+
+    def get(self):
+        """Current snapshot; reloads first if the file changed on disk"""
+        if time.monotonic() >= self._next_check:
+            self._reload()
+        return self._snapshot
+
+    def _reload(self, force=False):
+        with self._lock:
+            self._next_check = time.monotonic() + self.check_interval
+            try:
+                st = os.stat(self.path)
+            except OSError as e:
+                if force:
+                    print(f"Warning: Could not load {os.path.basename(self.path)}: {e}")
+                return
+            stamp = (st.st_mtime_ns, st.st_size)
+            if stamp == self._stamp and not force:
+                return
+            self._stamp = stamp  # a broken file is reported once, not on every check
+            try:
+                with open(self.path, "r") as f:
+                    data = json.load(f)
+            except Exception as e:
+                print(f"Warning: Could not load {os.path.basename(self.path)}: {e}")
+                return
+            # Swapping the reference is atomic: readers see the old or the new snapshot, never a mix
+            self._snapshot = JunctionSnapshot(data, self._snapshot.version + 1, st.st_mtime)
+            if not force:
+                print(f"🔄 Reloaded {os.path.basename(self.path)} (version {self._snapshot.version})")
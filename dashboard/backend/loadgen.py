@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+"""
+Load test for the dashboard backend.
+
+Impersonates the whole system against one backend:
+- N CV cameras emitting cv_frame over Socket.IO
+- M simulations POSTing events to /simulation/events
+- K dashboard clients that subscribe to updates, plus MJPEG viewers on /api/cv-stream
+
+It then reports connection success, broadcast fan-out latency, messages the broadcaster
+dropped for slow clients, simulation POST latency, per-viewer MJPEG frame rates and
+backend CPU per client.
+
+    python loadgen.py --cameras 4 --simulations 2 --clients 300 --mjpeg 100
+    python run.py --server &
+    python loadgen.py --url http://localhost:5050 --server-pid $!
+
+Without --url the backend runs in this process (threading mode, throwaway time-series
+database, tracing off), so CPU per client includes the load generators themselves.
+
+Needs python-socketio (client) and either cv2 + numpy or --image to build the frame.
+psutil is only needed for --server-pid.
+"""
+
+import argparse
+import base64
+import http.client
+import json
+import logging
+import os
+import random
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlparse
+
+import socketio
+
+try:
+    import psutil
+except Exception:
+    psutil = None
+
+
+DIRECTIONS = ('right', 'down', 'left', 'up')
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100.0 * len(values)))]
+
+
+def socket_client():
+    """A Socket.IO client the backend accepts: no Origin header, so cors_allowed_origins does not apply"""
+    # websocket-client sends Origin: http://<backend> by default, which is not a dashboard origin
+    return socketio.Client(reconnection=False, websocket_extra_options={'suppress_origin': True})
+
+
+def get_json(url, path, timeout=5):
+    parsed = urlparse(url)
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=timeout)
+    try:
+        conn.request('GET', path)
+        response = conn.getresponse()
+        return json.loads(response.read()) if response.status == 200 else None
+    finally:
+        conn.close()
+
+
+def start_backend():
+    """Serves app.py from a daemon thread on a free local port; returns its URL"""
+    # Read by app.py at import: plain threads, a scratch database, no latency trace file
+    os.environ['SOCKETIO_ASYNC_MODE'] = 'threading'
+    os.environ['TIMESERIES_DB'] = os.path.join(tempfile.mkdtemp(prefix='loadgen_'), 'timeseries.db')
+    os.environ.setdefault('TRACE_LOG', 'off')
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from app import app, socketio, start_background_tasks
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)  # no access log line per request
+
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    start_background_tasks()
+    threading.Thread(target=socketio.run, args=(app,), daemon=True,
+                     kwargs={'host': '127.0.0.1', 'port': port, 'log_output': False,
+                             'allow_unsafe_werkzeug': True}).start()
+
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            if get_json(url, '/api/health', timeout=1) is not None:
+                return url
+        except OSError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError('in-process backend did not come up')
+
+
+def broadcast_stats(url):
+    """/api/broadcast-stats, or None when a saturated server does not answer in time"""
+    try:
+        return get_json(url, '/api/broadcast-stats', timeout=10)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Could not read broadcaster stats: {e}")
+        return None
+
+
+class CpuMeter:
+    """CPU seconds of --server-pid, or of this process when it hosts the backend"""
+
+    def __init__(self, pid=None, in_process=False):
+        self.process = None
+        if pid is not None:
+            if psutil is None:
+                print("⚠️ psutil not installed: no server CPU figures")
+            else:
+                self.process = psutil.Process(pid)
+        self.in_process = in_process and pid is None
+        self.started = None
+
+    def _read(self):
+        if self.process is not None:
+            times = self.process.cpu_times()
+            return times.user + times.system
+        return time.process_time() if self.in_process else None
+
+    def start(self):
+        self.started = self._read()
+
+    def seconds(self):
+        now = self._read()
+        return None if now is None or self.started is None else now - self.started
+
+
+def load_frame(path=None, width=640, height=360):
+    """JPEG bytes for the producer: a file, or a generated test pattern"""
+    if path:
+        with open(path, 'rb') as f:
+            return f.read()
+    import cv2
+    import numpy as np
+    image = np.zeros((height, width, 3), np.uint8)
+    image[:, :, 1] = np.linspace(0, 255, width, dtype=np.uint8)
+    cv2.putText(image, 'load test', (20, height // 2), cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 255, 255), 3)
+    ok, buffer = cv2.imencode('.jpg', image)
+    if not ok:
+        raise RuntimeError('could not encode the test frame')
+    return buffer.tobytes()
+
+
+class DashboardClient:
+    """A Socket.IO client that records the fan-out latency of every cv_frame_update"""
+
+    def __init__(self, url):
+        self.url = url
+        self.sio = socket_client()
+        self.connect_time = None
+        self.error = None
+        self.latencies = []
+        self.events = 0
+        self.sio.on('cv_frame_update', self.on_frame)
+        self.sio.on('connect', lambda: self.sio.emit('subscribe_to_updates'))
+
+    def on_frame(self, data):
+        self.events += 1
+        sent_at = data.get('sent_at') if isinstance(data, dict) else None
+        if sent_at:
+            self.latencies.append(time.time() - sent_at)
+
+    def connect(self):
+        started = time.monotonic()
+        try:
+            self.sio.connect(self.url, transports=['websocket'], wait_timeout=10)
+            self.connect_time = time.monotonic() - started
+        except Exception as e:
+            self.error = str(e)
+
+    def close(self):
+        if self.sio.connected:
+            self.sio.disconnect()
+
+
+class MjpegClient(threading.Thread):
+    """Reads /api/cv-stream and counts multipart frames"""
+
+    def __init__(self, url, stop):
+        super().__init__(daemon=True)
+        self.parsed = urlparse(url)
+        self.stop = stop
+        self.frames = 0
+        self.bytes = 0
+        self.error = None
+        self.started_at = None
+        self.first_frame = None
+
+    def run(self):
+        try:
+            conn = http.client.HTTPConnection(self.parsed.hostname, self.parsed.port or 80, timeout=10)
+            conn.request('GET', '/api/cv-stream')
+            response = conn.getresponse()
+            if response.status != 200:
+                self.error = f'HTTP {response.status}'
+                return
+            self.started_at = time.monotonic()
+            tail = b''
+            while not self.stop.is_set():
+                chunk = response.read1(65536)
+                if not chunk:
+                    self.error = 'stream closed'
+                    break
+                self.bytes += len(chunk)
+                data = tail + chunk
+                found = data.count(b'--frame\r\n')
+                if found and self.first_frame is None:
+                    self.first_frame = time.monotonic() - self.started_at
+                self.frames += found
+                tail = data[-8:]  # a boundary may straddle two reads (one byte short of a full one)
+            conn.close()
+        except Exception as e:
+            self.error = str(e)
+
+    def fps(self, duration):
+        return self.frames / duration if duration > 0 else 0.0
+
+
+class SimulationPoster(threading.Thread):
+    """POSTs simulation.py-style events to /simulation/events over one keep-alive connection"""
+
+    def __init__(self, url, rate, stop, seed):
+        super().__init__(daemon=True)
+        self.parsed = urlparse(url)
+        self.rate = rate
+        self.stop = stop
+        self.rng = random.Random(seed)
+        self.latencies = []
+        self.posted = 0
+        self.failed = 0
+        self.error = None
+
+    def event(self):
+        # Mostly signal changes, some stopped-vehicle anomalies; no ambulances, they alert everyone
+        if self.rng.random() < 0.2:
+            return {'ts': time.time(), 'event': 'anomaly_detected', 'direction': self.rng.choice(DIRECTIONS),
+                    'lane': self.rng.randint(0, 2), 'vehicleClass': 'car',
+                    'stopped_for_secs': round(self.rng.uniform(20, 60), 1)}
+        origin = self.rng.randrange(4)
+        return {'ts': time.time(), 'event': 'signal_changed', 'from': DIRECTIONS[origin],
+                'to': DIRECTIONS[(origin + 1) % 4], 'reason': 'timer'}
+
+    def run(self):
+        conn = http.client.HTTPConnection(self.parsed.hostname, self.parsed.port or 80, timeout=10)
+        interval = 1.0 / self.rate
+        next_at = time.monotonic()
+        while not self.stop.is_set():
+            body = json.dumps(self.event())
+            started = time.monotonic()
+            try:
+                conn.request('POST', '/simulation/events', body, {'Content-Type': 'application/json'})
+                response = conn.getresponse()
+                response.read()
+                if response.status == 200:
+                    self.posted += 1
+                    self.latencies.append(time.monotonic() - started)
+                else:
+                    self.failed += 1
+                    self.error = f'/simulation/events HTTP {response.status}'
+            except Exception as e:
+                self.failed += 1
+                self.error = str(e)
+                conn.close()  # reconnects on the next request
+            next_at += interval
+            time.sleep(max(0.0, next_at - time.monotonic()))
+        conn.close()
+
+
+class CameraProducer(threading.Thread):
+    """Pushes cv_frame events like cv_module.py does, stamped with the send time"""
+
+    def __init__(self, url, image, rate, stop, camera=0, cameras=1):
+        super().__init__(daemon=True)
+        self.url = url
+        self.image = base64.b64encode(image).decode('ascii')
+        self.rate = rate
+        self.stop = stop
+        self.camera = camera
+        self.cameras = cameras
+        self.sent = 0
+        self.error = None
+
+    def run(self):
+        producer = socket_client()
+        try:
+            producer.connect(self.url, transports=['websocket'], wait_timeout=10)
+            interval = 1.0 / self.rate
+            next_at = time.monotonic() + interval * self.camera / self.cameras  # stagger the cameras
+            while not self.stop.is_set():
+                if not producer.connected:
+                    # e.g. a frame over the server's max_http_buffer_size (1 MB by default)
+                    self.error = 'camera disconnected by the server'
+                    return
+                n = self.sent + 1
+                producer.emit('cv_frame', {
+                    'camera': self.camera,
+                    'frame': n * self.cameras + self.camera,  # unique across cameras, or the MJPEG hub skips repeats
+                    'image': self.image,
+                    'lane_counts': {'lane0': n % 5, 'lane1': n % 7, 'lane2': n % 3},
+                    'sent_at': time.time(),
+                })
+                self.sent = n
+                next_at += interval
+                time.sleep(max(0.0, next_at - time.monotonic()))
+        except Exception as e:
+            self.error = f'camera: {e}'
+        finally:
+            if producer.connected:
+                producer.disconnect()
+
+
+def run(args):
+    frame = load_frame(args.image)
+    print(f"🖼️  Test frame: {len(frame) / 1024:.1f} KB, {args.cameras} camera(s) at {args.frame_rate} fps")
+    in_process = args.url is None
+    if in_process:
+        args.url = start_backend()
+        print(f"🚦 In-process backend at {args.url}")
+
+    # Dashboard clients connect in parallel batches so the server sees a real connection storm
+    clients = [DashboardClient(args.url) for _ in range(args.clients)]
+    connectors = []
+    for client in clients:
+        t = threading.Thread(target=client.connect, daemon=True)
+        t.start()
+        connectors.append(t)
+        if len(connectors) % args.batch == 0:
+            time.sleep(0.05)
+    for t in connectors:
+        t.join()
+    connected = [c for c in clients if c.connect_time is not None]
+    print(f"🔌 {len(connected)}/{args.clients} Socket.IO clients connected")
+
+    stop = threading.Event()
+    viewers = [MjpegClient(args.url, stop) for _ in range(args.mjpeg)]
+    for viewer in viewers:
+        viewer.start()
+
+    cpu = CpuMeter(args.server_pid, in_process)
+    before = broadcast_stats(args.url)
+    cpu.start()
+
+    producers = [CameraProducer(args.url, frame, args.frame_rate, stop, i, args.cameras) for i in range(args.cameras)]
+    posters = [SimulationPoster(args.url, args.sim_rate, stop, seed=i) for i in range(args.simulations)]
+    for thread in producers + posters:
+        thread.start()
+
+    print(f"⏱️  Running for {args.duration:.0f}s...")
+    started = time.monotonic()
+    time.sleep(args.duration)
+    stop.set()
+    elapsed = time.monotonic() - started
+    cpu_s = cpu.seconds()
+    after = broadcast_stats(args.url)
+    # Everything winds down in parallel against one deadline; stragglers are daemon threads
+    closers = [threading.Thread(target=client.close, daemon=True) for client in clients]
+    for closer in closers:
+        closer.start()
+    deadline = time.monotonic() + 5
+    for thread in producers + posters + viewers + closers:
+        thread.join(timeout=max(0.0, deadline - time.monotonic()))
+
+    report(args, clients, connected, viewers, producers, posters, elapsed, cpu_s, cpu.in_process, before, after)
+
+
+def report(args, clients, connected, viewers, producers, posters, elapsed, cpu_s=None, cpu_in_process=False,
+           before=None, after=None):
+    sent = sum(p.sent for p in producers)
+    connect_times = [c.connect_time * 1000 for c in connected]
+    latencies = [lat * 1000 for c in connected for lat in c.latencies]
+    delivered = [c.events for c in connected]
+    errors = {}
+    for item in list(clients) + list(viewers) + list(producers) + list(posters):
+        if item.error:
+            errors[item.error] = errors.get(item.error, 0) + 1
+
+    print("\n📊 Results")
+    print(f"   frames sent:           {sent} ({sent / elapsed:.1f}/s) by "
+          f"{sum(1 for p in producers if not p.error)}/{len(producers)} cameras")
+    print(f"   socket clients:        {len(connected)}/{len(clients)} connected")
+    if connected:
+        print(f"   connect ms:            p50 {percentile(connect_times, 50):.0f}  p95 {percentile(connect_times, 95):.0f}  "
+              f"max {max(connect_times):.0f}")
+        print(f"   frames per client:     min {min(delivered)}  median {statistics.median(delivered):.0f}  "
+              f"(delivery {100.0 * sum(delivered) / max(1, sent * len(connected)):.1f}%)")
+    if latencies:
+        print(f"   fan-out latency ms:    p50 {percentile(latencies, 50):.1f}  p95 {percentile(latencies, 95):.1f}  "
+              f"p99 {percentile(latencies, 99):.1f}")
+    if viewers:
+        streaming = [v for v in viewers if v.frames]
+        rates = [v.fps(elapsed) for v in viewers]
+        first = [v.first_frame * 1000 for v in viewers if v.first_frame is not None]
+        print(f"   MJPEG viewers:         {len(streaming)}/{len(viewers)} streaming")
+        print(f"   MJPEG fps per viewer:  min {min(rates):.1f}  median {statistics.median(rates):.1f}  "
+              f"max {max(rates):.1f}")
+        print(f"   MJPEG throughput:      {sum(v.bytes for v in viewers) / elapsed / (1024 * 1024):.1f} MB/s")
+        if first:
+            print(f"   first frame ms:        p50 {percentile(first, 50):.0f}  p95 {percentile(first, 95):.0f}")
+    if posters:
+        posted = sum(p.posted for p in posters)
+        post_ms = [lat * 1000 for p in posters for lat in p.latencies]
+        print(f"   simulation events:     {posted} posted ({posted / elapsed:.1f}/s), "
+              f"{sum(p.failed for p in posters)} failed")
+        if post_ms:
+            print(f"   event POST ms:         p50 {percentile(post_ms, 50):.1f}  p95 {percentile(post_ms, 95):.1f}  "
+                  f"p99 {percentile(post_ms, 99):.1f}")
+    if before and after:
+        topic = lambda stats: stats['topics'].get('cv_frame_update', {})  # noqa: E731
+        print(f"   broadcaster:           {after['sent'] - before['sent']} sent, "
+              f"{topic(after).get('coalesced', 0) - topic(before).get('coalesced', 0)} cv updates coalesced, "
+              f"{after['dropped'] - before['dropped']} skipped by clients (coalesced or held back while slow), "
+              f"{after.get('slow_clients', 0)} slow clients at the end")
+    if cpu_s is not None:
+        per_client = cpu_s / elapsed * 1000 / max(1, len(connected) + len(viewers))
+        scope = "backend only" if not cpu_in_process else "incl. load generators"
+        print(f"   CPU per client:        {per_client:.2f} ms/s  ({100.0 * cpu_s / elapsed:.0f}% of a core, {scope})")
+    for error, count in sorted(errors.items(), key=lambda e: -e[1]):
+        print(f"   ❌ {count} x {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the dashboard backend")
+    parser.add_argument('--url', help="backend to test (default: start one in this process)")
+    parser.add_argument('--server-pid', type=int, help="with --url: measure this process's CPU (needs psutil)")
+    parser.add_argument('--cameras', type=int, default=1, help="simulated CV cameras emitting cv_frame")
+    parser.add_argument('--simulations', type=int, default=1, help="simulations posting to /simulation/events")
+    parser.add_argument('--sim-rate', type=float, default=5.0, help="events per second per simulation")
+    parser.add_argument('--clients', type=int, default=200, help="Socket.IO dashboard clients")
+    parser.add_argument('--mjpeg', type=int, default=50, help="concurrent /api/cv-stream viewers")
+    parser.add_argument('--duration', type=float, default=30.0, help="seconds of load after connecting")
+    parser.add_argument('--frame-rate', type=float, default=10.0, help="cv_frame events per second per camera")
+    parser.add_argument('--batch', type=int, default=50, help="connections opened per 50 ms")
+    parser.add_argument('--image', help="JPEG to send instead of a generated test pattern")
+    run(parser.parse_args())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,247 @@
+"""
+Low-overhead request and event metrics in Prometheus text format.
+
+Recorded:
+- Flask routes: latency histogram, request count by status, and response size.
+  Routes are labelled by URL rule, so /api/signal/<int:signal_id>/camera is a
+  single series.
+- Streaming responses such as /api/cv-stream: active streams, bytes sent and
+  stream duration.
+- Socket.IO handlers wrapped with @metrics.socket_event(name): latency
+  histogram, message count and inbound payload size.
+- Collectors: callables that return extra gauge or counter values when the
+  page is rendered, e.g. the broadcaster's drop counters.
+
+Recording is a bisect into fixed buckets under a per-metric lock. Nothing is
+formatted until /api/metrics is scraped.
+"""
+
+import bisect
+import functools
+import threading
+import time
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def header(self):
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = self.header()
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f'{self.name}{_labels(self.label_names, labels)} {_number(value)}')
+        return lines
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, *labels, value):
+        with self._lock:
+            self._values[labels] = value
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, *labels, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = self.header()
+        names = self.label_names + ('le',)
+        with self._lock:
+            items = sorted((labels, (list(counts), total, n)) for labels, (counts, total, n) in self._values.items())
+        for labels, (counts, total, n) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_labels(names, labels + (bound,))} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.label_names, labels)} {_number(total)}')
+            lines.append(f'{self.name}_count{_labels(self.label_names, labels)} {n}')
+        return lines
+
+
+# Types a collector may declare for its values
+COLLECTED_KINDS = {'gauge': Gauge, 'counter': Counter}
+
+
+def _payload_size(data):
+    """Rough inbound size without serializing: string/bytes lengths at the top level"""
+    if isinstance(data, (str, bytes)):
+        return len(data)
+    if isinstance(data, dict):
+        return sum(len(v) if isinstance(v, (str, bytes)) else 8 for v in data.values())
+    return 0
+
+
+class Metrics:
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+        self.started = time.time()
+
+        self.http_latency = self.add(Histogram(
+            'http_request_duration_seconds', 'Flask request latency (time to first byte for streams)',
+            ('method', 'route')))
+        self.http_requests = self.add(Counter(
+            'http_requests_total', 'Flask requests by status', ('method', 'route', 'status')))
+        self.http_size = self.add(Histogram(
+            'http_response_size_bytes', 'Response body size (non-streamed)', ('route',), SIZE_BUCKETS))
+        self.active_streams = self.add(Gauge(
+            'http_active_streams', 'Open streaming responses', ('route',)))
+        self.stream_bytes = self.add(Counter(
+            'http_stream_bytes_total', 'Bytes sent on streaming responses', ('route',)))
+        self.stream_duration = self.add(Histogram(
+            'http_stream_duration_seconds', 'How long streaming responses stayed open', ('route',),
+            (1, 10, 60, 300, 1800, 3600)))
+        self.event_latency = self.add(Histogram(
+            'socketio_handler_duration_seconds', 'Socket.IO handler latency', ('event',)))
+        self.events = self.add(Counter(
+            'socketio_events_total', 'Socket.IO messages handled', ('event', 'outcome')))
+        self.event_size = self.add(Histogram(
+            'socketio_payload_size_bytes', 'Approximate inbound Socket.IO payload size', ('event',),
+            SIZE_BUCKETS))
+
+    def add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def collector(self, fn):
+        """fn() -> iterable of (name, help, {((label, value), ...): number}[, kind]), read at scrape time.
+
+        kind is 'gauge' (the default) or 'counter' for values that only go up, such as *_total.
+        """
+        self.collectors.append(fn)
+        return fn
+
+    # --- Flask ---------------------------------------------------------------------
+    def init_app(self, app):
+        from flask import g, request
+
+        @app.before_request
+        def _start_timer():
+            g._metrics_start = time.perf_counter()
+
+        @app.after_request
+        def _record(response):
+            start = getattr(g, '_metrics_start', None)
+            if start is None:
+                return response
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            self.http_latency.observe(request.method, route, value=time.perf_counter() - start)
+            self.http_requests.inc(request.method, route, str(response.status_code))
+            if response.is_streamed:
+                response.response = self._count_stream(route, response.response)
+            elif response.content_length is not None:
+                self.http_size.observe(route, value=response.content_length)
+            return response
+
+    def _count_stream(self, route, body):
+        self.active_streams.inc(route)
+        started = time.monotonic()
+        try:
+            for chunk in body:
+                self.stream_bytes.inc(route, amount=len(chunk))
+                yield chunk
+        finally:
+            self.active_streams.dec(route)
+            self.stream_duration.observe(route, value=time.monotonic() - started)
+            close = getattr(body, 'close', None)
+            if close is not None:
+                close()
+
+    # --- Socket.IO -----------------------------------------------------------------
+    def socket_event(self, event):
+        """Decorator for Socket.IO handlers; apply beneath @socketio.on(event)"""
+        def decorate(handler):
+            @functools.wraps(handler)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                outcome = 'ok'
+                try:
+                    return handler(*args, **kwargs)
+                except Exception:
+                    outcome = 'error'
+                    raise
+                finally:
+                    self.event_latency.observe(event, value=time.perf_counter() - start)
+                    self.events.inc(event, outcome)
+                    if args:
+                        self.event_size.observe(event, value=_payload_size(args[0]))
+            return wrapper
+        return decorate
+
+    # --- exposition ----------------------------------------------------------------
+    def render(self):
+        lines = [
+            '# HELP process_uptime_seconds Seconds since the backend started',
+            '# TYPE process_uptime_seconds gauge',
+            f'process_uptime_seconds {time.time() - self.started:.1f}',
+        ]
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for fn in self.collectors:
+            try:
+                collected = [(name, help, series, COLLECTED_KINDS[kind[0] if kind else 'gauge'])
+                             for name, help, series, *kind in fn()]
+            except Exception as e:
+                lines.append(f'# collector {getattr(fn, "__name__", fn)} failed: {e}')
+                continue
+            for name, help, series, kind in collected:
+                lines.extend(kind(name, help).header())
+                for labels, value in series.items():
+                    names = tuple(k for k, _ in labels)
+                    values = tuple(v for _, v in labels)
+                    lines.append(f'{name}{_labels(names, values)} {_number(value)}')
+        return '\n'.join(lines) + '\n'
@@ -2,37 +2,60 @@
 """
 Smart Traffic Management Dashboard - Backend Server
 Run this file to start the Flask backend server
+
+    python run.py            # development: Werkzeug, threads, auto-reload
+    python run.py --server   # production: eventlet, one process, hundreds of clients
 """
 
+import argparse
 import os
 import sys
-from app import app, socketio
 
 if __name__ == '__main__':
-    # Set environment variables
-    os.environ['FLASK_ENV'] = 'development'
-    os.environ['FLASK_DEBUG'] = '1'
-    
+    parser = argparse.ArgumentParser(description="Smart Traffic Management Dashboard backend")
+    parser.add_argument('--server', action='store_true',
+                        help="serve with eventlet green threads instead of the Werkzeug dev server")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5050)
+    args = parser.parse_args()
+
+    # Must be set before app is imported: it picks the async mode and monkey patches at import
+    if args.server:
+        os.environ['SOCKETIO_ASYNC_MODE'] = 'eventlet'
+    else:
+        # Set environment variables
+        os.environ['FLASK_ENV'] = 'development'
+        os.environ['FLASK_DEBUG'] = '1'
+
+    from app import ASYNC_MODE, app, socketio, start_background_tasks
+
     print("🚦 Starting Smart Traffic Management Dashboard Backend...")
-    print("📍 Server will be available at: http://localhost:5050")
-    print("🔌 WebSocket endpoint: ws://localhost:5050")
+    print(f"⚙️  Async mode: {ASYNC_MODE}")
+    print(f"📍 Server will be available at: http://localhost:{args.port}")
+    print(f"🔌 WebSocket endpoint: ws://localhost:{args.port}")
     print("📡 API endpoints:")
     print("   - GET  /api/stats")
-    print("   - GET  /api/alerts") 
+    print("   - GET  /api/alerts")
     print("   - GET  /api/map-data")
     print("   - GET  /api/analytics")
     print("   - POST /api/mode")
     print("   - GET  /api/signal/<id>/camera")
+    print("   - GET  /api/cv-stream")
     print("\n" + "="*50)
-    
+
     try:
-        socketio.run(
-            app, 
-            debug=True, 
-            host='0.0.0.0', 
-            port=5050,
-            allow_unsafe_werkzeug=True
-        )
+        start_background_tasks()
+        if ASYNC_MODE == 'threading':
+            socketio.run(
+                app,
+                debug=True,
+                host=args.host,
+                port=args.port,
+                allow_unsafe_werkzeug=True
+            )
+        else:
+            # eventlet's WSGI server: no reloader, no debugger, no per-connection OS thread
+            socketio.run(app, host=args.host, port=args.port, log_output=False)
     except KeyboardInterrupt:
         print("\n🛑 Server stopped by user")
     except Exception as e:
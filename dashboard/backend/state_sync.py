@@ -0,0 +1,136 @@
+"""
+Versioned dashboard state with JSON-patch deltas.
+
+The backend keeps one copy of what dashboards display (stats, signals, emergency
+vehicles, alerts). update() diffs new section values against the stored ones and,
+if anything changed, bumps the version and returns a patch:
+
+    {"epoch": "3fa2c1d0", "from": 41, "version": 42,
+     "ops": [{"op": "replace", "path": "/signals/2/queue_length", "value": 7}]}
+
+Ops follow RFC 6902 (add / remove / replace). Dicts are diffed per key. Lists of
+equal length are diffed per index, and any other list is replaced whole. Recent
+patches are kept in a ring buffer, so a client that reconnects at version N can
+be sent the ops since N. If the buffer no longer reaches back that far, or the
+epoch changed because the server restarted, the client gets a snapshot instead.
+The epoch and version together also serve as the ETag of endpoints derived from
+this state.
+"""
+
+import copy
+import threading
+import uuid
+from collections import deque
+
+_MISSING = object()
+
+
+def _escape(key):
+    return str(key).replace('~', '~0').replace('/', '~1')
+
+
+def _unescape(token):
+    return token.replace('~1', '/').replace('~0', '~')
+
+
+def diff(old, new, path=''):
+    """Ops that turn `old` into `new`"""
+    ops = []
+    _diff(old, new, path, ops)
+    return ops
+
+
+def _diff(old, new, path, ops):
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old:
+            if key not in new:
+                ops.append({'op': 'remove', 'path': f'{path}/{_escape(key)}'})
+        for key, value in new.items():
+            child = f'{path}/{_escape(key)}'
+            if key in old:
+                _diff(old[key], value, child, ops)
+            else:
+                ops.append({'op': 'add', 'path': child, 'value': value})
+    elif isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        for i, (a, b) in enumerate(zip(old, new)):
+            _diff(a, b, f'{path}/{i}', ops)
+    elif type(old) is not type(new) or old != new:
+        ops.append({'op': 'replace', 'path': path, 'value': new})
+
+
+def apply_patch(doc, ops):
+    """Apply ops in place and return the document (used by tests and Python clients)"""
+    for op in ops:
+        tokens = [_unescape(t) for t in op['path'].split('/')[1:]]
+        parent = doc
+        for token in tokens[:-1]:
+            parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+        last = tokens[-1]
+        if isinstance(parent, list):
+            last = int(last)
+        if op['op'] == 'remove':
+            del parent[last]
+        else:
+            parent[last] = op['value']
+    return doc
+
+
+class VersionedState:
+    def __init__(self, history=256):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.version = 0
+        self._state = {}
+        self._history = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    @property
+    def etag(self):
+        return f'{self.epoch}-{self.version}'
+
+    def get(self, key, default=None):
+        return self._state.get(key, default)
+
+    def read(self, *keys):
+        """The etag and the given sections, both from the same version"""
+        with self._lock:
+            return self.etag, {key: self._state.get(key) for key in keys}
+
+    def update(self, **sections):
+        """Replace top-level sections; returns the patch, or None when nothing changed"""
+        with self._lock:
+            ops = []
+            for key, value in sections.items():
+                value = copy.deepcopy(value)  # stored values are never mutated in place after this
+                old = self._state.get(key, _MISSING)
+                if old is _MISSING:
+                    changes = [{'op': 'add', 'path': f'/{_escape(key)}', 'value': value}]
+                else:
+                    changes = diff(old, value, f'/{_escape(key)}')
+                if changes:
+                    self._state[key] = value
+                    ops.extend(changes)
+            if not ops:
+                return None
+            patch = {'epoch': self.epoch, 'from': self.version, 'version': self.version + 1, 'ops': ops}
+            self.version += 1
+            self._history.append(patch)
+            return patch
+
+    def since(self, version, epoch=None):
+        """One combined patch from `version` to now, or None if the client needs a snapshot"""
+        with self._lock:
+            if epoch is not None and epoch != self.epoch:
+                return None
+            if version == self.version:
+                return {'epoch': self.epoch, 'from': version, 'version': version, 'ops': []}
+            if version > self.version or not self._history or self._history[0]['from'] > version:
+                return None
+            ops = []
+            for patch in self._history:
+                if patch['from'] >= version:
+                    ops.extend(patch['ops'])
+            return {'epoch': self.epoch, 'from': version, 'version': self.version, 'ops': ops}
+
+    def snapshot(self):
+        with self._lock:
+            return {'epoch': self.epoch, 'version': self.version, 'state': dict(self._state)}
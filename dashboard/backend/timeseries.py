@@ -0,0 +1,252 @@
+"""
+Embedded time-series store for the dashboard backend (SQLite).
+
+Counts, simulation events and controller plans are recorded as samples of a
+metric, optionally per key (e.g. metric "vehicles", key "lane1"). record() does
+not touch the database. It folds the sample into in-memory rollup cells, one
+each at 1 min, 15 min and 1 h resolution (count / sum / min / max / last). A
+writer thread upserts the cells about once a second. Queries therefore read
+precomputed rows off the primary key (resolution, metric, key, bucket), and
+months of hourly data come back in milliseconds however many frames were
+ingested.
+
+Raw events are kept in their own table for EVENT_RETENTION seconds, and 1 min
+rollups for ROLLUP_RETENTION[60]. Coarser rollups are kept longer, and hourly
+ones forever.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+RESOLUTIONS = (60, 900, 3600)
+ROLLUP_RETENTION = {60: 7 * 86400, 900: 90 * 86400, 3600: None}
+EVENT_RETENTION = 30 * 86400
+CO2_PER_VEHICLE = 0.25  # kg, the same estimate calculate_stats uses
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollup (
+    res INTEGER NOT NULL,
+    metric TEXT NOT NULL,
+    key TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    sum REAL NOT NULL,
+    min REAL NOT NULL,
+    max REAL NOT NULL,
+    last REAL NOT NULL,
+    PRIMARY KEY (res, metric, key, bucket)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS events (
+    ts REAL NOT NULL,
+    kind TEXT NOT NULL,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS events_ts ON events (ts);
+"""
+
+UPSERT = """
+INSERT INTO rollup (res, metric, key, bucket, count, sum, min, max, last)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (res, metric, key, bucket) DO UPDATE SET
+    count = count + excluded.count,
+    sum = sum + excluded.sum,
+    min = MIN(min, excluded.min),
+    max = MAX(max, excluded.max),
+    last = excluded.last
+"""
+
+
+class TimeSeriesStore:
+    def __init__(self, path, flush_interval=1.0, autostart=True):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.autostart = autostart  # start the writer on the first record(), whoever hosts the app
+        self._cells = {}  # (res, metric, key, bucket) -> [count, sum, min, max, last]
+        self._events = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._thread = None
+        self._running = False
+        self._last_prune = 0.0
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5.0)
+        conn.execute('PRAGMA journal_mode=WAL')  # readers never wait for the writer
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _reader(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    # --- ingestion -------------------------------------------------------------
+    def record(self, metric, value, key='', ts=None):
+        ts = time.time() if ts is None else ts
+        value = float(value)
+        with self._lock:
+            for res in RESOLUTIONS:
+                cell_key = (res, metric, key, int(ts // res) * res)
+                cell = self._cells.get(cell_key)
+                if cell is None:
+                    self._cells[cell_key] = [1, value, value, value, value]
+                else:
+                    cell[0] += 1
+                    cell[1] += value
+                    if value < cell[2]:
+                        cell[2] = value
+                    if value > cell[3]:
+                        cell[3] = value
+                    cell[4] = value
+        if self._thread is None and self.autostart:
+            self.start()
+
+    def record_counts(self, metric, counts, ts=None):
+        """One sample per key plus their total under key ''"""
+        ts = time.time() if ts is None else ts
+        total = 0
+        for key, value in counts.items():
+            self.record(metric, value, key=str(key), ts=ts)
+            total += value
+        self.record(metric, total, ts=ts)
+
+    def record_event(self, kind, data=None, ts=None):
+        """Keep the raw event and count it per kind"""
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            self._events.append((ts, kind, json.dumps(data) if data is not None else None))
+        self.record('events', 1, key=kind, ts=ts)
+
+    # --- writer ----------------------------------------------------------------
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._running = True
+            self._thread = threading.Thread(name='timeseriesWriter', target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        conn = self._connect()
+        while self._running:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush(conn)
+                if time.time() - self._last_prune > 3600:
+                    self.prune(conn)
+            except Exception as e:
+                print(f"⚠️ Time-series write failed: {e}")
+        conn.close()
+
+    def flush(self, conn=None):
+        with self._lock:
+            cells, self._cells = self._cells, {}
+            events, self._events = self._events, []
+        if not cells and not events:
+            return 0
+        conn = conn or self._reader()
+        with conn:
+            conn.executemany(UPSERT, [key + tuple(cell) for key, cell in cells.items()])
+            if events:
+                conn.executemany('INSERT INTO events (ts, kind, data) VALUES (?, ?, ?)', events)
+        return len(cells)
+
+    def prune(self, conn=None, now=None):
+        now = time.time() if now is None else now
+        self._last_prune = now
+        conn = conn or self._reader()
+        with conn:
+            for res, keep in ROLLUP_RETENTION.items():
+                if keep is not None:
+                    conn.execute('DELETE FROM rollup WHERE res = ? AND bucket < ?', (res, now - keep))
+            conn.execute('DELETE FROM events WHERE ts < ?', (now - EVENT_RETENTION,))
+
+    def close(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval * 2)
+        self.flush()
+
+    # --- queries ---------------------------------------------------------------
+    def series(self, metric, key='', res=3600, since=0, until=None):
+        """[(bucket, count, sum, min, max, last)] in time order"""
+        until = time.time() if until is None else until
+        return self._reader().execute(
+            'SELECT bucket, count, sum, min, max, last FROM rollup '
+            'WHERE res = ? AND metric = ? AND key = ? AND bucket >= ? AND bucket <= ? ORDER BY bucket',
+            (res, metric, key, int(since), until)).fetchall()
+
+    def averages_by_key(self, metric, res, since, until):
+        """{key: mean} over a window, for every non-total key of the metric"""
+        rows = self._reader().execute(
+            'SELECT key, SUM(sum), SUM(count) FROM rollup '
+            'WHERE res = ? AND metric = ? AND key != \'\' AND bucket >= ? AND bucket < ? GROUP BY key',
+            (res, metric, int(since), int(until))).fetchall()
+        return {key: total / count for key, total, count in rows if count}
+
+    def events(self, kind=None, since=0, limit=100):
+        sql = 'SELECT ts, kind, data FROM events WHERE ts >= ?'
+        args = [since]
+        if kind is not None:
+            sql += ' AND kind = ?'
+            args.append(kind)
+        sql += ' ORDER BY ts DESC LIMIT ?'
+        args.append(limit)
+        return [{'ts': ts, 'kind': k, **(json.loads(data) if data else {})}
+                for ts, k, data in self._reader().execute(sql, args)]
+
+    def analytics(self, metric='vehicles', now=None):
+        """The /api/analytics payload from hourly and 15 min rollups; None if nothing was recorded"""
+        now = time.time() if now is None else now
+        hours = self.series(metric, res=3600, since=now - 24 * 3600, until=now)
+        if not hours:
+            return None
+
+        hourly_traffic = []
+        for bucket, count, total, _, _, _ in hours:
+            vehicles = total / count
+            hourly_traffic.append({
+                'hour': datetime.fromtimestamp(bucket).hour,
+                'vehicles': round(vehicles),
+                'co2_saved': round(vehicles * CO2_PER_VEHICLE, 1),
+            })
+
+        days = {}
+        for bucket, count, total, _, _, _ in self.series(metric, res=3600, since=now - 7 * 86400, until=now):
+            date = datetime.fromtimestamp(bucket).strftime('%Y-%m-%d')
+            days[date] = days.get(date, 0.0) + total / count * CO2_PER_VEHICLE
+        co2_trends = [{'date': date, 'co2_saved': round(co2, 1)} for date, co2 in sorted(days.items())]
+
+        recent = self.averages_by_key(metric, 900, now - 3600, now + 1)
+        previous = self.averages_by_key(metric, 900, now - 7200, now - 3600)
+        busiest = max(recent.values(), default=0) or 1
+        congestion_hotspots = []
+        for key, level in sorted(recent.items(), key=lambda item: -item[1]):
+            before = previous.get(key)
+            if before is None or abs(level - before) <= 0.1 * max(before, 1):
+                trend = 'stable'
+            else:
+                trend = 'increasing' if level > before else 'decreasing'
+            congestion_hotspots.append({
+                'location': key,
+                'congestion_level': round(100 * level / busiest),
+                'trend': trend,
+            })
+
+        return {
+            'hourly_traffic': hourly_traffic,
+            'co2_trends': co2_trends,
+            'congestion_hotspots': congestion_hotspots,
+        }
+
+
+def from_env(default_dir):
+    path = os.environ.get('TIMESERIES_DB', os.path.join(default_dir, 'traffic_timeseries.db'))
+    return TimeSeriesStore(path, flush_interval=float(os.environ.get('TIMESERIES_FLUSH', '1.0')))
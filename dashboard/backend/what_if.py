@@ -0,0 +1,333 @@
+"""
+Fast-forward "what-if" evaluation for the dashboard backend.
+
+A request supplies a demand profile and a controller choice. The simulation in
+simulation/simulation.py then runs headless (SDL dummy driver, no window, no
+dashboard connections) as fast as the CPU allows in a worker process, and KPIs
+are returned: throughput, delay and max queue.
+
+Each job runs in a process of its own: the simulation keeps its state in
+module globals, and a run that exceeds its timeout is killed so it frees its
+slot. At most WHAT_IF_WORKERS jobs run at once.
+
+Demand is either vehicles per hour per direction
+    {"right": 600, "down": 450, "left": 300, "up": 300}
+or a list of segments applied in order (the last one lasts until the end)
+    [{"duration": 1800, "rates": {"right": 900}}, {"duration": 1800, "rates": {"right": 300}}]
+"""
+
+import importlib.util
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(BACKEND_DIR, '..', '..'))
+SIM_PATH = os.path.join(REPO_ROOT, 'simulation', 'simulation.py')
+
+DIRECTIONS = ('right', 'down', 'left', 'up')
+CONTROLLERS = ('adaptive', 'fixed', 'rl')
+DEFAULT_MIX = {'car': 1, 'bus': 1, 'truck': 1, 'rickshaw': 1, 'bike': 1}
+
+MAX_DURATION = 4 * 3600
+MAX_RATE = 3600  # vehicles per hour per direction
+WORKERS = int(os.environ.get('WHAT_IF_WORKERS', '2'))
+JOB_TIMEOUT = float(os.environ.get('WHAT_IF_TIMEOUT', '300'))
+
+_slots = threading.BoundedSemaphore(WORKERS)
+
+
+def _number(value, name, cast=float):
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be a number') from None
+
+
+def _mapping(value, name):
+    if not isinstance(value, dict):
+        raise ValueError(f'{name} must be an object')
+    return value
+
+
+def normalize_params(params):
+    """Validate a request body; raises ValueError with a message for the client"""
+    params = _mapping(params, 'request body')
+    duration = _number(params.get('duration', 3600), 'duration', int)
+    if not 60 <= duration <= MAX_DURATION:
+        raise ValueError(f'duration must be between 60 and {MAX_DURATION} seconds')
+
+    controller = params.get('controller', 'adaptive')
+    if controller not in CONTROLLERS:
+        raise ValueError(f'controller must be one of {", ".join(CONTROLLERS)}')
+
+    demand = params.get('demand')
+    if demand is None:
+        raise ValueError('demand is required')
+    if isinstance(demand, dict):
+        demand = [{'duration': duration, 'rates': demand}]
+    if not isinstance(demand, list) or not demand:
+        raise ValueError('demand must be an object of vehicles/hour per direction or a list of segments')
+    segments = []
+    for segment in demand:
+        segment = _mapping(segment, 'each demand segment')
+        clean = {}
+        for direction, rate in _mapping(segment.get('rates', {}), 'segment rates').items():
+            if direction not in DIRECTIONS:
+                raise ValueError(f'unknown direction {direction!r}')
+            rate = _number(rate, f'rate for {direction}')
+            if not 0 <= rate <= MAX_RATE:
+                raise ValueError(f'rate for {direction} must be between 0 and {MAX_RATE} vehicles/hour')
+            clean[direction] = rate
+        segments.append({'duration': _number(segment.get('duration', duration), 'segment duration'),
+                         'rates': clean})
+
+    mix = _mapping(params.get('mix') or DEFAULT_MIX, 'mix')
+    mix = {name: _number(weight, f'mix weight for {name}') for name, weight in mix.items()}
+    if not all(name in DEFAULT_MIX and weight >= 0 for name, weight in mix.items()) or sum(mix.values()) <= 0:
+        raise ValueError(f'mix must give non-negative weights for {", ".join(DEFAULT_MIX)}')
+
+    return {
+        'duration': duration,
+        'controller': controller,
+        'fixed_green': _number(params.get('fixed_green', 20), 'fixed_green', int),
+        'demand': segments,
+        'mix': mix,
+        'seed': _number(params.get('seed', 0), 'seed', int),
+        'progress_interval': _number(params.get('progress_interval', 60), 'progress_interval'),
+    }
+
+
+def _load_simulation(seed):
+    os.environ.update({
+        'SDL_VIDEODRIVER': 'dummy',
+        'SDL_AUDIODRIVER': 'dummy',
+        'SIM_HEADLESS': '1',
+        'SIM_QUIET': '1',
+        'SIM_SPEED': '0',
+        'SIM_SEED': str(seed),
+    })
+    for key in ('SIM_RECORD', 'SIM_REPLAY', 'SIM_TRACE'):
+        os.environ.pop(key, None)
+    spec = importlib.util.spec_from_file_location('what_if_sim', SIM_PATH)
+    sim = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(sim)
+    return sim
+
+
+class DemandSpawner:
+    """Poisson arrivals per direction; time-varying rates are applied by thinning"""
+
+    def __init__(self, sim, segments, mix):
+        self.sim = sim
+        self.segments = segments
+        self.mix = mix
+        self.mix_total = sum(mix.values())
+        self.peak = {d: max(s['rates'].get(d, 0.0) for s in segments) / 3600.0 for d in DIRECTIONS}
+
+    def rate(self, direction, t):
+        elapsed = 0.0
+        for segment in self.segments:
+            elapsed += segment['duration']
+            if t < elapsed:
+                break
+        return segment['rates'].get(direction, 0.0) / 3600.0
+
+    def start(self):
+        for direction in DIRECTIONS:
+            if self.peak[direction] > 0:
+                self.sim.scheduler.schedule(self.sim.rng.expovariate(self.peak[direction]), self.arrive, direction)
+
+    def arrive(self, direction):
+        sim = self.sim
+        peak = self.peak[direction]
+        if sim.rng.random() * peak < self.rate(direction, sim.scheduler.now):
+            self.spawn(direction)
+        sim.scheduler.schedule(sim.rng.expovariate(peak), self.arrive, direction)
+
+    def spawn(self, direction):
+        sim = self.sim
+        r = sim.rng.random() * self.mix_total
+        for vehicle_class, weight in self.mix.items():
+            r -= weight
+            if r < 0:
+                break
+        # Same lane and turn rules as simulation.generateVehicle
+        lane = 0 if vehicle_class == 'bike' else sim.rng.randint(0, 1) + 1
+        will_turn = 1 if lane == 2 and sim.rng.randint(0, 4) <= 2 else 0
+        sim.spawnVehicle(sim.vehicleTypeNumbers[vehicle_class], lane, sim.directionIndex[direction], will_turn)
+
+
+class KpiRecorder:
+    """Wraps the simulation's queue counters to time every vehicle from spawn to stop line"""
+
+    def __init__(self, sim):
+        self.sim = sim
+        self.spawned = {}
+        self.delays = []
+        self.max_queue = 0
+        self.max_queue_by_direction = {d: 0 for d in DIRECTIONS}
+        counters = sim.queueCounters
+        self._on_spawn = counters.on_spawn
+        self._on_cross = counters.on_cross
+        counters.on_spawn = self.on_spawn
+        counters.on_cross = self.on_cross
+
+    def on_spawn(self, vehicle):
+        self._on_spawn(vehicle)
+        self.spawned[id(vehicle)] = (self.sim.scheduler.now, vehicle.x, vehicle.y)
+
+    def on_cross(self, vehicle):
+        self._on_cross(vehicle)
+        spawn = self.spawned.pop(id(vehicle), None)
+        if spawn is None:
+            return
+        t0, x0, y0 = spawn
+        sim = self.sim
+        rect = vehicle.currentImage.get_rect()
+        stop_line = sim.stopLines[vehicle.direction]
+        distance = {
+            'right': stop_line - (x0 + rect.width),
+            'down': stop_line - (y0 + rect.height),
+            'left': x0 - stop_line,
+            'up': y0 - stop_line,
+        }[vehicle.direction]
+        free_flow = max(0.0, distance) / (vehicle.speed * sim.SIM_FPS)
+        self.delays.append(max(0.0, sim.scheduler.now - t0 - free_flow))
+
+    def sample_queues(self):
+        total = 0
+        for direction in DIRECTIONS:
+            waiting = self.sim.queueCounters.waiting(direction)
+            total += waiting
+            if waiting > self.max_queue_by_direction[direction]:
+                self.max_queue_by_direction[direction] = waiting
+        if total > self.max_queue:
+            self.max_queue = total
+
+    def result(self, duration, wall_time):
+        crossed = self.sim.queueCounters.total_crossed()
+        delays = sorted(self.delays)
+        return {
+            'throughput': crossed,
+            'throughput_per_hour': round(crossed * 3600.0 / duration, 1),
+            'avg_delay': round(sum(delays) / len(delays), 2) if delays else 0.0,
+            'p95_delay': round(delays[int(0.95 * (len(delays) - 1))], 2) if delays else 0.0,
+            'max_queue': self.max_queue,
+            'max_queue_by_direction': self.max_queue_by_direction,
+            'still_waiting': sum(self.sim.queueCounters.waiting(d) for d in DIRECTIONS),
+            'simulated_seconds': duration,
+            'wall_time': round(wall_time, 2),
+        }
+
+
+def _install_controller(sim, controller, fixed_green):
+    if controller == 'adaptive':
+        return  # the simulation's own count-based setTime
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    from controllers.rl_agent import RLAgent
+    from controllers.rule_based import RuleBasedController
+
+    if controller == 'fixed':
+        agent = RuleBasedController(fixed_green=fixed_green)
+    else:
+        agent = RLAgent(base_time=sim.defaultMinimum, max_time=sim.defaultMaximum)
+
+    def setTime():
+        next_index = (sim.currentGreen + 1) % sim.noOfSignals
+        waiting = {d: sim.queueCounters.waiting(d) for d in DIRECTIONS}
+        green = int(agent.decide(waiting)[sim.directionNumbers[next_index]])
+        sim.signals[next_index].green = max(sim.defaultMinimum, min(sim.defaultMaximum, green))
+
+    sim.setTime = setTime
+
+
+def run_what_if(job, progress=None):
+    """Worker entry point: one headless simulation run, returns the KPI dict"""
+    started = time.monotonic()
+    sim = _load_simulation(job['seed'])
+    sim.simTime = job['duration']
+    sim.autoSpawn = False
+    _install_controller(sim, job['controller'], job['fixed_green'])
+    kpis = KpiRecorder(sim)
+    DemandSpawner(sim, job['demand'], job['mix']).start()
+    sim.scheduler.every(1.0, kpis.sample_queues)
+    if progress is not None:
+        def report():
+            progress.put({
+                'sim_time': round(sim.scheduler.now),
+                'duration': job['duration'],
+                'progress': round(min(1.0, sim.scheduler.now / job['duration']), 3),
+                'crossed': sim.queueCounters.total_crossed(),
+            })
+        sim.scheduler.every(job['progress_interval'], report)
+    sim.startSimulation()
+    sim.scheduler.run()
+    return kpis.result(job['duration'], time.monotonic() - started)
+
+
+def _worker(job, progress, results):
+    """Child process: runs one job and puts ('result', kpis) or ('error', message) on `results`"""
+    try:
+        results.put(('result', run_what_if(job, progress)))
+    except Exception as e:
+        results.put(('error', f'{type(e).__name__}: {e}'))
+
+
+def _drain(progress, on_progress):
+    try:
+        while True:
+            update = progress.get_nowait()
+            if on_progress is not None:
+                on_progress(update)
+    except queue.Empty:
+        pass
+
+
+def run_job(job, on_progress=None, timeout=JOB_TIMEOUT, sleep=time.sleep):
+    """Run a normalized job in a worker process, forwarding progress while waiting for the KPIs
+
+    The wait never blocks inside a queue or a lock: it polls and calls `sleep`, so the backend
+    can pass socketio.sleep and keep serving other clients under eventlet. `timeout` covers
+    waiting for a free slot too; a worker still running at the deadline is killed.
+    """
+    deadline = time.monotonic() + timeout
+    while not _slots.acquire(blocking=False):
+        if time.monotonic() > deadline:
+            raise TimeoutError(f'no what-if worker became free within {timeout:.0f}s')
+        sleep(0.2)
+    try:
+        context = multiprocessing.get_context('spawn')
+        progress, results = context.Queue(), context.Queue()
+        process = context.Process(target=_worker, args=(job, progress, results), daemon=True)
+        process.start()
+        try:
+            while True:
+                _drain(progress, on_progress)
+                try:
+                    status, value = results.get_nowait()
+                except queue.Empty:
+                    if not process.is_alive():
+                        try:  # the result may still be in flight from a worker that just exited
+                            status, value = results.get(timeout=1.0)
+                        except queue.Empty:
+                            raise RuntimeError(f'what-if worker exited with code {process.exitcode}') from None
+                    elif time.monotonic() > deadline:
+                        raise TimeoutError(f'what-if run exceeded {timeout:.0f}s')
+                    else:
+                        sleep(0.2)
+                        continue
+                _drain(progress, on_progress)  # updates sent just before the result
+                if status == 'error':
+                    raise RuntimeError(value)
+                return value
+        finally:
+            if process.is_alive():
+                process.kill()  # not terminate(): SDL turns SIGTERM into a quit event nobody reads
+            process.join(timeout=5)
+    finally:
+        _slots.release()
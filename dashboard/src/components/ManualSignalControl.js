@@ -32,8 +32,8 @@ const ManualSignalControl = () => {
     });
 
     // Listen for signal state updates from simulation
-    newSocket.on('signal_state_update', (data) => {
-      console.log('📡 Received signal state update:', data);
+    newSocket.on('signal_state_update', (data, ack) => {
+      if (ack) ack();  // lets the server's broadcaster know this client keeps up
       if (data.signals) {
         // Map simulation signal IDs (0,1,2,3) to our component format
         setSignalStates({
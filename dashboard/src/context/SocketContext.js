@@ -1,4 +1,4 @@
-import React, { createContext, useContext, useEffect, useState } from 'react';
+import React, { createContext, useContext, useEffect, useRef, useState } from 'react';
 import { io } from 'socket.io-client';
 
 const SocketContext = createContext();
@@ -11,6 +11,33 @@ export const useSocket = () => {
   return context;
 };
 
+// Applies RFC 6902 ops from the backend's state_patch events without mutating `doc`:
+// only the objects along each op's path are copied, so unchanged sections keep their identity
+const applyPatch = (doc, ops) => {
+  const root = { ...doc };
+  const copied = new Set([root]);
+  ops.forEach((op) => {
+    const keys = op.path.split('/').slice(1).map(k => k.replace(/~1/g, '/').replace(/~0/g, '~'));
+    let parent = root;
+    keys.slice(0, -1).forEach((key) => {
+      let child = parent[key];
+      if (!copied.has(child)) {
+        child = Array.isArray(child) ? [...child] : { ...child };
+        copied.add(child);
+        parent[key] = child;
+      }
+      parent = child;
+    });
+    const last = keys[keys.length - 1];
+    if (op.op === 'remove') {
+      delete parent[last];
+    } else {
+      parent[last] = op.value;
+    }
+  });
+  return root;
+};
+
 export const SocketProvider = ({ children }) => {
   const [socket, setSocket] = useState(null);
   const [connected, setConnected] = useState(false);
@@ -25,13 +52,22 @@ export const SocketProvider = ({ children }) => {
   const [emergencyVehicles, setEmergencyVehicles] = useState([]);
   const [cvData, setCvData] = useState(null);
   const [signalsVehicleData, setSignalsVehicleData] = useState(null);
+  // Last state version applied, so patches can be checked for gaps
+  const syncRef = useRef({ epoch: null, version: null, state: {} });
+  const signalsDataEtag = useRef(null);
 
   // Fetch signals vehicle data
   const fetchSignalsVehicleData = async () => {
     try {
       const apiUrl = process.env.REACT_APP_API_URL || 'http://localhost:5050';
+      // The backend answers revalidations with 304 until a new CV frame arrives
       const response = await fetch(`${apiUrl}/api/signals-vehicle-data`);
       if (response.ok) {
+        const etag = response.headers.get('ETag');
+        if (etag && etag === signalsDataEtag.current) {
+          return;  // same version as last time: skip parsing and re-rendering
+        }
+        signalsDataEtag.current = etag;
         const data = await response.json();
         setSignalsVehicleData(data);
         // Update stats with total vehicles from signals data
@@ -57,10 +93,29 @@ export const SocketProvider = ({ children }) => {
       reconnectionAttempts: 5
     });
 
+    // Apply the sections of the dashboard state that changed
+    const applyState = (state, changed) => {
+      if (changed.has('stats') && state.stats) {
+        setStats(prev => ({ ...prev, ...state.stats }));
+      }
+      if (changed.has('signals') && state.signals) {
+        setSignals(state.signals);
+      }
+      if (changed.has('emergency_vehicles') && state.emergency_vehicles) {
+        setEmergencyVehicles(state.emergency_vehicles);
+      }
+    };
+
+    const resync = () => {
+      const { epoch, version } = syncRef.current;
+      newSocket.emit('state_resync', { epoch, version });
+    };
+
     newSocket.on('connect', () => {
       console.log('Connected to server');
       setConnected(true);
       newSocket.emit('subscribe_to_updates');
+      resync();
     });
 
     newSocket.on('disconnect', () => {
@@ -77,24 +132,27 @@ export const SocketProvider = ({ children }) => {
       console.log('Reconnected to server');
       setConnected(true);
       newSocket.emit('subscribe_to_updates');
+      resync();
     });
 
-    newSocket.on('stats_update', (data) => {
-      // Use real vehicle detection data from backend
-      setStats(prev => ({
-        ...prev,
-        vehicles_detected: data.vehicles_detected || 0,
-        co2_saved: data.co2_saved || 0,
-        avg_wait_time: data.avg_wait_time || 0,
-        mode: data.mode || prev.mode
-      }));
+    // Full state: on first connect, after a server restart, or when patches were missed
+    newSocket.on('state_snapshot', (snapshot) => {
+      syncRef.current = { epoch: snapshot.epoch, version: snapshot.version, state: snapshot.state };
+      applyState(snapshot.state, new Set(Object.keys(snapshot.state)));
     });
 
-    newSocket.on('signals_update', (data) => {
-      setSignals(data.signals);
-      if (data.emergency_vehicles) {
-        setEmergencyVehicles(data.emergency_vehicles);
+    // Deltas: only changed fields travel; a gap in versions triggers a resync
+    newSocket.on('state_patch', (patch) => {
+      const current = syncRef.current;
+      if (patch.epoch !== current.epoch || patch.from !== current.version) {
+        if (patch.epoch !== current.epoch || patch.version > current.version) {
+          resync();  // ignore stale patches, catch up on newer ones
+        }
+        return;
       }
+      const state = applyPatch(current.state, patch.ops);
+      syncRef.current = { epoch: patch.epoch, version: patch.version, state };
+      applyState(state, new Set(patch.ops.map(op => op.path.split('/')[1])));
     });
 
     newSocket.on('new_alert', (alert) => {
@@ -105,7 +163,9 @@ export const SocketProvider = ({ children }) => {
       setStats(prev => ({ ...prev, mode: data.mode }));
     });
 
-    newSocket.on('cv_frame_update', (data) => {
+    // Broadcast events are acked so the server can hold back updates while this tab is slow
+    newSocket.on('cv_frame_update', (data, ack) => {
+      if (ack) ack();
       setCvData(data);
       // Also refresh signals vehicle data when CV updates
       fetchSignalsVehicleData();
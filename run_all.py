@@ -1,9 +1,9 @@
-import subprocess
-import time
 import sys
 import os
 
-processes = []
+from common.supervisor import ProcessSpec, Supervisor, http_probe, port_probe
+
+supervisor = Supervisor()
 
 def run_all():
     try:
@@ -12,53 +12,49 @@ def run_all():
         env = os.environ.copy()
         env["PYTHONPATH"] = os.getcwd()
 
-        # 1. Start YOLOv8 CV Detection
-        p1 = subprocess.Popen([sys.executable, "ai_module/cv_module.py"], env=env)
-        processes.append(p1)
+        # 1. Start Flask Backend first: the CV module connects to it on startup
+        supervisor.start(ProcessSpec(
+            name="backend",
+            cmd=[sys.executable, "app.py"],
+            cwd="dashboard/backend",
+            env=env,
+            ready=http_probe("http://localhost:5050/api/health"),
+            restart="always",
+        ))
+        print("✅ Flask backend started at http://localhost:5050")
+
+        # 2. Start YOLOv8 CV Detection
+        supervisor.start(ProcessSpec(
+            name="cv_module",
+            cmd=[sys.executable, "ai_module/cv_module.py"],
+            env=env,
+            restart="always",
+        ))
         print("✅ CV Detection started.")
 
-        time.sleep(3)  # let CV warm up
-
-    # 2. Start Bridge Provider and Orchestrator ONLY when triggered from dashboard (not auto-started)
-    # p2 = subprocess.Popen([sys.executable, "simulation/bridge_provider.py"], env=env)
-    # processes.append(p2)
-    # print("✅ Bridge provider started.")
-
-    # time.sleep(2)
-
-    # p3 = subprocess.Popen([sys.executable, "simulation/orchestrator.py", "--mode", "rl"], env=env)
-    # processes.append(p3)
-    # print("✅ Orchestrator started (RL mode).")
-
-    # time.sleep(2)
-
-        # 4. Start Flask Backend (fix path)
-        p4 = subprocess.Popen([sys.executable, "app.py"], cwd="dashboard/backend", env=env)
-        processes.append(p4)
-        print("✅ Flask backend started at http://localhost:5000")
-
-        time.sleep(2)
-
-
-        # 5. Start React Frontend (npm start) from dashboard/src/ (where the correct package.json is)
-        p5 = subprocess.Popen(["npm", "start"], cwd="dashboard/src", env=env)
-        processes.append(p5)
+    # 3. Start Bridge Provider and Orchestrator ONLY when triggered from dashboard (not auto-started)
+    # supervisor.start(ProcessSpec(name="bridge_provider", cmd=[sys.executable, "simulation/bridge_provider.py"], env=env))
+    # supervisor.start(ProcessSpec(name="orchestrator", cmd=[sys.executable, "simulation/orchestrator.py", "--mode", "rl"], env=env))
+
+        # 4. Start React Frontend (npm start) from dashboard/src/ (where the correct package.json is)
+        supervisor.start(ProcessSpec(
+            name="frontend",
+            cmd=["npm", "start"],
+            cwd="dashboard/src",
+            env=env,
+            ready=port_probe("localhost", 3000),
+            ready_timeout=120.0,
+        ))
         print("✅ React frontend started at http://localhost:3000")
 
         print("\n🚀 All modules running. Press Ctrl+C to stop.\n")
 
-        # Monitor processes
-        while True:
-            for i, p in enumerate(processes):
-                ret = p.poll()
-                if ret is not None:
-                    print(f"[ERROR] Process {i+1} exited with code {ret}")
-            time.sleep(5)
+        # Monitor processes: restart with backoff and report CPU/RSS every 30 s
+        supervisor.run_forever(interval=1.0, report_every=30.0)
 
     except KeyboardInterrupt:
         print("\n🛑 Shutting down all processes...")
-        for p in processes:
-            p.terminate()
+        supervisor.stop_all()
         print("✅ All stopped.")
 
 if __name__ == "__main__":
@@ -2,20 +2,23 @@
 Bridge provider for integrating real-time CV lane counts with the Pygame simulation.
 
 How it works:
-- Reads the latest JSON object from data/ai_module/vehicle_counts.jsonl
-- Maps it into the provider schema expected by integrated_simulation.register_detection_provider
+- Tails data/ai_module/vehicle_counts.jsonl, reading only the lines appended since the last read
+- Keeps the latest counts per approach (records may carry an "approach" key, default 'right')
+- Maps them into the provider schema expected by integrated_simulation.register_detection_provider
 - Runs the simulation in RL mode so green times are driven by real counts
 
-Notes:
-- This bridges counts into GREEN TIME decisions; it does not spawn/destroy exact sprites.
-- If you want the simulation to show exactly N vehicles, we can add a queue-sync later.
+Modes:
+- default: counts drive GREEN TIME decisions only
+- --queue-sync: additionally keeps every approach's waiting queue equal to the CV counts,
+  spawning or retiring simulated vehicles by the difference on each sync tick
 """
 
+import argparse
 import sys
 import time
 import json
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 # Resolve paths
 THIS_DIR = Path(__file__).resolve().parent
@@ -26,100 +29,165 @@ CV_COUNTS_PATH = REPO_ROOT / "ai_module" / "vehicle_counts.jsonl"
 sys.path.insert(0, str(THIS_DIR))
 import integrated_simulation as sim  # type: ignore
 
-
-def read_latest_jsonl(path: Path) -> Dict[str, Any] | None:
-    if not path.exists():
-        return None
+sys.path.insert(0, str(REPO_ROOT))
+from common.count_snapshot import CountPublisher, CountSnapshot, DIRECTIONS, DIRECTION_INDEX, N_LANES  # noqa: E402
+
+# CV lane name -> simulation lane: lane_1 -> 0, lane_2 -> 1, lane_3..lane_15 -> 2
+CV_LANE_INDEX = {f"lane_{i}": min(i, 3) - 1 for i in range(1, 16)}
+
+
+class JsonlTail:
+    """Reads only the JSON lines appended to a file since the previous call"""
+
+    def __init__(self, path: Path, initial_tail_bytes: int = 64 * 1024):
+        self.path = path
+        self.initial_tail_bytes = initial_tail_bytes
+        self.offset: int | None = None
+        self._partial = b""
+
+    def read_new(self) -> List[Dict[str, Any]]:
+        try:
+            size = self.path.stat().st_size
+        except OSError:
+            return []
+        skip_first = False
+        if self.offset is None:
+            # First read: only the end of the file matters for the latest counts
+            self.offset = max(0, size - self.initial_tail_bytes)
+            skip_first = self.offset > 0
+        elif size < self.offset:
+            # File was truncated or replaced: start over
+            self.offset = 0
+            self._partial = b""
+        if size == self.offset:
+            return []
+        try:
+            with self.path.open("rb") as f:
+                f.seek(self.offset)
+                data = f.read(size - self.offset)
+        except OSError as e:
+            print(f"⚠️ Failed to read {self.path}: {e}")
+            return []
+        self.offset += len(data)
+
+        lines = (self._partial + data).split(b"\n")
+        self._partial = lines.pop()  # incomplete last line, finished by a later write
+        if skip_first and lines:
+            lines = lines[1:]
+        records = []
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+        return records
+
+
+def write_lane_counts(snapshot: CountSnapshot, direction_index: int, lane_counts: Dict[str, Any]) -> bool:
+    """Write one CV record's lanes into the snapshot in place; returns True if anything changed"""
+    lane0 = lane1 = lane2 = 0
+    for name, count in lane_counts.items():
+        index = CV_LANE_INDEX.get(name)
+        if index == 0:
+            lane0 += int(count)
+        elif index == 1:
+            lane1 += int(count)
+        elif index == 2:
+            lane2 += int(count)
+    counts = snapshot.counts
+    base = direction_index * N_LANES
+    if counts[base] == lane0 and counts[base + 1] == lane1 and counts[base + 2] == lane2:
+        return False
+    counts[base] = lane0
+    counts[base + 1] = lane1
+    counts[base + 2] = lane2
+    return True
+
+
+# Latest counts per approach, updated in place from the appended lines only
+tail = JsonlTail(CV_COUNTS_PATH)
+publisher = CountPublisher()
+
+
+def poll_counts() -> bool:
+    """Apply newly appended CV records; publishes a new snapshot version if any counts changed"""
     try:
-        with path.open("r", encoding="utf-8") as f:
-            lines = [ln.strip() for ln in f if ln.strip()]
-            if not lines:
-                return None
-            return json.loads(lines[-1])  # last JSON object
+        records = tail.read_new()
+        if not records:
+            return False
+        snapshot = publisher.begin()
+        changed = False
+        for record in records:
+            index = DIRECTION_INDEX.get(record.get("approach", "right"))
+            if index is not None and write_lane_counts(snapshot, index, record.get("lane_counts", {})):
+                changed = True
+        if changed:
+            publisher.publish()
+        return changed
     except Exception as e:
-        print(f"⚠️ Failed to read {path}: {e}")
-        return None
-
-
-def map_counts_to_provider_payload(latest: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Input (from cv_module):
-        {"lane_counts": {"lane_1": N1, "lane_2": N2, ...}}
-
-    Output (provider schema for simulation):
-    {
-      "counts": {
-        "right": {"lane0": int, "lane1": int, "lane2": int},
-        "down": {"lane0": 0, "lane1": 0, "lane2": 0},
-        "left": {"lane0": 0, "lane1": 0, "lane2": 0},
-        "up": {"lane0": 0, "lane1": 0, "lane2": 0}
-      },
-      "ambulance": {"direction": "right", "present": False}
-    }
-    """
-    lane_counts = latest.get("lane_counts", {})
-    lanes = {k: int(v) for k, v in lane_counts.items()}
-
-    lane0 = lanes.get("lane_1", 0)
-    lane1 = lanes.get("lane_2", 0)
-
-    # Aggregate remaining lanes into lane2
-    remaining = sum(lanes.get(f"lane_{i}", 0) for i in range(3, 16))
-    lane2 = remaining
-
-    zeros = {"lane0": 0, "lane1": 0, "lane2": 0}
-
-    payload = {
-        "counts": {
-            "right": {"lane0": lane0, "lane1": lane1, "lane2": lane2},
-            "down": zeros.copy(),
-            "left": zeros.copy(),
-            "up": zeros.copy(),
-        },
-        "ambulance": {"direction": "right", "present": False},
-    }
-    return payload
-
+        print(f"⚠️ Provider error: {e}")
+        return False
 
-# Cache
-last_payload: Dict[str, Any] | None = None
-last_mtime: float | None = None
 
+def provider(current_green_idx: int, next_green_idx: int) -> CountSnapshot:
+    """Callable provider that the simulation will use for live counts (read without copying)"""
+    poll_counts()
+    return publisher.current
 
-def provider(current_green_idx: int, next_green_idx: int) -> Dict[str, Any]:
-    """Callable provider that the simulation will use for live counts"""
-    global last_payload, last_mtime
 
-    try:
-        if CV_COUNTS_PATH.exists():
-            st = CV_COUNTS_PATH.stat()
-            if last_mtime is None or st.st_mtime > last_mtime:
-                latest = read_latest_jsonl(CV_COUNTS_PATH)
-                if latest:
-                    last_payload = map_counts_to_provider_payload(latest)
-                    last_mtime = st.st_mtime
-    except Exception as e:
-        print(f"⚠️ Provider error: {e}")
+def sync_queues(core, snapshot: CountSnapshot) -> tuple[int, int]:
+    """
+    Make each lane's waiting queue match its target count.
 
-    # Fallback to zeros if nothing read yet
-    if not last_payload:
-        zeros = {"lane0": 0, "lane1": 0, "lane2": 0}
-        last_payload = {
-            "counts": {
-                "right": zeros.copy(),
-                "down": zeros.copy(),
-                "left": zeros.copy(),
-                "up": zeros.copy(),
-            },
-            "ambulance": {"direction": "right", "present": False},
-        }
-    return last_payload
+    Waiting counts come from the simulation's incremental counters, so a lane whose
+    queue already matches costs O(1); only the difference is spawned or retired.
+    Vehicles are retired from the back of the queue, where nothing waits behind them.
+    """
+    spawned = retired = 0
+    for d, direction in enumerate(DIRECTIONS):
+        for lane in range(N_LANES):
+            diff = snapshot.count(d, lane) - core.queueCounters.waiting(direction, lane)
+            if diff > 0:
+                vehicle_type = core.vehicleTypeNumbers["bike" if lane == 0 else "car"]
+                for _ in range(diff):
+                    core.spawnVehicle(vehicle_type, lane, core.directionIndex[direction], 0)
+                spawned += diff
+            queue = core.vehicles[direction][lane]
+            while diff < 0 and queue and core.retireVehicle(queue[-1]):
+                diff += 1
+                retired += 1
+    return spawned, retired
+
+
+def queue_sync_tick():
+    """Scheduled on the simulation's scheduler: poll the CV file, then reconcile every approach"""
+    if sim.sim.replayPlayer is not None:
+        return  # the recorded spawns and retirements are replayed instead; the tick keeps its place
+    poll_counts()
+    spawned, retired = sync_queues(sim.sim, publisher.current)
+    if spawned or retired:
+        print(f"🔁 Queue sync: +{spawned} / -{retired} vehicles")
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Drive the simulation from live CV lane counts")
+    parser.add_argument("--queue-sync", action="store_true",
+                        help="mirror CV counts into simulated vehicles instead of random spawns")
+    parser.add_argument("--sync-interval", type=float, default=1.0,
+                        help="seconds of simulated time between queue-sync ticks")
+    args = parser.parse_args()
+
     sim.mode = "rl"
     sim.register_detection_provider(provider)
-    print(f"🚦 Bridge running: reading {CV_COUNTS_PATH} -> driving simulation (RL mode)")
+    if args.queue_sync:
+        sim.sim.autoSpawn = False
+        sim.sim.scheduler.every(args.sync_interval, queue_sync_tick, first=0.0)
+        print(f"🚦 Bridge running: mirroring {CV_COUNTS_PATH} into simulated queues (all approaches)")
+    else:
+        print(f"🚦 Bridge running: reading {CV_COUNTS_PATH} -> driving simulation (RL mode)")
     sim.run()
 
 
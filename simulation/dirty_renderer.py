@@ -0,0 +1,79 @@
+"""
+Dirty-rectangle renderer for the pygame views.
+
+Each frame the view registers what it wants on screen with draw(key, surface, pos).
+present() compares that with the previous frame and only restores the background,
+redraws and pushes to the display the regions whose surface or position changed.
+Surfaces are compared by identity, so text should come from RenderCache.text()
+(which returns the same surface for the same value) to stay clean between frames.
+"""
+
+import pygame
+
+
+class DirtyRectRenderer:
+    def __init__(self, screen, background):
+        self.screen = screen
+        self.background = background
+        self.screen_rect = screen.get_rect()
+        self._previous = {}
+        self._current = {}
+        self._full_refresh = True
+
+    def set_background(self, background):
+        self.background = background
+        self.invalidate()
+
+    def invalidate(self):
+        """Force the next present() to redraw and update the whole screen"""
+        self._full_refresh = True
+
+    def draw(self, key, surface, pos=None, center=None):
+        """Register `surface` under `key` for this frame (later calls draw on top)"""
+        if center is not None:
+            rect = surface.get_rect(center=center)
+        else:
+            rect = surface.get_rect(topleft=(int(pos[0]), int(pos[1])))
+        if not self.screen_rect.colliderect(rect):
+            return
+        self._current.pop(key, None)
+        self._current[key] = (surface, rect)
+
+    def present(self):
+        """Apply this frame's changes to the screen and return the updated rects"""
+        current, previous = self._current, self._previous
+        self._previous, self._current = current, {}
+
+        if self._full_refresh:
+            self._full_refresh = False
+            self.screen.blit(self.background, (0, 0))
+            for surface, rect in current.values():
+                self.screen.blit(surface, rect)
+            pygame.display.update()
+            return [self.screen_rect]
+
+        dirty = []
+        for key, (surface, rect) in current.items():
+            prev = previous.get(key)
+            if prev is None:
+                dirty.append(rect)
+            elif prev[0] is not surface or prev[1] != rect:
+                dirty.append(rect)
+                dirty.append(prev[1])
+        for key, (_, rect) in previous.items():
+            if key not in current:
+                dirty.append(rect)
+        if not dirty:
+            return dirty
+
+        # Restore each region and redraw what overlaps it, in registration order. The clip
+        # keeps a redrawn sprite from painting over later sprites outside the region.
+        for area in dirty:
+            self.screen.set_clip(area)
+            self.screen.blit(self.background, area, area)
+            for surface, rect in current.values():
+                if rect.colliderect(area):
+                    self.screen.blit(surface, rect)
+        self.screen.set_clip(None)
+        pygame.display.update(dirty)
+        return dirty
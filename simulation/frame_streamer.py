@@ -0,0 +1,158 @@
+"""
+Background frame streamer for posting simulation frames to the dashboard.
+
+The render thread only copies the screen's pixel buffer into a single
+latest-frame slot (older unsent frames are overwritten). A worker thread
+encodes the newest frame in memory (JPEG or WebP, optional downscale) and posts
+it over a persistent HTTP session, so rendering never waits on disk or network.
+"""
+
+import io
+import os
+import tempfile
+import threading
+import time
+
+import pygame
+
+try:
+    import requests
+except Exception:
+    requests = None
+
+try:
+    from PIL import Image
+except Exception:
+    Image = None
+
+CONTENT_TYPES = {"jpeg": "image/jpeg", "webp": "image/webp"}
+
+
+def _surface_bytes(surface):
+    if hasattr(pygame.image, "tobytes"):
+        return pygame.image.tobytes(surface, "RGB")
+    return pygame.image.tostring(surface, "RGB")
+
+
+class FrameStreamer:
+    def __init__(self, url, fmt="jpeg", quality=80, scale=1.0, interval=0.5, timeout=2.0):
+        fmt = fmt.lower()
+        if fmt == "jpg":
+            fmt = "jpeg"
+        if fmt not in CONTENT_TYPES:
+            raise ValueError(f"Unsupported frame format: {fmt}")
+        if fmt == "webp" and Image is None:
+            print("⚠️ Pillow not available, falling back to JPEG frames")
+            fmt = "jpeg"
+        self.url = url
+        self.fmt = fmt
+        self.quality = int(quality)
+        self.scale = float(scale)
+        self.interval = float(interval)
+        self.timeout = timeout
+
+        self.frames_submitted = 0
+        self.frames_sent = 0
+        self.frames_dropped = 0
+
+        self._slot = None  # (raw_bytes, size) of the newest frame not yet encoded
+        self._cond = threading.Condition()
+        self._running = True
+        self._last_submit = 0.0
+        self._session = requests.Session() if requests is not None else None
+        self._thread = threading.Thread(name="frameStreamer", target=self._run, daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_env(cls, default_url):
+        return cls(
+            url=os.environ.get("FRAMES_URL", default_url),
+            fmt=os.environ.get("FRAME_FORMAT", "jpeg"),
+            quality=os.environ.get("FRAME_QUALITY", "80"),
+            scale=os.environ.get("FRAME_SCALE", "1.0"),
+            interval=os.environ.get("FRAME_POST_INTERVAL", "0.5"),
+        )
+
+    def submit(self, surface):
+        """Called from the render thread: copy the frame into the slot if it is due"""
+        now = time.monotonic()
+        if now - self._last_submit < self.interval:
+            return
+        self._last_submit = now
+        frame = (_surface_bytes(surface), surface.get_size())
+        with self._cond:
+            if self._slot is not None:
+                self.frames_dropped += 1  # previous frame never got encoded, newest wins
+            self._slot = frame
+            self.frames_submitted += 1
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self._thread.join(timeout=self.timeout)
+        if self._session is not None:
+            self._session.close()
+
+    def encode(self, raw, size):
+        """Encode a raw RGB buffer to JPEG/WebP bytes in memory"""
+        width, height = size
+        out_size = (max(1, int(width * self.scale)), max(1, int(height * self.scale)))
+        buf = io.BytesIO()
+        if Image is not None:
+            image = Image.frombuffer("RGB", size, raw, "raw", "RGB", 0, 1)
+            if out_size != size:
+                image = image.resize(out_size, Image.BILINEAR)
+            image.save(buf, format=self.fmt.upper(), quality=self.quality)
+        else:
+            surface = pygame.image.frombuffer(raw, size, "RGB")
+            if out_size != size:
+                surface = pygame.transform.smoothscale(surface, out_size)
+            pygame.image.save(surface, buf, "frame.jpg")
+        return buf.getvalue()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and self._slot is None:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                raw, size = self._slot
+                self._slot = None
+            try:
+                data = self.encode(raw, size)
+            except Exception as e:
+                print(f"⚠️ Frame encode failed: {e}")
+                continue
+            if not self._post(data):
+                self._write_fallback(data)
+
+    def _post(self, data):
+        if self._session is None:
+            return False
+        try:
+            resp = self._session.post(
+                self.url,
+                data=data,
+                headers={"Content-Type": CONTENT_TYPES[self.fmt]},
+                timeout=self.timeout,
+            )
+            if resp.status_code != 200:
+                return False
+            self.frames_sent += 1
+            return True
+        except Exception:
+            return False
+
+    def _write_fallback(self, data):
+        # Keep the latest frame available locally when the backend is unreachable
+        try:
+            ext = "jpg" if self.fmt == "jpeg" else self.fmt
+            tmp_path = os.path.join(tempfile.gettempdir(), f"sim_frame.{ext}")
+            with open(tmp_path + ".tmp", "wb") as f:
+                f.write(data)
+            os.replace(tmp_path + ".tmp", tmp_path)
+        except Exception:
+            pass
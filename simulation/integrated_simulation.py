@@ -26,6 +26,9 @@ import importlib.util
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 SIM_PATH = os.path.join(BASE_DIR, 'simulation.py')
 
+sys.path.insert(0, os.path.dirname(BASE_DIR))
+from common.count_snapshot import CountSnapshot  # noqa: E402
+
 spec = importlib.util.spec_from_file_location('sim_module', SIM_PATH)
 sim = importlib.util.module_from_spec(spec)
 spec.loader.exec_module(sim)  # type: ignore
@@ -97,21 +100,31 @@ def register_detection_provider(fn: Callable[[int, int], Dict]):
 _orig_setTime = sim.setTime
 
 def setTime_patched():
-    if _provider is None:
+    replaying_provider = sim.replayPlayer is not None and sim.replayPlayer.has_provider_input
+    if _provider is None and not replaying_provider:
         return _orig_setTime()
 
     # Integrated RL detection input here: Use external counts to compute green time
     sim.noOfCars = sim.noOfBuses = sim.noOfTrucks = sim.noOfRickshaws = sim.noOfBikes = 0
-    payload = _provider(sim.currentGreen, sim.nextGreen)
-
-    counts = payload.get('counts', {})
-    dir_name = sim.directionNumbers[sim.nextGreen]
-    lane_counts = counts.get(dir_name, {})
+    # Recorded with SIM_RECORD and served from the log with SIM_REPLAY
+    payload = sim.providerInput(lambda: _provider(sim.currentGreen, sim.nextGreen))
+
+    if isinstance(payload, CountSnapshot):
+        # Fast path: read the flat count array directly
+        bikes = payload.count(sim.nextGreen, 0)
+        lane1 = payload.count(sim.nextGreen, 1)
+        lane2 = payload.count(sim.nextGreen, 2)
+        amb = {'present': payload.ambulance_index >= 0, 'direction': payload.ambulance_direction}
+    else:
+        counts = payload.get('counts', {})
+        dir_name = sim.directionNumbers[sim.nextGreen]
+        lane_counts = counts.get(dir_name, {})
 
-    # Expected keys: lane0/lane1/lane2 (lane0 is bikes lane in original logic)
-    bikes = int(lane_counts.get('lane0', 0))
-    lane1 = int(lane_counts.get('lane1', 0))
-    lane2 = int(lane_counts.get('lane2', 0))
+        # Expected keys: lane0/lane1/lane2 (lane0 is bikes lane in original logic)
+        bikes = int(lane_counts.get('lane0', 0))
+        lane1 = int(lane_counts.get('lane1', 0))
+        lane2 = int(lane_counts.get('lane2', 0))
+        amb = payload.get('ambulance', {})
 
     sim.noOfBikes = bikes
     # Approximate distribution for lane1/lane2: cars+buses+trucks+rickshaws
@@ -135,7 +148,6 @@ def setTime_patched():
     sim.signals[(sim.currentGreen + 1) % (sim.noOfSignals)].green = greenTime
 
     # Emergency hint from provider (ambulance)
-    amb = payload.get('ambulance', {})
     if amb.get('present'):
         sim.emergency_active = True
         sim.emergency_direction = amb.get('direction', sim.directionNumbers[sim.currentGreen])
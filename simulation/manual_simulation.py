@@ -58,6 +58,15 @@ def asset_path(*parts):
     """Get path to asset file"""
     return os.path.join(SCRIPT_DIR, "images", *parts)
 
+if SCRIPT_DIR not in sys.path:
+    sys.path.insert(0, SCRIPT_DIR)
+from render_cache import RenderCache
+from dirty_renderer import DirtyRectRenderer
+
+# Shared sprites, tinted variants, fonts and text surfaces (created once, reused every frame)
+RENDER_CACHE = RenderCache()
+STOPPED_TINT = (128, 128, 128)
+
 # Vehicle types
 VEHICLE_TYPES = ["car", "bus", "truck", "bike", "rickshaw", "ambulance"]
 VEHICLE_COLORS = {
@@ -207,6 +216,52 @@ class ManualControlClient:
             print(f"❌ Error broadcasting signal state: {e}")
 
 
+class LaneQueue:
+    """Ordered queue of vehicles in one (direction, lane), front vehicle first.
+
+    Vehicles are linked to their leader/follower so that finding the vehicle
+    ahead and removing a vehicle are both O(1).
+    """
+
+    def __init__(self):
+        self.head = None
+        self.tail = None
+        self.count = 0
+
+    def append(self, vehicle):
+        """Add a vehicle at the back of the queue"""
+        vehicle.leader = self.tail
+        vehicle.follower = None
+        if self.tail is not None:
+            self.tail.follower = vehicle
+        else:
+            self.head = vehicle
+        self.tail = vehicle
+        self.count += 1
+
+    def remove(self, vehicle):
+        """Unlink a vehicle from anywhere in the queue"""
+        if vehicle.leader is not None:
+            vehicle.leader.follower = vehicle.follower
+        else:
+            self.head = vehicle.follower
+        if vehicle.follower is not None:
+            vehicle.follower.leader = vehicle.leader
+        else:
+            self.tail = vehicle.leader
+        vehicle.leader = vehicle.follower = None
+        self.count -= 1
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        vehicle = self.head
+        while vehicle is not None:
+            yield vehicle
+            vehicle = vehicle.follower
+
+
 class Vehicle:
     """Represents a vehicle in the simulation"""
     
@@ -223,6 +278,10 @@ class Vehicle:
         self.crossed_intersection = False
         self.color = VEHICLE_COLORS[vehicle_type]
         
+        # Neighbours in the vehicle's LaneQueue (set when it joins a lane)
+        self.leader = None
+        self.follower = None
+        
         # Load vehicle image
         self.load_image()
         
@@ -237,25 +296,22 @@ class Vehicle:
             self.remove_x = -50
     
     def load_image(self):
-        """Load vehicle image based on type and direction"""
+        """Load vehicle image based on type and direction (shared through the render cache)"""
         direction_folder = DIRECTION_IMAGE_NAMES[self.direction]
-        image_path = asset_path(direction_folder, f"{self.type}.png")
+        self.image_path = asset_path(direction_folder, f"{self.type}.png")
         
-        try:
-            self.original_image = pygame.image.load(image_path)
-            self.current_image = self.original_image.copy()
+        self.original_image = RENDER_CACHE.image(self.image_path)
+        self.current_image = self.original_image
+        if self.original_image is not None:
             # Get dimensions from actual image
             self.width = self.current_image.get_width()
             self.height = self.current_image.get_height()
-        except Exception as e:
-            print(f"⚠️ Could not load image {image_path}: {e}")
+        else:
             # Fallback to colored rectangle
-            self.original_image = None
-            self.current_image = None
             self.width = 15 if self.type == "bike" else 20
             self.height = 10 if self.type == "bike" else 15
     
-    def update(self, signal_state, vehicles_ahead):
+    def update(self, signal_state, leader):
         """Update vehicle position based on traffic signals and other vehicles"""
         # Check if vehicle should be removed
         if self.should_remove():
@@ -264,8 +320,8 @@ class Vehicle:
         # Check if vehicle should stop at red light
         should_stop = self.should_stop_at_signal(signal_state)
         
-        # Check for vehicles ahead
-        should_stop_for_vehicle = self.should_stop_for_vehicle(vehicles_ahead)
+        # Check for the vehicle directly ahead in the same lane
+        should_stop_for_vehicle = self.should_stop_for_vehicle(leader)
         
         if should_stop or should_stop_for_vehicle:
             self.stopped = True
@@ -294,31 +350,26 @@ class Vehicle:
         
         return False
     
-    def should_stop_for_vehicle(self, vehicles_ahead):
-        """Check if vehicle should stop for vehicle ahead"""
-        if not vehicles_ahead:
+    def should_stop_for_vehicle(self, leader):
+        """Check if vehicle should stop for the vehicle ahead (its lane leader)"""
+        if leader is None:
             return False
         
         min_distance = 30  # Minimum following distance
         
-        for other in vehicles_ahead:
-            if other.lane == self.lane and other.direction == self.direction:
-                # Calculate distance based on direction
-                if self.direction == NORTH:
-                    distance = other.y - (self.y - self.height)
-                elif self.direction == SOUTH:
-                    distance = (self.y + self.height) - other.y
-                elif self.direction == EAST:
-                    distance = (self.x + self.width) - other.x
-                elif self.direction == WEST:
-                    distance = other.x - (self.x - self.width)
-                else:
-                    continue
-                
-                if 0 < distance < min_distance:
-                    return True
+        # Calculate distance based on direction
+        if self.direction == NORTH:
+            distance = leader.y - (self.y - self.height)
+        elif self.direction == SOUTH:
+            distance = (self.y + self.height) - leader.y
+        elif self.direction == EAST:
+            distance = (self.x + self.width) - leader.x
+        elif self.direction == WEST:
+            distance = leader.x - (self.x - self.width)
+        else:
+            return False
         
-        return False
+        return 0 < distance < min_distance
     
     def should_remove(self):
         """Check if vehicle should be removed from simulation"""
@@ -345,48 +396,37 @@ class Vehicle:
             if in_intersection_x and in_intersection_y:
                 self.crossed_intersection = True
     
-    def draw(self, screen):
-        """Draw vehicle on screen"""
+    def sprite(self):
+        """Surface to draw for the vehicle's current state (cached, never rebuilt per frame)"""
         if self.current_image and self.original_image:
-            # Draw vehicle image
             if self.stopped:
-                # Create a darker version when stopped
-                darkened = self.original_image.copy()
-                darkened.fill((128, 128, 128), special_flags=pygame.BLEND_MULT)
-                screen.blit(darkened, (self.x - self.width//2, self.y - self.height//2))
-            else:
-                screen.blit(self.current_image, (self.x - self.width//2, self.y - self.height//2))
+                # Pre-darkened variant when stopped
+                return RENDER_CACHE.tinted(self.image_path, STOPPED_TINT)
+            return self.current_image
+        key = ("vehicle_fallback", self.type, self.direction, self.stopped)
+        return RENDER_CACHE.get(key, self.build_fallback_sprite)
+    
+    def build_fallback_sprite(self):
+        """Colored rectangle with a direction indicator, used when no image is available"""
+        surface = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
+        color = self.color if not self.stopped else tuple(c // 2 for c in self.color)
+        surface.fill(color)
+        
+        cx, cy = self.width // 2, self.height // 2
+        if self.direction == NORTH:
+            points = [(cx, 0), (cx - 3, cy), (cx + 3, cy)]
+        elif self.direction == SOUTH:
+            points = [(cx, self.height - 1), (cx - 3, cy), (cx + 3, cy)]
+        elif self.direction == EAST:
+            points = [(self.width - 1, cy), (cx, cy - 3), (cx, cy + 3)]
         else:
-            # Fallback to colored rectangle
-            color = self.color if not self.stopped else tuple(c // 2 for c in self.color)
-            pygame.draw.rect(screen, color, (self.x - self.width//2, self.y - self.height//2, 
-                                           self.width, self.height))
-            
-            # Draw direction indicator for fallback
-            if self.direction == NORTH:
-                pygame.draw.polygon(screen, WHITE, [
-                    (self.x, self.y - self.height//2),
-                    (self.x - 3, self.y),
-                    (self.x + 3, self.y)
-                ])
-            elif self.direction == SOUTH:
-                pygame.draw.polygon(screen, WHITE, [
-                    (self.x, self.y + self.height//2),
-                    (self.x - 3, self.y),
-                    (self.x + 3, self.y)
-                ])
-            elif self.direction == EAST:
-                pygame.draw.polygon(screen, WHITE, [
-                    (self.x + self.width//2, self.y),
-                    (self.x, self.y - 3),
-                    (self.x, self.y + 3)
-                ])
-            elif self.direction == WEST:
-                pygame.draw.polygon(screen, WHITE, [
-                    (self.x - self.width//2, self.y),
-                    (self.x, self.y - 3),
-                    (self.x, self.y + 3)
-                ])
+            points = [(0, cy), (cx, cy - 3), (cx, cy + 3)]
+        pygame.draw.polygon(surface, WHITE, points)
+        return surface
+    
+    def draw(self, renderer):
+        """Register the vehicle with the dirty-rect renderer"""
+        renderer.draw(self, self.sprite(), (self.x - self.width//2, self.y - self.height//2))
 
 
 class TrafficSignal:
@@ -407,9 +447,8 @@ class TrafficSignal:
             try:
                 image_path = asset_path(f"signals/{signal_type}.png")
                 if os.path.exists(image_path):
-                    image = pygame.image.load(image_path)
-                    # Scale signal images to appropriate size
-                    images[signal_type] = pygame.transform.scale(image, (30, 90))
+                    # Scaled once and shared by all signals
+                    images[signal_type] = RENDER_CACHE.scaled(image_path, (30, 90))
                     print(f"✅ Loaded signal image: {signal_type}")
                 else:
                     print(f"⚠️ Signal image not found: {image_path}")
@@ -437,39 +476,40 @@ class TrafficSignal:
         elif self.direction == WEST:
             return (INTERSECTION_CENTER_X + 80, INTERSECTION_CENTER_Y + 60)
     
-    def draw(self, screen):
-        """Draw traffic signal"""
+    def build_fallback_image(self):
+        """Signal box with colored circles, used when signal images are missing"""
+        surface = pygame.Surface((30, 90))
+        surface.fill(BLACK)
+        pygame.draw.rect(surface, WHITE, (2, 2, 26, 86))
+        
+        # Signal lights
+        colors = [DARK_GRAY, DARK_GRAY, DARK_GRAY]
+        if self.state == SIGNAL_RED:
+            colors[0] = RED
+        elif self.state == SIGNAL_YELLOW:
+            colors[1] = YELLOW
+        elif self.state == SIGNAL_GREEN:
+            colors[2] = GREEN
+        
+        pygame.draw.circle(surface, colors[0], (15, 20), 8)  # Red
+        pygame.draw.circle(surface, colors[1], (15, 45), 8)  # Yellow
+        pygame.draw.circle(surface, colors[2], (15, 70), 8)  # Green
+        return surface
+    
+    def draw(self, renderer):
+        """Register the traffic signal and its label with the dirty-rect renderer"""
         x, y = self.get_signal_position()
         
-        # Try to use signal image first
+        # Try to use signal image first, fallback to colored circles
         if self.state in self.signal_images:
             signal_img = self.signal_images[self.state]
-            img_rect = signal_img.get_rect(center=(x, y))
-            screen.blit(signal_img, img_rect)
         else:
-            # Fallback to colored circles
-            # Signal box
-            pygame.draw.rect(screen, BLACK, (x-15, y-45, 30, 90))
-            pygame.draw.rect(screen, WHITE, (x-13, y-43, 26, 86))
-            
-            # Signal lights
-            colors = [DARK_GRAY, DARK_GRAY, DARK_GRAY]
-            if self.state == SIGNAL_RED:
-                colors[0] = RED
-            elif self.state == SIGNAL_YELLOW:
-                colors[1] = YELLOW
-            elif self.state == SIGNAL_GREEN:
-                colors[2] = GREEN
-            
-            pygame.draw.circle(screen, colors[0], (x, y-25), 8)  # Red
-            pygame.draw.circle(screen, colors[1], (x, y), 8)     # Yellow
-            pygame.draw.circle(screen, colors[2], (x, y+25), 8)  # Green
+            signal_img = RENDER_CACHE.get(("signal_fallback", self.state), self.build_fallback_image)
+        renderer.draw(("signal", self.direction), signal_img, center=(x, y))
         
         # Direction label
-        font = pygame.font.Font(None, 24)
-        text = font.render(DIRECTION_NAMES[self.direction], True, BLACK)
-        text_rect = text.get_rect(center=(x, y-60))
-        screen.blit(text, text_rect)
+        text = RENDER_CACHE.text(DIRECTION_NAMES[self.direction], 24, BLACK)
+        renderer.draw(("signal_label", self.direction), text, center=(x, y-60))
 
 
 class ManualSimulation:
@@ -480,10 +520,12 @@ class ManualSimulation:
         self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
         pygame.display.set_caption("Manual Traffic Simulation - Dashboard Controlled")
         self.clock = pygame.time.Clock()
-        self.font = pygame.font.Font(None, 36)
+        self.font = RENDER_CACHE.font(36)
         
-        # Load intersection background image
+        # Load intersection background image and compose the static background once
         self.load_background()
+        self.background = self.build_background()
+        self.renderer = DirtyRectRenderer(self.screen, self.background)
         
         # Initialize traffic signals
         self.signals = {
@@ -495,6 +537,12 @@ class ManualSimulation:
         
         # Vehicle management
         self.vehicles = []
+        # Per-(direction, lane) ordered queues used for leader lookups
+        self.lane_queues = {
+            (direction, lane): LaneQueue()
+            for direction in DIRECTION_NAMES
+            for lane in range(len(LANE_POSITIONS[direction]))
+        }
         self.spawn_timer = 0
         self.spawn_interval = 120  # frames between spawns
         
@@ -554,30 +602,28 @@ class ManualSimulation:
         
         vehicle = Vehicle(vehicle_type, direction, lane, x, y, dx, dy)
         self.vehicles.append(vehicle)
+        self.lane_queues[(direction, lane)].append(vehicle)
         self.vehicles_spawned += 1
     
     def update_vehicles(self):
         """Update all vehicles"""
-        vehicles_to_remove = []
+        active = []
         
-        for i, vehicle in enumerate(self.vehicles):
+        for vehicle in self.vehicles:
             # Get signal state for this vehicle's direction
             signal_state = self.signals[vehicle.direction].state
             
-            # Get vehicles ahead in the same direction and lane
-            vehicles_ahead = [v for v in self.vehicles[:i] if 
-                            v.direction == vehicle.direction and v.lane == vehicle.lane]
-            
-            # Update vehicle
-            if not vehicle.update(signal_state, vehicles_ahead):
-                vehicles_to_remove.append(vehicle)
+            # Update vehicle against the vehicle directly ahead in its lane
+            if not vehicle.update(signal_state, vehicle.leader):
+                self.lane_queues[(vehicle.direction, vehicle.lane)].remove(vehicle)
                 self.vehicles_completed += 1
             else:
                 vehicle.check_intersection_crossing()
+                active.append(vehicle)
         
-        # Remove completed vehicles
-        for vehicle in vehicles_to_remove:
-            self.vehicles.remove(vehicle)
+        # Drop completed vehicles in a single pass
+        if len(active) != len(self.vehicles):
+            self.vehicles = active
     
     def handle_events(self):
         """Handle pygame events"""
@@ -607,17 +653,24 @@ class ManualSimulation:
         elif current == SIGNAL_YELLOW:
             self.set_signal_state(direction, SIGNAL_RED)
     
-    def draw_intersection(self):
+    def build_background(self):
+        """Static background (intersection) that the renderer restores dirty regions from"""
+        background = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+        background.fill(WHITE)
+        self.draw_intersection(background)
+        return background
+    
+    def draw_intersection(self, surface):
         """Draw the intersection"""
         if self.background_image:
             # Use the actual intersection image
-            self.screen.blit(self.background_image, (0, 0))
+            surface.blit(self.background_image, (0, 0))
         else:
             # Fallback to programmatic drawing
             # Road surface
-            pygame.draw.rect(self.screen, DARK_GRAY, 
+            pygame.draw.rect(surface, DARK_GRAY, 
                             (0, INTERSECTION_CENTER_Y - 60, WINDOW_WIDTH, 120))
-            pygame.draw.rect(self.screen, DARK_GRAY, 
+            pygame.draw.rect(surface, DARK_GRAY, 
                             (INTERSECTION_CENTER_X - 60, 0, 120, WINDOW_HEIGHT))
             
             # Lane markings
@@ -626,45 +679,45 @@ class ManualSimulation:
                 y = INTERSECTION_CENTER_Y - 30 + i * 20
                 for x in range(0, WINDOW_WIDTH, 40):
                     if not (INTERSECTION_CENTER_X - 60 < x < INTERSECTION_CENTER_X + 60):
-                        pygame.draw.rect(self.screen, YELLOW, (x, y-1, 20, 2))
+                        pygame.draw.rect(surface, YELLOW, (x, y-1, 20, 2))
                 
                 # Vertical lanes  
                 x = INTERSECTION_CENTER_X - 30 + i * 20
                 for y in range(0, WINDOW_HEIGHT, 40):
                     if not (INTERSECTION_CENTER_Y - 60 < y < INTERSECTION_CENTER_Y + 60):
-                        pygame.draw.rect(self.screen, YELLOW, (x-1, y, 2, 20))
+                        pygame.draw.rect(surface, YELLOW, (x-1, y, 2, 20))
             
             # Stop lines
             # North stop line
-            pygame.draw.rect(self.screen, WHITE, 
+            pygame.draw.rect(surface, WHITE, 
                             (INTERSECTION_CENTER_X - 60, STOP_LINES[NORTH], 120, 3))
             # South stop line
-            pygame.draw.rect(self.screen, WHITE, 
+            pygame.draw.rect(surface, WHITE, 
                             (INTERSECTION_CENTER_X - 60, STOP_LINES[SOUTH], 120, 3))
             # East stop line
-            pygame.draw.rect(self.screen, WHITE, 
+            pygame.draw.rect(surface, WHITE, 
                             (STOP_LINES[EAST], INTERSECTION_CENTER_Y - 60, 3, 120))
             # West stop line
-            pygame.draw.rect(self.screen, WHITE, 
+            pygame.draw.rect(surface, WHITE, 
                             (STOP_LINES[WEST], INTERSECTION_CENTER_Y - 60, 3, 120))
     
     def draw_ui(self):
-        """Draw user interface elements"""
+        """Register user interface text (cached by value) with the renderer"""
         # Title
-        title = self.font.render("Manual Traffic Simulation", True, BLACK)
-        self.screen.blit(title, (20, 20))
+        title = RENDER_CACHE.text("Manual Traffic Simulation", 36, BLACK)
+        self.renderer.draw("ui_title", title, (20, 20))
         
         # Connection status
         status_color = GREEN if self.control_client.connected else RED
         status_text = "Connected" if self.control_client.connected else "Disconnected"
-        status = self.font.render(f"Dashboard: {status_text}", True, status_color)
-        self.screen.blit(status, (20, 60))
+        status = RENDER_CACHE.text(f"Dashboard: {status_text}", 36, status_color)
+        self.renderer.draw("ui_status", status, (20, 60))
         
         # Manual mode status
         mode_color = GREEN if self.control_client.manual_mode else GRAY
         mode_text = "ON" if self.control_client.manual_mode else "OFF"
-        mode = self.font.render(f"Manual Mode: {mode_text}", True, mode_color)
-        self.screen.blit(mode, (20, 100))
+        mode = RENDER_CACHE.text(f"Manual Mode: {mode_text}", 36, mode_color)
+        self.renderer.draw("ui_mode", mode, (20, 100))
         
         # Statistics
         stats = [
@@ -674,8 +727,8 @@ class ManualSimulation:
         ]
         
         for i, stat in enumerate(stats):
-            stat_surface = self.font.render(stat, True, BLACK)
-            self.screen.blit(stat_surface, (WINDOW_WIDTH - 300, 20 + i * 40))
+            stat_surface = RENDER_CACHE.text(stat, 36, BLACK)
+            self.renderer.draw(("ui_stat", i), stat_surface, (WINDOW_WIDTH - 300, 20 + i * 40))
         
         # Instructions
         instructions = [
@@ -688,10 +741,25 @@ class ManualSimulation:
             "Space: Spawn vehicle"
         ]
         
-        small_font = pygame.font.Font(None, 24)
         for i, instruction in enumerate(instructions):
-            inst_surface = small_font.render(instruction, True, BLACK)
-            self.screen.blit(inst_surface, (20, WINDOW_HEIGHT - 200 + i * 25))
+            inst_surface = RENDER_CACHE.text(instruction, 24, BLACK)
+            self.renderer.draw(("ui_instruction", i), inst_surface, (20, WINDOW_HEIGHT - 200 + i * 25))
+    
+    def render(self):
+        """Draw one frame"""
+        # Register everything with the renderer (background is restored only where needed)
+        for vehicle in self.vehicles:
+            vehicle.draw(self.renderer)
+        
+        # Draw traffic signals
+        for signal in self.signals.values():
+            signal.draw(self.renderer)
+        
+        # Draw UI
+        self.draw_ui()
+        
+        # Redraw and update only the regions that changed
+        self.renderer.present()
     
     def run(self):
         """Main simulation loop"""
@@ -711,24 +779,7 @@ class ManualSimulation:
             
             # Update simulation
             self.update_vehicles()
-            
-            # Draw everything
-            self.screen.fill(WHITE)
-            self.draw_intersection()
-            
-            # Draw vehicles
-            for vehicle in self.vehicles:
-                vehicle.draw(self.screen)
-            
-            # Draw traffic signals
-            for signal in self.signals.values():
-                signal.draw(self.screen)
-            
-            # Draw UI
-            self.draw_ui()
-            
-            # Update display
-            pygame.display.flip()
+            self.render()
             self.clock.tick(FPS)
             
             # Broadcast signal state periodically
@@ -1,6 +1,7 @@
-import time, argparse
+import os, time, argparse
 from pathlib import Path
 from common.ioutils import read_latest_json, write_json_atomic
+from common.tracing import tracer_from_env
 from controllers.rule_based import RuleBasedController
 from controllers.rl_agent import RLAgent
 from settings import config
@@ -8,11 +9,12 @@ import requests  # Add this import
 
 COUNTS_FILE = config["save_counts"]
 PLAN_FILE = config["plan_file"]
-BACKEND_URL = "http://localhost:5000"
+BACKEND_URL = os.environ.get("BACKEND_URL", "http://localhost:5050")
 
 def run(controller_type="rl"):
     controller = RuleBasedController() if controller_type == "rule" else RLAgent()
     print(f"✅ Controller running: {controller.__class__.__name__}")
+    tracer = tracer_from_env("orchestrator")
 
     while True:
         latest = read_latest_json(COUNTS_FILE)
@@ -21,14 +23,16 @@ def run(controller_type="rl"):
             continue
 
         lane_counts = latest["lane_counts"]
+        trace_id = latest.get("trace")
         plan = controller.decide(lane_counts)
-        write_json_atomic(PLAN_FILE, {"plan": plan})
+        tracer.stamp(trace_id, "plan", frame=latest.get("frame"))
+        write_json_atomic(PLAN_FILE, {"plan": plan, "trace": trace_id})
 
         print(f"🟢 New signal plan: {plan}")
 
         # Post event to Flask backend
         try:
-            event = {"timestamp": time.time(), "plan": plan, "lane_counts": lane_counts}
+            event = {"timestamp": time.time(), "plan": plan, "lane_counts": lane_counts, "trace": trace_id}
             requests.post(f"{BACKEND_URL}/events", json=event, timeout=1)
         except Exception as e:
             print(f"[WARN] Could not post event to backend: {e}")
@@ -0,0 +1,97 @@
+"""
+Incremental queue accounting for the signal simulation.
+
+Counters are updated in O(1) when a vehicle spawns, crosses the stop line or is
+retired, so readers (emergency detection, green time calculation, the on-screen
+crossed counts) never have to rescan the per-lane vehicle lists.
+"""
+
+import threading
+
+DIRECTIONS = ('right', 'down', 'left', 'up')
+LANES = (0, 1, 2)
+VEHICLE_CLASSES = ('car', 'bus', 'truck', 'rickshaw', 'bike', 'ambulance')
+
+
+class QueueCounters:
+    def __init__(self, directions=DIRECTIONS, lanes=LANES, vehicle_classes=VEHICLE_CLASSES):
+        self.directions = tuple(directions)
+        self.lanes = tuple(lanes)
+        self.vehicle_classes = tuple(vehicle_classes)
+        self._lock = threading.Lock()
+        # waiting[direction][lane][vehicleClass] -> vehicles that have not crossed yet
+        self._waiting = {
+            d: {lane: {c: 0 for c in self.vehicle_classes} for lane in self.lanes}
+            for d in self.directions
+        }
+        self._waiting_by_lane = {d: {lane: 0 for lane in self.lanes} for d in self.directions}
+        self._waiting_by_direction = {d: 0 for d in self.directions}
+        self._crossed_by_lane = {d: {lane: 0 for lane in self.lanes} for d in self.directions}
+        self._crossed_by_direction = {d: 0 for d in self.directions}
+        # ids of ambulances that are still waiting, per direction
+        self._ambulances_waiting = {d: set() for d in self.directions}
+
+    # --- event hooks -------------------------------------------------------
+    def on_spawn(self, vehicle):
+        """Register a newly spawned (waiting) vehicle"""
+        d, lane, vclass = vehicle.direction, vehicle.lane, vehicle.vehicleClass
+        with self._lock:
+            self._waiting[d][lane][vclass] += 1
+            self._waiting_by_lane[d][lane] += 1
+            self._waiting_by_direction[d] += 1
+            if vclass == 'ambulance':
+                self._ambulances_waiting[d].add(id(vehicle))
+
+    def on_cross(self, vehicle):
+        """Move a vehicle from waiting to crossed once it passes the stop line"""
+        d, lane, vclass = vehicle.direction, vehicle.lane, vehicle.vehicleClass
+        with self._lock:
+            self._waiting[d][lane][vclass] -= 1
+            self._waiting_by_lane[d][lane] -= 1
+            self._waiting_by_direction[d] -= 1
+            self._crossed_by_lane[d][lane] += 1
+            self._crossed_by_direction[d] += 1
+            if vclass == 'ambulance':
+                self._ambulances_waiting[d].discard(id(vehicle))
+
+    def on_retire(self, vehicle):
+        """Forget a vehicle that is removed before crossing (e.g. queue sync)"""
+        if vehicle.crossed:
+            return
+        d, lane, vclass = vehicle.direction, vehicle.lane, vehicle.vehicleClass
+        with self._lock:
+            self._waiting[d][lane][vclass] -= 1
+            self._waiting_by_lane[d][lane] -= 1
+            self._waiting_by_direction[d] -= 1
+            if vclass == 'ambulance':
+                self._ambulances_waiting[d].discard(id(vehicle))
+
+    # --- readers -----------------------------------------------------------
+    def waiting(self, direction, lane=None, vehicle_class=None):
+        """Number of vehicles that have not crossed the stop line yet"""
+        if lane is None:
+            if vehicle_class is None:
+                return self._waiting_by_direction[direction]
+            return sum(self._waiting[direction][ln][vehicle_class] for ln in self.lanes)
+        if vehicle_class is None:
+            return self._waiting_by_lane[direction][lane]
+        return self._waiting[direction][lane][vehicle_class]
+
+    def crossed(self, direction, lane=None):
+        """Number of vehicles that have crossed the stop line"""
+        if lane is None:
+            return self._crossed_by_direction[direction]
+        return self._crossed_by_lane[direction][lane]
+
+    def total_crossed(self):
+        return sum(self._crossed_by_direction.values())
+
+    def ambulances_waiting(self, direction):
+        return len(self._ambulances_waiting[direction])
+
+    def first_ambulance_direction(self):
+        """First direction (in signal order) with a waiting ambulance, or None"""
+        for d in self.directions:
+            if self._ambulances_waiting[d]:
+                return d
+        return None
@@ -0,0 +1,79 @@
+"""
+Render resource cache shared by the pygame views.
+
+Images, scaled/tinted sprite variants, fonts and rendered text are created once
+and reused, so per-frame drawing only blits surfaces that already exist.
+"""
+
+from collections import OrderedDict
+
+import pygame
+
+
+class RenderCache:
+    """Creates render resources on first use and keeps them for reuse"""
+
+    def __init__(self, max_text_entries=512):
+        self._images = {}
+        self._variants = {}
+        self._fonts = {}
+        self._text = OrderedDict()
+        self.max_text_entries = max_text_entries
+
+    def image(self, path):
+        """Load an image once; returns None (and warns once) if it cannot be loaded"""
+        if path not in self._images:
+            try:
+                self._images[path] = pygame.image.load(path)
+            except Exception as e:
+                print(f"⚠️ Could not load image {path}: {e}")
+                self._images[path] = None
+        return self._images[path]
+
+    def scaled(self, path, size):
+        """Image scaled to `size`, created once per (path, size)"""
+        key = ("scaled", path, tuple(size))
+        if key not in self._variants:
+            image = self.image(path)
+            self._variants[key] = pygame.transform.scale(image, size) if image else None
+        return self._variants[key]
+
+    def tinted(self, path, color):
+        """Image multiplied by `color` (e.g. darkened for stopped vehicles)"""
+        key = ("tinted", path, tuple(color))
+        if key not in self._variants:
+            image = self.image(path)
+            if image is None:
+                self._variants[key] = None
+            else:
+                tinted = image.copy()
+                tinted.fill(color, special_flags=pygame.BLEND_MULT)
+                self._variants[key] = tinted
+        return self._variants[key]
+
+    def get(self, key, factory):
+        """Generic cached resource: `factory()` is called once per key"""
+        if key not in self._variants:
+            self._variants[key] = factory()
+        return self._variants[key]
+
+    def font(self, size, name=None):
+        """Font object for (name, size), created once"""
+        key = (name, size)
+        if key not in self._fonts:
+            self._fonts[key] = pygame.font.Font(name, size)
+        return self._fonts[key]
+
+    def text(self, value, size, color, background=None, font_name=None):
+        """Rendered text surface cached by value (least recently used entries are evicted)"""
+        key = (str(value), size, color, background, font_name)
+        surface = self._text.get(key)
+        if surface is None:
+            font = self.font(size, font_name)
+            surface = font.render(key[0], True, color, background)
+            self._text[key] = surface
+            if len(self._text) > self.max_text_entries:
+                self._text.popitem(last=False)
+        else:
+            self._text.move_to_end(key)
+        return surface
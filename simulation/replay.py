@@ -0,0 +1,188 @@
+"""
+Compact binary record/replay log for simulation runs.
+
+A log starts with a header (magic, format version, RNG seed) followed by
+fixed-size records, each tagged with a kind byte and the simulated time:
+
+    S  vehicle spawn      (event seq, vehicle type, lane, direction number, will turn)
+    R  vehicle retired    (event seq, direction number, lane)
+    G  green decision     (signal index, green time chosen by the controller)
+    C  signal change      (from index, to index, reason)
+    P  provider input     (length-prefixed JSON payload from an external provider)
+
+Recording captures everything that is not derived from the simulation itself.
+Spawns and retirements carry the sequence number of the scheduler event they
+happened in, so a replay can put each one back on the scheduler at exactly that
+point, whatever the source (random, trace or queue-sync) and however many
+happen at the same time. Replaying feeds the recorded inputs back in and checks
+the signal decisions against the log, reporting the first point of divergence.
+"""
+
+import json
+import struct
+from collections import deque
+
+MAGIC = b"SIMR"
+VERSION = 2
+
+HEADER = struct.Struct("<4sHq")  # magic, version, seed
+RECORD = struct.Struct("<cd")  # kind, simulated time
+PAYLOADS = {
+    b"S": struct.Struct("<qBBBB"),  # event seq, vehicle type, lane, direction number, will turn
+    b"R": struct.Struct("<qBB"),  # event seq, direction number, lane
+    b"G": struct.Struct("<Bh"),  # signal index, green time
+    b"C": struct.Struct("<BBB"),  # from index, to index, reason
+}
+# Version 1 logs have no event seq; their spawns are replayed first among the events at their time
+V1_SPAWN = struct.Struct("<BBBB")
+LENGTH = struct.Struct("<I")  # provider payload length
+
+REASONS = ("normal_cycle", "emergency_preemption")
+
+
+class ReplayFormatError(Exception):
+    pass
+
+
+class ReplayRecorder:
+    """Appends records to a replay log; writes are buffered by the file object"""
+
+    def __init__(self, path, seed):
+        self.path = path
+        self.seed = seed
+        self.records = 0
+        self._file = open(path, "wb")
+        self._file.write(HEADER.pack(MAGIC, VERSION, seed))
+
+    def _write(self, kind, t, *values):
+        self._file.write(RECORD.pack(kind, t))
+        self._file.write(PAYLOADS[kind].pack(*values))
+        self.records += 1
+
+    def spawn(self, t, seq, vehicle_type, lane, direction_number, will_turn):
+        self._write(b"S", t, seq, vehicle_type, lane, direction_number, will_turn)
+
+    def retire(self, t, seq, direction_number, lane):
+        self._write(b"R", t, seq, direction_number, lane)
+
+    def green(self, t, signal_index, green_time):
+        self._write(b"G", t, signal_index, green_time)
+
+    def change(self, t, from_index, to_index, reason):
+        self._write(b"C", t, from_index, to_index, REASONS.index(reason))
+
+    def provider(self, t, payload):
+        if hasattr(payload, "to_payload"):
+            payload = payload.to_payload()  # count snapshots are stored in the dict schema
+        data = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        self._file.write(RECORD.pack(b"P", t))
+        self._file.write(LENGTH.pack(len(data)))
+        self._file.write(data)
+        self.records += 1
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+def read_log(path):
+    """Returns (seed, records) where each record is (kind, t, values)"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        raise ReplayFormatError(f"{path}: truncated header")
+    magic, version, seed = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ReplayFormatError(f"{path}: not a replay log")
+    if version not in (1, VERSION):
+        raise ReplayFormatError(f"{path}: unsupported version {version}")
+
+    records = []
+    offset = HEADER.size
+    while offset < len(data):
+        kind, t = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        if kind == b"P":
+            (length,) = LENGTH.unpack_from(data, offset)
+            offset += LENGTH.size
+            values = (json.loads(data[offset:offset + length].decode("utf-8")),)
+            offset += length
+        elif kind == b"S" and version == 1:
+            values = (-1,) + V1_SPAWN.unpack_from(data, offset)
+            offset += V1_SPAWN.size
+        elif kind in PAYLOADS:
+            values = PAYLOADS[kind].unpack_from(data, offset)
+            offset += PAYLOADS[kind].size
+        else:
+            raise ReplayFormatError(f"{path}: unknown record kind {kind!r} at byte {offset}")
+        records.append((kind, t, values))
+    return seed, records
+
+
+class ReplayPlayer:
+    """Serves recorded inputs back to the simulation and verifies its decisions"""
+
+    def __init__(self, path):
+        self.path = path
+        self.seed, records = read_log(path)
+        self.inputs = []
+        self.provider_inputs = deque()
+        self.decisions = deque()
+        for kind, t, values in records:
+            if kind in (b"S", b"R"):
+                self.inputs.append((kind, t, values))
+            elif kind == b"P":
+                self.provider_inputs.append((t, values[0]))
+            else:
+                self.decisions.append((kind, t, values))
+        self.has_provider_input = bool(self.provider_inputs)
+        self.inputs_replayed = 0
+        self.decisions_checked = 0
+        self.divergence = None
+
+    def schedule(self, scheduler, spawn, retire):
+        """Put every recorded spawn and retirement on the scheduler, right after the event it
+        happened in; `spawn(type, lane, direction number, will turn)`, `retire(direction number, lane)`"""
+        for kind, t, values in self.inputs:
+            callback = spawn if kind == b"S" else retire
+            scheduler.insert_after(t, values[0], self._replay, callback, values[1:])
+
+    def _replay(self, callback, values):
+        self.inputs_replayed += 1
+        callback(*values)
+
+    def next_provider_input(self, t):
+        if not self.provider_inputs:
+            self.diverge(t, "provider input", None)
+            return {}
+        return self.provider_inputs.popleft()[1]
+
+    def check_green(self, t, signal_index, green_time):
+        self._check(b"G", t, (signal_index, green_time))
+
+    def check_change(self, t, from_index, to_index, reason):
+        self._check(b"C", t, (from_index, to_index, REASONS.index(reason)))
+
+    def _check(self, kind, t, values):
+        actual = (kind, t, values)
+        expected = self.decisions.popleft() if self.decisions else None
+        if expected is not None and expected[0] == kind and abs(expected[1] - t) < 1e-9 \
+                and tuple(expected[2]) == values:
+            self.decisions_checked += 1
+            return
+        self.diverge(t, expected, actual)
+
+    def diverge(self, t, expected, actual):
+        if self.divergence is None:
+            self.divergence = {"t": t, "expected": expected, "actual": actual}
+            print(f"⚠️ Replay diverged at t={t:.3f}s: expected {expected}, got {actual}")
+
+    def summary(self):
+        missed = len(self.inputs) - self.inputs_replayed
+        if self.divergence is None and not self.decisions and not missed:
+            return f"✅ Replay matched all {self.decisions_checked} recorded decisions"
+        if self.divergence is None:
+            return (f"⚠️ Replay ended after {self.decisions_checked} matching decisions; "
+                    f"{len(self.decisions)} recorded decisions and {missed} recorded inputs were not reached")
+        return (f"⚠️ Replay diverged at t={self.divergence['t']:.3f}s after "
+                f"{self.decisions_checked} matching decisions")
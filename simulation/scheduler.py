@@ -0,0 +1,142 @@
+"""
+Deterministic event scheduler for the signal simulation.
+
+All simulation activity (signal phases, vehicle spawns, detection, movement
+steps) is expressed as timed events on a single priority queue keyed by
+simulated time. Events at the same time run in the order they were scheduled,
+so a run is reproducible. The clock can be paced against wall time at any
+speed factor (1.0 = real time) or run as fast as possible (speed 0).
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+
+
+class ScheduledEvent:
+    __slots__ = ("time", "seq", "callback", "args", "interval", "cancelled")
+
+    def __init__(self, time_, seq, callback, args, interval):
+        self.time = time_
+        self.seq = seq
+        self.callback = callback
+        self.args = args
+        self.interval = interval
+        self.cancelled = False
+
+    def __lt__(self, other):
+        return (self.time, self.seq) < (other.time, other.seq)
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class EventScheduler:
+    def __init__(self, speed=1.0):
+        self.now = 0.0  # simulated seconds since start
+        self.speed = float(speed)
+        self.running = True
+        self._queue = []
+        self._seq = itertools.count()
+        # Sequence number of the event being run (-1 outside events); replay logs record it so
+        # inputs can be put back at the same point among events due at the same time
+        self.current_seq = -1
+        self._inserted = {}
+        # Callbacks posted from other threads (e.g. Socket.IO handlers)
+        self._inbox = deque()
+        self._inbox_lock = threading.Lock()
+
+    def schedule(self, delay, callback, *args):
+        """Run `callback(*args)` once, `delay` simulated seconds from now"""
+        return self._push(self.now + delay, callback, args, None)
+
+    def every(self, interval, callback, *args, first=None):
+        """Run `callback(*args)` every `interval` seconds, first after `first` (default: interval)"""
+        delay = interval if first is None else first
+        return self._push(self.now + delay, callback, args, interval)
+
+    def insert_after(self, when, after_seq, callback, *args):
+        """Run `callback(*args)` once at `when`, right after the event numbered `after_seq`
+        (and after anything inserted there before); used to replay recorded inputs in place"""
+        count = self._inserted.get((when, after_seq), 0) + 1
+        self._inserted[(when, after_seq)] = count
+        event = ScheduledEvent(when, after_seq + count * 1e-6, callback, args, None)
+        heapq.heappush(self._queue, event)
+        return event
+
+    def call_soon_threadsafe(self, callback, *args):
+        """Queue a callback from another thread; it runs at the current simulated time"""
+        with self._inbox_lock:
+            self._inbox.append((callback, args))
+
+    def stop(self):
+        self.running = False
+
+    def _push(self, when, callback, args, interval):
+        event = ScheduledEvent(when, next(self._seq), callback, args, interval)
+        heapq.heappush(self._queue, event)
+        return event
+
+    def _drain_inbox(self):
+        if not self._inbox:
+            return
+        with self._inbox_lock:
+            pending = list(self._inbox)
+            self._inbox.clear()
+        for callback, args in pending:
+            self._push(self.now, callback, args, None)
+
+    def next_time(self):
+        """Simulated time of the next pending event, or None"""
+        while self._queue and self._queue[0].cancelled:
+            heapq.heappop(self._queue)
+        return self._queue[0].time if self._queue else None
+
+    def run_until(self, target):
+        """Process every event due at or before `target`, then advance the clock to it"""
+        self._drain_inbox()
+        while self.running:
+            when = self.next_time()
+            if when is None or when > target:
+                break
+            self._run_next()
+            self._drain_inbox()
+        if self.running and target > self.now:
+            self.now = target
+
+    def run(self, until=None):
+        """Run events until stopped, the queue empties or `until` is reached.
+
+        With speed > 0 the loop sleeps so that simulated time advances at
+        `speed` times wall-clock time; with speed 0 it runs as fast as possible.
+        """
+        start_wall = time.monotonic()
+        start_sim = self.now
+        while self.running:
+            self._drain_inbox()
+            when = self.next_time()
+            if when is None or (until is not None and when > until):
+                break
+            if self.speed > 0:
+                delay = start_wall + (when - start_sim) / self.speed - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            self._run_next()
+        if until is not None and self.running and until > self.now:
+            self.now = until
+
+    def _run_next(self):
+        event = heapq.heappop(self._queue)
+        self.now = event.time
+        self.current_seq = event.seq
+        if event.interval is not None:
+            # Reschedule from the planned time, not the execution time, so ticks never drift
+            event.time += event.interval
+            event.seq = next(self._seq)
+            heapq.heappush(self._queue, event)
+        try:
+            event.callback(*event.args)
+        finally:
+            self.current_seq = -1
@@ -10,6 +10,8 @@ import random
 import math
 import time
 import threading
+import subprocess
+import queue
 import json  # NEW: for structured event logs
 # from vehicle_detection import detection
 import pygame
@@ -77,10 +79,12 @@ speeds = {'car': 2.25, 'bus': 1.8, 'truck': 1.8, 'rickshaw': 2, 'bike': 2.5,
 x = {'right': [0, 0, 0], 'down': [755, 727, 697], 'left': [1400, 1400, 1400], 'up': [602, 627, 657]}
 y = {'right': [348, 370, 398], 'down': [0, 0, 0], 'left': [498, 466, 436], 'up': [800, 800, 800]}
 
-vehicles = {'right': {0: [], 1: [], 2: [], 'crossed': 0}, 'down': {0: [], 1: [], 2: [], 'crossed': 0},
-            'left': {0: [], 1: [], 2: [], 'crossed': 0}, 'up': {0: [], 1: [], 2: [], 'crossed': 0}}
+vehicles = {'right': {0: [], 1: [], 2: []}, 'down': {0: [], 1: [], 2: []},
+            'left': {0: [], 1: [], 2: []}, 'up': {0: [], 1: [], 2: []}}
 vehicleTypes = {0: 'car', 1: 'bus', 2: 'truck', 3: 'rickshaw', 4: 'bike', 5: 'ambulance'}  # NEW: ambulance
 directionNumbers = {0: 'right', 1: 'down', 2: 'left', 3: 'up'}
+vehicleTypeNumbers = {v: k for k, v in vehicleTypes.items()}
+directionIndex = {v: k for k, v in directionNumbers.items()}
 
 # Coordinates of signal image, timer, and vehicle count
 signalCoods = [(530, 230), (810, 230), (810, 570), (530, 570)]
@@ -112,9 +116,65 @@ def asset_path(*parts):
     return os.path.join(SCRIPT_DIR, *parts)
 
 
+if SCRIPT_DIR not in sys.path:
+    sys.path.insert(0, SCRIPT_DIR)
+from queue_counters import QueueCounters  # noqa: E402
+from render_cache import RenderCache  # noqa: E402
+from dirty_renderer import DirtyRectRenderer  # noqa: E402
+from frame_streamer import FrameStreamer  # noqa: E402
+from scheduler import EventScheduler  # noqa: E402
+from replay import ReplayPlayer, ReplayRecorder  # noqa: E402
+from trace_spawner import TraceSpawner  # noqa: E402
+
+# Waiting/crossed counters per direction, lane and class, updated on spawn/cross events
+queueCounters = QueueCounters(directions=[directionNumbers[i] for i in range(noOfSignals)],
+                              vehicle_classes=list(vehicleTypes.values()))
+
+# SIM_HEADLESS=1 runs without a window and without dashboard connections (manual control, event
+# posting); SIM_QUIET=1 silences the per-second status and event output.
+SIM_HEADLESS = os.environ.get("SIM_HEADLESS", "0") == "1"
+SIM_QUIET = os.environ.get("SIM_QUIET", "0") == "1"
+
+# Reproducible runs: SIM_SEED seeds the spawn generator. SIM_RECORD=<path> writes a binary log of
+# spawns, provider inputs and signal decisions; SIM_REPLAY=<path> re-runs such a log (as fast as
+# possible unless SIM_SPEED is set) and reports the first decision that differs from the recording.
+SIM_RECORD = os.environ.get("SIM_RECORD")
+SIM_REPLAY = os.environ.get("SIM_REPLAY")
+replayPlayer = ReplayPlayer(SIM_REPLAY) if SIM_REPLAY else None
+if replayPlayer is not None:
+    simSeed = replayPlayer.seed
+elif os.environ.get("SIM_SEED"):
+    simSeed = int(os.environ["SIM_SEED"])
+else:
+    simSeed = random.SystemRandom().randrange(2 ** 62)
+if not SIM_QUIET:
+    print(f"🎲 Simulation seed: {simSeed}")
+rng = random.Random(simSeed)
+replayRecorder = ReplayRecorder(SIM_RECORD, simSeed) if SIM_RECORD else None
+
+# Trace-driven demand: SIM_TRACE=<vehicle_counts.jsonl> spawns vehicles from recorded CV counts
+# (SIM_TRACE_SCALE trace seconds per simulated second, SIM_TRACE_FPS, SIM_TRACE_DWELL, SIM_TRACE_APPROACH)
+SIM_TRACE = os.environ.get("SIM_TRACE")
+traceSpawner = TraceSpawner.from_env(SIM_TRACE, rng, os.environ) if SIM_TRACE else None
+# Set to False when an external source (e.g. the CV queue-sync bridge) decides what spawns
+autoSpawn = True
+
+# Signal phases, spawns, detection and movement are timed events on one scheduler.
+# SIM_SPEED: 1 = real time, N = N x real time, 0 = as fast as possible.
+# SIM_FPS: movement steps per simulated second (vehicles move a fixed distance per step).
+SIM_SPEED = float(os.environ.get("SIM_SPEED", "0" if SIM_REPLAY else "1"))
+SIM_FPS = int(os.environ.get("SIM_FPS", "60"))
+stepInterval = 1.0 / SIM_FPS
+spawnInterval = 0.75
+scheduler = EventScheduler(speed=SIM_SPEED)
+
+
 # === NEW: Simple structured event logger for future dashboard integration ===
 class EventLogger:
     events = []  # store events in-memory for optional future use
+    # Events are posted by a background worker so the scheduler never waits on the network
+    outbox = queue.Queue()
+    worker = None
 
     @staticmethod
     def log(event_type, data=None):
@@ -126,12 +186,24 @@ class EventLogger:
             evt.update(data)
         EventLogger.events.append(evt)
         # Print out a structured log that a dashboard can consume later
-        print(json.dumps(evt))
+        if not SIM_QUIET:
+            print(json.dumps(evt))
         # NEW: Try to POST event to backend /events endpoint
+        if requests is not None and not SIM_HEADLESS:
+            if EventLogger.worker is None:
+                EventLogger.worker = threading.Thread(name="eventPoster", target=EventLogger.post_events,
+                                                      daemon=True)
+                EventLogger.worker.start()
+            EventLogger.outbox.put(evt)
+
+    @staticmethod
+    def post_events():
         EVENTS_URL = os.environ.get("EVENTS_URL", "http://localhost:5050/simulation/events")
-        if requests is not None:
+        session = requests.Session()
+        while True:
+            evt = EventLogger.outbox.get()
             try:
-                resp = requests.post(
+                resp = session.post(
                     EVENTS_URL,
                     json=evt,
                     timeout=0.5,
@@ -194,6 +266,14 @@ class ManualControlSystem:
         self.connected = False
     
     def on_manual_signal(self, data):
+        """Socket.IO thread: apply the signal change on the scheduler between events"""
+        scheduler.call_soon_threadsafe(self.apply_manual_signal, data)
+
+    def on_manual_mode_toggle(self, data):
+        """Socket.IO thread: apply the mode toggle on the scheduler between events"""
+        scheduler.call_soon_threadsafe(self.apply_manual_mode, data)
+
+    def apply_manual_signal(self, data):
         """Handle manual signal change from dashboard"""
         global signals, currentGreen, currentYellow, nextGreen, manual_mode_active
         
@@ -276,7 +356,7 @@ class ManualControlSystem:
         except Exception as e:
             print(f"❌ Error processing manual signal command: {e}")
     
-    def on_manual_mode_toggle(self, data):
+    def apply_manual_mode(self, data):
         """Handle manual mode toggle from dashboard"""
         global manual_mode_active
         
@@ -356,8 +436,8 @@ class ManualControlSystem:
                 return signal.red
         return 0
 
-# Initialize manual control system
-manual_control = ManualControlSystem()
+# Initialize manual control system (headless runs are not controlled from the dashboard)
+manual_control = ManualControlSystem() if not SIM_HEADLESS else None
 
 
 class TrafficSignal:
@@ -387,9 +467,10 @@ class Vehicle(pygame.sprite.Sprite):
         self.rotateAngle = 0
         # NEW (Anomaly detection): track last movement time/pos
         self.last_pos = (self.x, self.y)
-        self.last_moved_time = time.time()
+        self.last_moved_time = scheduler.now  # simulated clock, so anomaly timing holds at any speed
         self.anomaly_reported = False
         vehicles[direction][lane].append(self)
+        queueCounters.on_spawn(self)
         # self.stop = stops[direction][lane]
         self.index = len(vehicles[direction][lane]) - 1
         path = asset_path("images", direction, vehicleClass + ".png")
@@ -455,14 +536,14 @@ class Vehicle(pygame.sprite.Sprite):
             moved = (self.x, self.y) != self.last_pos
             if moved:
                 self.last_pos = (self.x, self.y)
-                self.last_moved_time = time.time()
+                self.last_moved_time = scheduler.now
             return moved
 
         if (self.direction == 'right'):
             if (self.crossed == 0 and self.x + self.currentImage.get_rect().width > stopLines[
                 self.direction]):  # if the image has crossed stop line now
                 self.crossed = 1
-                vehicles[self.direction]['crossed'] += 1
+                queueCounters.on_cross(self)
             if (self.willTurn == 1):
                 if (self.crossed == 0 or self.x + self.currentImage.get_rect().width < mid[self.direction]['x']):
                     if ((self.x + self.currentImage.get_rect().width <= self.stop or (
@@ -503,7 +584,7 @@ class Vehicle(pygame.sprite.Sprite):
         elif (self.direction == 'down'):
             if (self.crossed == 0 and self.y + self.currentImage.get_rect().height > stopLines[self.direction]):
                 self.crossed = 1
-                vehicles[self.direction]['crossed'] += 1
+                queueCounters.on_cross(self)
             if (self.willTurn == 1):
                 if (self.crossed == 0 or self.y + self.currentImage.get_rect().height < mid[self.direction]['y']):
                     if ((self.y + self.currentImage.get_rect().height <= self.stop or (
@@ -537,7 +618,7 @@ class Vehicle(pygame.sprite.Sprite):
         elif (self.direction == 'left'):
             if (self.crossed == 0 and self.x < stopLines[self.direction]):
                 self.crossed = 1
-                vehicles[self.direction]['crossed'] += 1
+                queueCounters.on_cross(self)
             if (self.willTurn == 1):
                 if (self.crossed == 0 or self.x > mid[self.direction]['x']):
                     if ((self.x >= self.stop or (currentGreen == 2 and currentYellow == 0) or self.crossed == 1) and (
@@ -577,7 +658,7 @@ class Vehicle(pygame.sprite.Sprite):
         elif (self.direction == 'up'):
             if (self.crossed == 0 and self.y < stopLines[self.direction]):
                 self.crossed = 1
-                vehicles[self.direction]['crossed'] += 1
+                queueCounters.on_cross(self)
             if (self.willTurn == 1):
                 if (self.crossed == 0 or self.y > mid[self.direction]['y']):
                     if ((self.y >= self.stop or (currentGreen == 3 and currentYellow == 0) or self.crossed == 1) and (
@@ -615,7 +696,7 @@ class Vehicle(pygame.sprite.Sprite):
                 self.index == 0 and self.crossed == 0 and currentYellow == 0 and directionNumbers[
             currentGreen] == self.direction
         ):
-            stopped_for = time.time() - self.last_moved_time
+            stopped_for = scheduler.now - self.last_moved_time
             if stopped_for >= 20 and not self.anomaly_reported:
                 self.anomaly_reported = True
                 EventLogger.log(
@@ -639,7 +720,6 @@ def initialize():
     signals.append(ts3)
     ts4 = TrafficSignal(defaultRed, defaultYellow, defaultGreen, defaultMinimum, defaultMaximum)
     signals.append(ts4)
-    repeat()
 
 
 # Set time according to formula
@@ -648,8 +728,9 @@ def setTime():
     global carTime, busTime, truckTime, rickshawTime, bikeTime
     # Optional text-to-speech notification (macOS only). Safe no-op elsewhere.
     try:
-        if sys.platform == "darwin":
-            os.system("say detecting vehicles, " + directionNumbers[(currentGreen + 1) % noOfSignals])
+        if sys.platform == "darwin" and not SIM_HEADLESS:
+            # Popen so the announcement does not block the scheduler
+            subprocess.Popen(["say", "detecting vehicles, " + directionNumbers[(currentGreen + 1) % noOfSignals]])
     except Exception:
         pass
     #    detection_result=detection(currentGreen,tfnet)
@@ -661,32 +742,22 @@ def setTime():
     # greenTime = len(vehicles[currentGreen][0])+len(vehicles[currentGreen][1])+len(vehicles[currentGreen][2])
     # noOfVehicles = len(vehicles[directionNumbers[nextGreen]][1])+len(vehicles[directionNumbers[nextGreen]][2])-vehicles[directionNumbers[nextGreen]]['crossed']
     # print("no. of vehicles = ",noOfVehicles)
-    noOfCars, noOfBuses, noOfTrucks, noOfRickshaws, noOfBikes = 0, 0, 0, 0, 0
-    for j in range(len(vehicles[directionNumbers[nextGreen]][0])):
-        vehicle = vehicles[directionNumbers[nextGreen]][0][j]
-        if (vehicle.crossed == 0):
-            vclass = vehicle.vehicleClass
-            # print(vclass)
-            noOfBikes += 1
-    for i in range(1, 3):
-        for j in range(len(vehicles[directionNumbers[nextGreen]][i])):
-            vehicle = vehicles[directionNumbers[nextGreen]][i][j]
-            if (vehicle.crossed == 0):
-                vclass = vehicle.vehicleClass
-                # print(vclass)
-                if (vclass == 'car'):
-                    noOfCars += 1
-                elif (vclass == 'bus'):
-                    noOfBuses += 1
-                elif (vclass == 'truck'):
-                    noOfTrucks += 1
-                elif (vclass == 'rickshaw'):
-                    noOfRickshaws += 1
+    # Waiting vehicles come from the incremental counters instead of walking the lanes.
+    # Lane 0 is the bike lane, so everything waiting there is counted as a bike.
+    direction = directionNumbers[nextGreen]
+    noOfBikes = queueCounters.waiting(direction, 0)
+    noOfCars = noOfBuses = noOfTrucks = noOfRickshaws = 0
+    for lane in (1, 2):
+        noOfCars += queueCounters.waiting(direction, lane, 'car')
+        noOfBuses += queueCounters.waiting(direction, lane, 'bus')
+        noOfTrucks += queueCounters.waiting(direction, lane, 'truck')
+        noOfRickshaws += queueCounters.waiting(direction, lane, 'rickshaw')
     # print(noOfCars)
     greenTime = math.ceil(((noOfCars * carTime) + (noOfRickshaws * rickshawTime) + (noOfBuses * busTime) + (
                 noOfTrucks * truckTime) + (noOfBikes * bikeTime)) / (noOfLanes + 1))
     # greenTime = math.ceil((noOfVehicles)/noOfLanes)
-    print('Green Time: ', greenTime)
+    if not SIM_QUIET:
+        print('Green Time: ', greenTime)
     if (greenTime < defaultMinimum):
         greenTime = defaultMinimum
     elif (greenTime > defaultMaximum):
@@ -698,17 +769,8 @@ def setTime():
 # === NEW: Emergency detection utility ===
 def check_and_update_emergency_state():
     global emergency_active, emergency_direction
-    found_dir = None
-    for d in ['right', 'down', 'left', 'up']:
-        # If any ambulance is waiting (not crossed) in any lane of this direction
-        waiting = any(
-            (v.vehicleClass == 'ambulance' and v.crossed == 0)
-            for lane in [0, 1, 2]
-            for v in vehicles[d][lane]
-        )
-        if waiting:
-            found_dir = d
-            break
+    # First direction (in signal order) with an ambulance that has not crossed yet
+    found_dir = queueCounters.first_ambulance_direction()
 
     if found_dir and not emergency_active:
         emergency_active = True
@@ -720,23 +782,9 @@ def check_and_update_emergency_state():
         emergency_direction = None
 
 
-def repeat():
-    global currentGreen, currentYellow, nextGreen
-    while (signals[currentGreen].green > 0):  # while the timer of current green signal is not zero
-        printStatus()
-        updateValues()
-        # NEW: Emergency preemption — force early end of current green to switch immediately
-        if emergency_active and directionNumbers[currentGreen] != emergency_direction:
-            # Immediately end current green (skip yellow later)
-            signals[currentGreen].green = 0
-            signals[currentGreen].yellow = 0
-            break
-        if (signals[(currentGreen + 1) % (noOfSignals)].red == detectionTime):  # set time of next green signal
-            thread = threading.Thread(name="detection", target=setTime, args=())
-            thread.daemon = True
-            thread.start()
-            # setTime()
-        time.sleep(1)
+def endGreen():
+    """Green time is over: turn on yellow, or skip it while an emergency preempts the signal"""
+    global currentYellow
     # If emergency is active, skip yellow and switch immediately
     if emergency_active:
         currentYellow = 0
@@ -748,11 +796,11 @@ def repeat():
         stops[directionNumbers[currentGreen]][i] = defaultStop[directionNumbers[currentGreen]]
         for vehicle in vehicles[directionNumbers[currentGreen]][i]:
             vehicle.stop = defaultStop[directionNumbers[currentGreen]]
-    if not emergency_active:
-        while (signals[currentGreen].yellow > 0):  # while the timer of current yellow signal is not zero
-            printStatus()
-            updateValues()
-            time.sleep(1)
+
+
+def switchGreen():
+    """Yellow is over (or skipped): reset the finished signal and give green to the next one"""
+    global currentGreen, currentYellow, nextGreen
     currentYellow = 0  # set yellow signal off
 
     # reset all signal times of current signal to default times
@@ -785,11 +833,77 @@ def repeat():
             "reason": reason,
         },
     )
-    repeat()
+    if replayRecorder is not None:
+        replayRecorder.change(scheduler.now, prev_dir_idx, currentGreen, reason)
+    if replayPlayer is not None:
+        replayPlayer.check_change(scheduler.now, prev_dir_idx, currentGreen, reason)
+
+
+def runDetection():
+    # Looked up at call time so a patched setTime (integrated_simulation) is used
+    setTime()
+    signalIndex = (currentGreen + 1) % noOfSignals
+    if replayRecorder is not None:
+        replayRecorder.green(scheduler.now, signalIndex, signals[signalIndex].green)
+    if replayPlayer is not None:
+        replayPlayer.check_green(scheduler.now, signalIndex, signals[signalIndex].green)
+
+
+def providerInput(fetch):
+    """Input from an external detection provider: recorded when recording, read back when replaying"""
+    if replayPlayer is not None:
+        return replayPlayer.next_provider_input(scheduler.now)
+    payload = fetch()
+    if replayRecorder is not None:
+        replayRecorder.provider(scheduler.now, payload)
+    return payload
+
+
+def finishReplay():
+    """Flush the recording and/or report how the replay compared with it"""
+    if replayRecorder is not None:
+        replayRecorder.close()
+        print(f"💾 Recorded {replayRecorder.records} replay records to {replayRecorder.path} (seed {simSeed})")
+    if replayPlayer is not None:
+        print(replayPlayer.summary())
+
+
+def signalTick():
+    """One second of signal control, scheduled every second.
+
+    Phase changes take no time, so a tick first applies any pending transitions
+    (green -> yellow -> next green) and then counts the active phase down by one
+    second. The loop is bounded: a full cycle has at most two transitions per signal.
+    """
+    for _ in range(2 * noOfSignals + 1):
+        if currentYellow == 0:
+            if signals[currentGreen].green > 0:  # the timer of current green signal is not zero
+                printStatus()
+                updateValues()
+                # NEW: Emergency preemption — force early end of current green to switch immediately
+                if emergency_active and directionNumbers[currentGreen] != emergency_direction:
+                    # Immediately end current green (skip yellow)
+                    signals[currentGreen].green = 0
+                    signals[currentGreen].yellow = 0
+                    continue
+                if (signals[(currentGreen + 1) % (noOfSignals)].red == detectionTime):  # set time of next green signal
+                    scheduler.schedule(0, runDetection)
+                return
+            endGreen()
+            if currentYellow == 0:  # yellow skipped during emergency preemption
+                switchGreen()
+        else:
+            if signals[currentGreen].yellow > 0:  # the timer of current yellow signal is not zero
+                printStatus()
+                updateValues()
+                return
+            switchGreen()
 
 
 # Print the signal timers on cmd
 def printStatus():
+    if SIM_QUIET:
+        return
     for i in range(0, noOfSignals):
         if (i == currentGreen):
             if (currentYellow == 0):
@@ -821,74 +935,157 @@ def updateValues():
 
 
 # Generating vehicles in the simulation
-def generateVehicles():
-    while (True):
-        # NEW: Occasionally spawn an ambulance with low probability
-        if random.random() < 0.01:
-            vehicle_type = 5  # ambulance
-        else:
-            vehicle_type = random.randint(0, 4)
-        if (vehicle_type == 4):
-            lane_number = 0
-        else:
-            lane_number = random.randint(0, 1) + 1
-        will_turn = 0
-        if (lane_number == 2):
-            temp = random.randint(0, 4)
-            if (temp <= 2):
-                will_turn = 1
-            elif (temp > 2):
-                will_turn = 0
-        temp = random.randint(0, 999)
+def generateVehicle():
+    """Spawn one random vehicle; scheduled every spawnInterval seconds"""
+    if replayPlayer is not None:
+        return  # recorded spawns are scheduled as events of their own, see startSimulation
+    if not autoSpawn:
+        return
+    if traceSpawner is not None:
+        for vehicleClass, lane_number, direction, will_turn in traceSpawner.arrivals(scheduler.now):
+            spawnVehicle(vehicleTypeNumbers[vehicleClass], lane_number, directionIndex[direction], will_turn)
+        return
+    # NEW: Occasionally spawn an ambulance with low probability
+    if rng.random() < 0.01:
+        vehicle_type = 5  # ambulance
+    else:
+        vehicle_type = rng.randint(0, 4)
+    if (vehicle_type == 4):
+        lane_number = 0
+    else:
+        lane_number = rng.randint(0, 1) + 1
+    will_turn = 0
+    if (lane_number == 2):
+        temp = rng.randint(0, 4)
+        if (temp <= 2):
+            will_turn = 1
+        elif (temp > 2):
+            will_turn = 0
+    temp = rng.randint(0, 999)
+    direction_number = 0
+    a = [400, 800, 900, 1000]
+    if (temp < a[0]):
         direction_number = 0
-        a = [400, 800, 900, 1000]
-        if (temp < a[0]):
-            direction_number = 0
-        elif (temp < a[1]):
-            direction_number = 1
-        elif (temp < a[2]):
-            direction_number = 2
-        elif (temp < a[3]):
-            direction_number = 3
-        v = Vehicle(lane_number, vehicleTypes[vehicle_type], direction_number, directionNumbers[direction_number],
-                    will_turn)
-        # NEW: On ambulance spawn, activate emergency and force immediate preemption
-        if vehicle_type == 5:
-            # Mark emergency state and force current green to end ASAP
-            global emergency_active, emergency_direction
-            emergency_active = True
-            emergency_direction = directionNumbers[direction_number]
-            EventLogger.log("ambulance_detected", {"direction": emergency_direction, "lane": lane_number})
-            signals[currentGreen].green = 0
-        time.sleep(0.75)
+    elif (temp < a[1]):
+        direction_number = 1
+    elif (temp < a[2]):
+        direction_number = 2
+    elif (temp < a[3]):
+        direction_number = 3
+    spawnVehicle(vehicle_type, lane_number, direction_number, will_turn)
+
+
+def spawnVehicle(vehicle_type, lane_number, direction_number, will_turn):
+    global emergency_active, emergency_direction
+    if replayRecorder is not None:
+        replayRecorder.spawn(scheduler.now, scheduler.current_seq, vehicle_type, lane_number, direction_number,
+                             will_turn)
+    Vehicle(lane_number, vehicleTypes[vehicle_type], direction_number, directionNumbers[direction_number],
+            will_turn)
+    # NEW: On ambulance spawn, activate emergency and force immediate preemption
+    if vehicle_type == 5:
+        # Mark emergency state and force current green to end ASAP
+        emergency_active = True
+        emergency_direction = directionNumbers[direction_number]
+        EventLogger.log("ambulance_detected", {"direction": emergency_direction, "lane": lane_number})
+        signals[currentGreen].green = 0
+
+
+def retireVehicle(vehicle):
+    """Remove the last vehicle queued in its lane, undoing the spawn offset it added"""
+    lane = vehicles[vehicle.direction][vehicle.lane]
+    if not lane or lane[-1] is not vehicle or vehicle.crossed:
+        return False
+    lane.pop()
+    if vehicle.direction in ('right', 'left'):
+        temp = vehicle.currentImage.get_rect().width + gap
+    else:
+        temp = vehicle.currentImage.get_rect().height + gap
+    if vehicle.direction in ('right', 'down'):
+        temp = -temp
+    if vehicle.direction in ('right', 'left'):
+        x[vehicle.direction][vehicle.lane] -= temp
+    else:
+        y[vehicle.direction][vehicle.lane] -= temp
+    stops[vehicle.direction][vehicle.lane] -= temp
+    simulation.remove(vehicle)
+    queueCounters.on_retire(vehicle)
+    if replayRecorder is not None:
+        replayRecorder.retire(scheduler.now, scheduler.current_seq, directionIndex[vehicle.direction], vehicle.lane)
+    return True
+
+
+def replayRetire(direction_number, lane_number):
+    """Replay a recorded retirement: the last vehicle queued in that lane is removed again"""
+    lane = vehicles[directionNumbers[direction_number]][lane_number]
+    if not lane or not retireVehicle(lane[-1]):
+        replayPlayer.diverge(scheduler.now, ("R", direction_number, lane_number), None)
 
 
 def simulationTime():
+    """Advance the elapsed-time counter; scheduled every second until simTime is reached"""
     global timeElapsed, simTime
-    while (True):
-        timeElapsed += 1
-        time.sleep(1)
-        if (timeElapsed == simTime):
+    timeElapsed += 1
+    if (timeElapsed == simTime):
+        if not SIM_QUIET:
             totalVehicles = 0
             print('Lane-wise Vehicle Counts')
             for i in range(noOfSignals):
-                print('Lane', i + 1, ':', vehicles[directionNumbers[i]]['crossed'])
-                totalVehicles += vehicles[directionNumbers[i]]['crossed']
+                print('Lane', i + 1, ':', queueCounters.crossed(directionNumbers[i]))
+                totalVehicles += queueCounters.crossed(directionNumbers[i])
             print('Total vehicles passed: ', totalVehicles)
             print('Total time passed: ', timeElapsed)
             print('No. of vehicles passed per unit time: ', (float(totalVehicles) / float(timeElapsed)))
-            os._exit(1)
+        finishReplay()
+        scheduler.stop()
 
 
-class Main:
-    thread4 = threading.Thread(name="simulationTime", target=simulationTime, args=())
-    thread4.daemon = True
-    thread4.start()
+# Crossed vehicles this far outside the window have left the intersection
+exitMargin = 200
+# Where exited vehicles are parked, far ahead in their lane's direction of travel, so the
+# gap checks of the vehicles behind them always pass
+exitPark = {'right': (10 ** 6, 10 ** 6), 'down': (-10 ** 6, 10 ** 6), 'left': (-10 ** 6, -10 ** 6),
+            'up': (10 ** 6, -10 ** 6)}
+
+
+def hasExited(vehicle):
+    return vehicle.crossed and (vehicle.x < -exitMargin or vehicle.x > 1400 + exitMargin
+                                or vehicle.y < -exitMargin or vehicle.y > 800 + exitMargin)
+
 
-    thread2 = threading.Thread(name="initialization", target=initialize, args=())  # initialization
-    thread2.daemon = True
-    thread2.start()
+def moveVehicles():
+    """One fixed movement step for every vehicle, plus the emergency check"""
+    # NEW: Check and update emergency state based on current vehicles
+    check_and_update_emergency_state()
+    exited = []
+    for vehicle in simulation:
+        vehicle.move()
+        if hasExited(vehicle):
+            exited.append(vehicle)
+    # Stop moving and drawing vehicles that have left, so step cost tracks vehicles on the road
+    for vehicle in exited:
+        simulation.remove(vehicle)
+        vehicle.x, vehicle.y = exitPark[vehicle.direction]
 
+
+def startSimulation():
+    """Set up the signals and register the periodic simulation events"""
+    initialize()
+    scheduler.every(1.0, signalTick, first=0.0)
+    scheduler.every(spawnInterval, generateVehicle, first=0.0)
+    scheduler.every(1.0, simulationTime)
+    scheduler.every(stepInterval, moveVehicles, first=0.0)
+    if replayPlayer is not None:
+        replayPlayer.schedule(scheduler, spawnVehicle, replayRetire)
+
+
+def runHeadless():
+    """Run the simulation without a window at SIM_SPEED (0 = as fast as possible)"""
+    startSimulation()
+    scheduler.run()
+
+
+class Main:
     # Colours
     black = (0, 0, 0)
     white = (255, 255, 255)
@@ -898,36 +1095,69 @@ class Main:
     screenHeight = 800
     screenSize = (screenWidth, screenHeight)
 
-    # Setting background image i.e. image of intersection
-    background = pygame.image.load(asset_path('images', 'mod_int.png'))
-
-    screen = pygame.display.set_mode(screenSize)
-    pygame.display.set_caption("SIMULATION")
-
-    # Loading signal images and font
-    redSignal = pygame.image.load(asset_path('images', 'signals', 'red.png'))
-    yellowSignal = pygame.image.load(asset_path('images', 'signals', 'yellow.png'))
-    greenSignal = pygame.image.load(asset_path('images', 'signals', 'green.png'))
-    font = pygame.font.Font(None, 30)
+    # Frames drawn per second of wall time; the simulation itself advances on the scheduler
+    renderFps = 60
+
+    # Signal states go to the dashboard when they change, or at this interval as a heartbeat
+    signalHeartbeat = 1.0
+
+    def __init__(self, run=True):
+        startSimulation()
+
+        # Setting background image i.e. image of intersection
+        self.background = pygame.image.load(asset_path('images', 'mod_int.png'))
+
+        self.screen = pygame.display.set_mode(self.screenSize)
+        pygame.display.set_caption("SIMULATION")
+
+        # Loading signal images; text surfaces are cached by value in the render cache
+        self.renderCache = RenderCache()
+        self.redSignal = self.renderCache.image(asset_path('images', 'signals', 'red.png'))
+        self.yellowSignal = self.renderCache.image(asset_path('images', 'signals', 'yellow.png'))
+        self.greenSignal = self.renderCache.image(asset_path('images', 'signals', 'green.png'))
+        self.fontSize = 30
+
+        # Only regions whose sprite or text changed are redrawn and pushed to the display
+        self.renderer = DirtyRectRenderer(self.screen, self.background)
+        self.lastSignalState = None
+        self.lastSignalBroadcast = 0.0
+
+        # Frame streaming config (optional): FRAMES_URL, FRAME_FORMAT (jpeg|webp), FRAME_QUALITY,
+        # FRAME_SCALE and FRAME_POST_INTERVAL (seconds). Encoding and posting run off the render thread.
+        POST_FRAMES = os.environ.get("POST_FRAMES", "0") == "1"
+        self.frameStreamer = FrameStreamer.from_env("http://localhost:5000/simulation/frame") if POST_FRAMES else None
+
+        # run=False sets up the window without entering the loop (benchmarks drive draw() themselves)
+        if run:
+            self.run()
+
+    def run(self):
+        clock = pygame.time.Clock()
+        startWall = time.monotonic()
+        while scheduler.running:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    finishReplay()
+                    sys.exit()
+
+            # Catch the simulated clock up with wall time (scaled by SIM_SPEED); with speed 0
+            # every rendered frame advances the simulation by one movement step.
+            if scheduler.speed > 0:
+                scheduler.run_until((time.monotonic() - startWall) * scheduler.speed)
+            else:
+                scheduler.run_until(scheduler.now + stepInterval)
 
-    thread3 = threading.Thread(name="generateVehicles", target=generateVehicles, args=())  # Generating vehicles
-    thread3.daemon = True
-    thread3.start()
+            self.draw()
 
-    # Frame streaming config (optional)
-    POST_FRAMES = os.environ.get("POST_FRAMES", "0") == "1"
-    FRAMES_URL = os.environ.get("FRAMES_URL", "http://localhost:5000/simulation/frame")
-    FRAME_POST_INTERVAL = float(os.environ.get("FRAME_POST_INTERVAL", "0.5"))  # seconds
-    last_frame_post = 0.0
+            # NEW: Optionally hand the current frame to the background streamer (latest frame wins)
+            if self.frameStreamer is not None:
+                self.frameStreamer.submit(self.screen)
 
-    while True:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                sys.exit()
+            clock.tick(self.renderFps if scheduler.speed > 0 else 0)
+        os._exit(1)
 
-        screen.blit(background, (0, 0))  # display background in simulation
-        # NEW: Check and update emergency state based on current vehicles
-        check_and_update_emergency_state()
+    def draw(self):
+        renderer = self.renderer
         for i in range(0,
                        noOfSignals):  # display signal and set timer according to current status: green, yello, or red
             if (i == currentGreen):
@@ -936,13 +1166,13 @@ class Main:
                         signals[i].signalText = "STOP"
                     else:
                         signals[i].signalText = signals[i].yellow
-                    screen.blit(yellowSignal, signalCoods[i])
+                    renderer.draw(('signal', i), self.yellowSignal, signalCoods[i])
                 else:
                     if (signals[i].green == 0):
                         signals[i].signalText = "SLOW"
                     else:
                         signals[i].signalText = signals[i].green
-                    screen.blit(greenSignal, signalCoods[i])
+                    renderer.draw(('signal', i), self.greenSignal, signalCoods[i])
             else:
                 if (signals[i].red <= 10):
                     if (signals[i].red == 0):
@@ -951,26 +1181,24 @@ class Main:
                         signals[i].signalText = signals[i].red
                 else:
                     signals[i].signalText = "---"
-                screen.blit(redSignal, signalCoods[i])
-        signalTexts = ["", "", "", ""]
+                renderer.draw(('signal', i), self.redSignal, signalCoods[i])
 
         # display signal timer and vehicle count
         for i in range(0, noOfSignals):
-            signalTexts[i] = font.render(str(signals[i].signalText), True, white, black)
-            screen.blit(signalTexts[i], signalTimerCoods[i])
-            displayText = vehicles[directionNumbers[i]]['crossed']
-            vehicleCountTexts[i] = font.render(str(displayText), True, black, white)
-            screen.blit(vehicleCountTexts[i], vehicleCountCoods[i])
+            signalText = self.renderCache.text(signals[i].signalText, self.fontSize, self.white, self.black)
+            renderer.draw(('signal_timer', i), signalText, signalTimerCoods[i])
+            displayText = queueCounters.crossed(directionNumbers[i])
+            vehicleCountText = self.renderCache.text(displayText, self.fontSize, self.black, self.white)
+            renderer.draw(('vehicle_count', i), vehicleCountText, vehicleCountCoods[i])
 
-        timeElapsedText = font.render(("Time Elapsed: " + str(timeElapsed)), True, black, white)
-        screen.blit(timeElapsedText, (1100, 50))
+        timeElapsedText = self.renderCache.text("Time Elapsed: " + str(timeElapsed), self.fontSize, self.black,
+                                                self.white)
+        renderer.draw('time_elapsed', timeElapsedText, (1100, 50))
 
-        # display the vehicles
+        # display the vehicles (movement happens in the scheduled moveVehicles step)
         for vehicle in simulation:
-            screen.blit(vehicle.currentImage, [vehicle.x, vehicle.y])
-            # vehicle.render(screen)
-            vehicle.move()
-        
+            renderer.draw(vehicle, vehicle.currentImage, (vehicle.x, vehicle.y))
+
         # Broadcast current signal states
         if manual_control and manual_control.socket_client and manual_control.socket_client.connected:
             try:
@@ -984,40 +1212,19 @@ class Main:
                     },
                     'manual_mode': manual_control.manual_mode
                 }
-                manual_control.socket_client.emit('signal_state_update', current_signals)
+                now = time.monotonic()
+                if current_signals != self.lastSignalState or now - self.lastSignalBroadcast >= self.signalHeartbeat:
+                    manual_control.socket_client.emit('signal_state_update', current_signals)
+                    self.lastSignalState = current_signals
+                    self.lastSignalBroadcast = now
             except Exception as e:
                 print(f"Error broadcasting signal state: {e}")
-        
-        pygame.display.update()
 
-        # NEW: Optionally post current frame to Dashboard backend, fallback to /tmp/sim_frame.png
-        if POST_FRAMES:
-            now_ts = time.time()
-            if now_ts - last_frame_post >= FRAME_POST_INTERVAL:
-                tmp_path = os.path.join(tempfile.gettempdir(), "sim_frame.png")
-                try:
-                    pygame.image.save(screen, tmp_path)
-                    if requests is not None:
-                        with open(tmp_path, "rb") as f:
-                            data = f.read()
-                        try:
-                            resp = requests.post(
-                                FRAMES_URL,
-                                data=data,
-                                headers={"Content-Type": "application/octet-stream"},
-                                timeout=0.5,
-                            )
-                            if resp.status_code != 200:
-                                raise Exception("Non-200 response")
-                        except Exception:
-                            # Fallback: frame is already saved to tmp_path
-                            pass
-                except Exception:
-                    pass
-                finally:
-                    last_frame_post = now_ts
-
-
-Main()
+        renderer.present()
 
 
+if __name__ == "__main__":
+    if SIM_HEADLESS:
+        runHeadless()
+    else:
+        Main()
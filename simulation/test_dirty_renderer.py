@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test script for the dirty-rectangle renderer
+Runs on SDL's dummy video driver - no window needed
+"""
+
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pygame  # noqa: E402
+
+from dirty_renderer import DirtyRectRenderer  # noqa: E402
+
+
+def solid(color, size):
+    surface = pygame.Surface(size)
+    surface.fill(color)
+    return surface
+
+
+def test_redraw_keeps_z_order_outside_the_dirty_region():
+    pygame.display.init()
+    try:
+        screen = pygame.display.set_mode((100, 100))
+        renderer = DirtyRectRenderer(screen, solid((0, 0, 0), (100, 100)))
+        red, blue, green = solid((255, 0, 0), (40, 40)), solid((0, 0, 255), (40, 40)), solid((0, 255, 0), (10, 10))
+
+        # red sits under blue where they overlap (20..40, 20..40)
+        renderer.draw("red", red, (0, 0))
+        renderer.draw("blue", blue, (20, 20))
+        renderer.present()
+        assert screen.get_at((30, 30))[:3] == (0, 0, 255)
+
+        # only the green marker moves; it touches red but not the overlap
+        renderer.draw("red", red, (0, 0))
+        renderer.draw("blue", blue, (20, 20))
+        renderer.draw("green", green, (0, 0))
+        dirty = renderer.present()
+        assert dirty == [pygame.Rect(0, 0, 10, 10)]
+        assert screen.get_at((30, 30))[:3] == (0, 0, 255)
+        assert screen.get_at((5, 5))[:3] == (0, 255, 0)
+        assert screen.get_at((15, 15))[:3] == (255, 0, 0)
+
+        # green moves onto the overlap: red is restored under blue, not over it
+        renderer.draw("red", red, (0, 0))
+        renderer.draw("blue", blue, (20, 20))
+        renderer.draw("green", green, (25, 25))
+        renderer.present()
+        renderer.draw("red", red, (0, 0))
+        renderer.draw("blue", blue, (20, 20))
+        renderer.present()
+        assert screen.get_at((30, 30))[:3] == (0, 0, 255)
+        assert screen.get_at((5, 5))[:3] == (255, 0, 0)
+    finally:
+        pygame.display.quit()
+
+
+if __name__ == "__main__":
+    test_redraw_keeps_z_order_outside_the_dirty_region()
+    print("✅ Dirty renderer tests passed")
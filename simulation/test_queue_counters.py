@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test script for the incremental queue counters used by simulation.py
+Runs without pygame - vehicles are stand-in objects
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from queue_counters import QueueCounters
+
+
+class FakeVehicle:
+    def __init__(self, direction, lane, vehicleClass):
+        self.direction = direction
+        self.lane = lane
+        self.vehicleClass = vehicleClass
+        self.crossed = 0
+
+
+def test_spawn_and_cross_counts():
+    counters = QueueCounters()
+    car = FakeVehicle('right', 1, 'car')
+    bike = FakeVehicle('right', 0, 'bike')
+    bus = FakeVehicle('down', 2, 'bus')
+    for v in (car, bike, bus):
+        counters.on_spawn(v)
+
+    assert counters.waiting('right') == 2
+    assert counters.waiting('right', 1) == 1
+    assert counters.waiting('right', 1, 'car') == 1
+    assert counters.waiting('down', vehicle_class='bus') == 1
+
+    car.crossed = 1
+    counters.on_cross(car)
+    assert counters.waiting('right') == 1
+    assert counters.crossed('right') == 1
+    assert counters.crossed('right', 1) == 1
+    assert counters.total_crossed() == 1
+
+
+def test_ambulance_waiting_set():
+    counters = QueueCounters()
+    assert counters.first_ambulance_direction() is None
+
+    amb_left = FakeVehicle('left', 1, 'ambulance')
+    amb_down = FakeVehicle('down', 2, 'ambulance')
+    counters.on_spawn(amb_left)
+    counters.on_spawn(amb_down)
+    # Directions are checked in signal order: right, down, left, up
+    assert counters.first_ambulance_direction() == 'down'
+    assert counters.ambulances_waiting('left') == 1
+
+    amb_down.crossed = 1
+    counters.on_cross(amb_down)
+    assert counters.first_ambulance_direction() == 'left'
+
+    counters.on_retire(amb_left)
+    assert counters.first_ambulance_direction() is None
+    assert counters.waiting('left') == 0
+
+
+if __name__ == "__main__":
+    test_spawn_and_cross_counts()
+    test_ambulance_waiting_set()
+    print("✅ Queue counter tests passed")
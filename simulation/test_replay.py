@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Test script for the binary record/replay log used by simulation.py
+Runs without pygame - records are written and read back directly
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from replay import ReplayFormatError, ReplayPlayer, ReplayRecorder, read_log
+from scheduler import EventScheduler
+
+
+def record_sample(path):
+    recorder = ReplayRecorder(path, seed=1234)
+    recorder.spawn(0.0, 1, 0, 1, 2, 0)
+    recorder.spawn(0.75, 4, 5, 2, 1, 1)
+    recorder.provider(15.0, {'counts': {'down': {'lane0': 2, 'lane1': 3}}})
+    recorder.green(15.0, 1, 14)
+    recorder.change(20.0, 0, 1, 'normal_cycle')
+    recorder.close()
+    return recorder
+
+
+def test_round_trip():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'run.simr')
+        recorder = record_sample(path)
+        assert recorder.records == 5
+
+        seed, records = read_log(path)
+        assert seed == 1234
+        assert [r[0] for r in records] == [b'S', b'S', b'P', b'G', b'C']
+        assert records[1] == (b'S', 0.75, (4, 5, 2, 1, 1))
+        assert records[2][2][0]['counts']['down']['lane1'] == 3
+
+
+def test_player_serves_inputs_and_matches_decisions():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'run.simr')
+        record_sample(path)
+        player = ReplayPlayer(path)
+
+        assert player.seed == 1234
+        spawned = []
+        scheduler = EventScheduler(speed=0)
+        player.schedule(scheduler, lambda *values: spawned.append((scheduler.now, values)), None)
+        scheduler.run()
+        assert spawned == [(0.0, (0, 1, 2, 0)), (0.75, (5, 2, 1, 1))]
+        assert player.has_provider_input
+        assert player.next_provider_input(15.0) == {'counts': {'down': {'lane0': 2, 'lane1': 3}}}
+
+        player.check_green(15.0, 1, 14)
+        player.check_change(20.0, 0, 1, 'normal_cycle')
+        assert player.divergence is None
+        assert player.decisions_checked == 2
+        assert player.summary().startswith('✅')
+
+
+def drive(scheduler, spawn, retire, replaying):
+    """Periodic and one-shot events that spawn in bursts and off the spawn grid, logging the order of everything"""
+    log = []
+
+    def tick(name, count):
+        log.append((scheduler.now, name))
+        if not replaying:
+            for i in range(count):
+                spawn(i, 1, count % 4, 0)
+
+    def drop():
+        log.append((scheduler.now, 'drop'))
+        if not replaying:
+            retire(2, 1)
+
+    scheduler.every(1.0, tick, 'second', 3, first=0.0)  # three spawns at the same instant
+    scheduler.every(0.75, tick, 'grid', 0, first=0.0)
+    scheduler.schedule(0.4, tick, 'burst', 2)  # off the 0.75 s grid
+    scheduler.every(1.0, drop, first=2.3)
+    return log
+
+
+def test_replay_puts_inputs_back_where_they_happened():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'run.simr')
+        recorder = ReplayRecorder(path, seed=7)
+        scheduler = EventScheduler(speed=0)
+
+        def spawn(*values):
+            recorder.spawn(scheduler.now, scheduler.current_seq, *values)
+            log.append((scheduler.now, 'spawn', values))
+
+        def retire(*values):
+            recorder.retire(scheduler.now, scheduler.current_seq, *values)
+            log.append((scheduler.now, 'retired', values))
+
+        log = drive(scheduler, spawn, retire, replaying=False)
+        scheduler.run(until=4.0)
+        recorder.close()
+
+        player = ReplayPlayer(path)
+        scheduler = EventScheduler(speed=0)
+        replayed = drive(scheduler, None, None, replaying=True)
+        player.schedule(scheduler, lambda *values: replayed.append((scheduler.now, 'spawn', values)),
+                        lambda *values: replayed.append((scheduler.now, 'retired', values)))
+        scheduler.run(until=4.0)
+
+        assert replayed == log
+        assert sum(1 for entry in log if entry[0] == 1.0 and entry[1] == 'spawn') == 3
+        assert (0.4, 'spawn', (1, 1, 2, 0)) in log
+        assert (2.3, 'retired', (2, 1)) in log
+        assert player.inputs_replayed == len(player.inputs) == recorder.records
+
+
+def test_player_reports_first_divergence():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'run.simr')
+        record_sample(path)
+        player = ReplayPlayer(path)
+
+        player.check_green(15.0, 1, 20)  # controller chose a different green time
+        player.check_change(21.0, 0, 1, 'normal_cycle')
+        assert player.divergence['t'] == 15.0
+        assert player.divergence['expected'] == (b'G', 15.0, (1, 14))
+        assert player.decisions_checked == 0
+
+
+def test_rejects_other_files():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'not_a_log.bin')
+        with open(path, 'wb') as f:
+            f.write(b'hello world, definitely not a log')
+        try:
+            read_log(path)
+        except ReplayFormatError:
+            pass
+        else:
+            raise AssertionError('expected ReplayFormatError')
+
+
+if __name__ == "__main__":
+    test_round_trip()
+    test_player_serves_inputs_and_matches_decisions()
+    test_replay_puts_inputs_back_where_they_happened()
+    test_player_reports_first_divergence()
+    test_rejects_other_files()
+    print("✅ Replay tests passed")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test script for the event scheduler that drives simulation.py
+Runs without pygame - callbacks just record when they fired
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from scheduler import EventScheduler
+
+
+def test_events_run_in_time_then_schedule_order():
+    scheduler = EventScheduler(speed=0)
+    fired = []
+    scheduler.every(1.0, lambda: fired.append(('tick', scheduler.now)), first=0.0)
+    scheduler.every(0.75, lambda: fired.append(('spawn', scheduler.now)), first=0.0)
+    scheduler.schedule(1.5, lambda: fired.append(('once', scheduler.now)))
+    scheduler.run(until=2.0)
+
+    assert fired == [
+        ('tick', 0.0), ('spawn', 0.0), ('spawn', 0.75), ('tick', 1.0),
+        ('once', 1.5), ('spawn', 1.5), ('tick', 2.0),
+    ]
+    assert scheduler.now == 2.0
+
+
+def test_run_until_and_stop():
+    scheduler = EventScheduler(speed=0)
+    ticks = []
+
+    def tick():
+        ticks.append(scheduler.now)
+        if len(ticks) == 3:
+            scheduler.stop()
+
+    scheduler.every(0.5, tick)
+    scheduler.run_until(0.9)
+    assert ticks == [0.5]
+    assert scheduler.now == 0.9
+
+    scheduler.run()
+    assert ticks == [0.5, 1.0, 1.5]
+    assert not scheduler.running
+
+
+def test_cancel_and_threadsafe_post():
+    scheduler = EventScheduler(speed=0)
+    fired = []
+    event = scheduler.schedule(1.0, lambda: fired.append('cancelled'))
+    event.cancel()
+    worker = threading.Thread(target=scheduler.call_soon_threadsafe, args=(fired.append, 'posted'))
+    worker.start()
+    worker.join()
+    scheduler.run_until(2.0)
+    assert fired == ['posted']
+
+
+def test_speed_paces_against_wall_clock():
+    scheduler = EventScheduler(speed=10.0)
+    scheduler.schedule(1.0, lambda: None)
+    start = time.monotonic()
+    scheduler.run()
+    elapsed = time.monotonic() - start
+    assert 0.08 <= elapsed < 1.0  # 1 simulated second at 10x real time
+
+
+if __name__ == "__main__":
+    test_events_run_in_time_then_schedule_order()
+    test_run_until_and_stop()
+    test_cancel_and_threadsafe_post()
+    test_speed_paces_against_wall_clock()
+    print("✅ Scheduler tests passed")
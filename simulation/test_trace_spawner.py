@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test script for the trace-driven spawner used by simulation.py
+Runs without pygame - a small vehicle_counts.jsonl trace is written to a temp dir
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from trace_spawner import TraceSpawner
+
+
+def write_trace(path, records):
+    with open(path, 'w') as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+def run(spawner, until, step=0.75):
+    arrivals = []
+    t = 0.0
+    while t <= until:
+        arrivals.extend(spawner.arrivals(t))
+        t += step
+    return arrivals
+
+
+def test_littles_law_rate_and_lane_mapping():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'vehicle_counts.jsonl')
+        # 8 vehicles in view for 60 s of video at 30 fps (one sample per second)
+        write_trace(path, [{"frame": i * 30, "lane_counts": {"lane_2": 6, "lane_3": 2},
+                            "vehicle_counts": {"car": 3, "tempo": 1}} for i in range(61)])
+        spawner = TraceSpawner(path, random.Random(7), dwell=4.0)
+        arrivals = run(spawner, 40.0)
+
+        # lambda = N / dwell = 2 vehicles/s
+        assert 75 <= len(arrivals) <= 81
+        assert {a[2] for a in arrivals} == {'right'}
+        assert {a[0] for a in arrivals} <= {'car', 'truck'}
+        assert {a[1] for a in arrivals} <= {1, 2}
+        # the file is streamed: only samples up to the current trace time have been read
+        assert spawner.samples_read <= 43
+
+
+def test_interpolation_time_scale_and_end_of_trace():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'detections.jsonl')
+        write_trace(path, [
+            {"ts": 1000.0, "approach": "down", "lane_counts": {"lane_1": 0}},
+            {"ts": 1100.0, "approach": "down", "lane_counts": {"lane_1": 20}},
+            {"ts": 1200.0, "approach": "down", "lane_counts": {"lane_1": 20}},
+        ])
+        # 10 trace seconds per simulated second: the 200 s trace lasts 20 s
+        spawner = TraceSpawner(path, random.Random(1), time_scale=10.0, dwell=10.0)
+        first_half = run(spawner, 9.75)
+        # ramps linearly from 0 to 2 vehicles per trace second: ~100 arrivals
+        assert 90 <= len(first_half) <= 105
+        assert all(a[2] == 'down' for a in first_half)
+        assert all(a[1] == 0 for a in first_half if a[0] == 'bike')
+
+        run(spawner, 25.0)
+        assert spawner.finished
+        assert spawner.arrivals(30.0) == []
+
+
+if __name__ == "__main__":
+    test_littles_law_rate_and_lane_mapping()
+    test_interpolation_time_scale_and_end_of_trace()
+    print("✅ Trace spawner tests passed")
@@ -0,0 +1,185 @@
+"""
+Trace-driven vehicle spawner for the signal simulation.
+
+Replays demand recorded by the CV pipeline (ai_module/vehicle_counts.jsonl or
+any detection log with the same shape) instead of drawing from fixed
+distributions. The file is streamed line by line, so a full recorded day never
+has to fit in memory: only the samples around the current trace time are kept.
+
+Each line is a JSON object such as
+    {"frame": 120, "lane_counts": {"lane_1": 2, "lane_2": 5}}
+with optional keys:
+    "ts"/"timestamp"   sample time in seconds (otherwise frame / fps)
+    "approach"         simulation direction the camera watches (default 'right')
+    "vehicle_counts"   per-class counts used as the class mix
+
+Counts are vehicles in view, not arrivals. By Little's law (N = lambda * W) an
+approach holding N vehicles that each stay about `dwell` seconds in view is fed
+at lambda = N / dwell vehicles per second. Counts are linearly interpolated
+between samples and fractional arrivals carry over between ticks.
+"""
+
+import json
+from datetime import datetime
+
+DIRECTIONS = ('right', 'down', 'left', 'up')
+
+# CV (Indian traffic) classes -> simulation vehicle classes
+CLASS_MAP = {
+    'car': 'car',
+    'bus': 'bus',
+    'truck': 'truck',
+    'tempo': 'truck',
+    'auto_rickshaw': 'rickshaw',
+    'motorcycle': 'bike',
+    'bicycle': 'bike',
+}
+# Used when a sample carries no class breakdown (same as the random generator)
+DEFAULT_MIX = {'car': 1, 'bus': 1, 'truck': 1, 'rickshaw': 1, 'bike': 1}
+
+
+def _sample_time(record, fps):
+    for key in ('ts', 'timestamp'):
+        value = record.get(key)
+        if isinstance(value, (int, float)):
+            return float(value)
+        if isinstance(value, str):
+            try:
+                return datetime.fromisoformat(value).timestamp()
+            except ValueError:
+                pass
+    if 'frame' in record:
+        return float(record['frame']) / fps
+    return None
+
+
+def _lane_totals(lane_counts):
+    """CV lanes -> simulation lanes, as in bridge_provider: lane_1 -> 0, lane_2 -> 1, the rest -> 2"""
+    totals = [0.0, 0.0, 0.0]
+    for name, count in lane_counts.items():
+        try:
+            index = int(str(name).rsplit('_', 1)[-1])
+        except ValueError:
+            continue
+        totals[min(max(index, 1), 3) - 1] += float(count)
+    return totals
+
+
+def _class_mix(record):
+    mix = {}
+    for cv_class, count in (record.get('vehicle_counts') or {}).items():
+        sim_class = CLASS_MAP.get(cv_class)
+        if sim_class and count:
+            mix[sim_class] = mix.get(sim_class, 0) + float(count)
+    return mix or DEFAULT_MIX
+
+
+class TraceSpawner:
+    def __init__(self, path, rng, time_scale=1.0, fps=30.0, dwell=4.0, default_direction='right'):
+        self.path = path
+        self.rng = rng
+        self.time_scale = float(time_scale)  # trace seconds per simulated second
+        self.fps = float(fps)
+        self.dwell = float(dwell)
+        self.default_direction = default_direction
+        self.finished = False
+        self.samples_read = 0
+
+        self._file = open(path, 'r', encoding='utf-8')
+        self._origin = None
+        self._lookahead = self._read_sample()
+        if self._lookahead is not None:
+            self._origin = self._lookahead[0]
+        # Per direction: [previous sample, next sample] bracketing the current trace time
+        self._window = {d: [None, None] for d in DIRECTIONS}
+        self._carry = {d: 0.0 for d in DIRECTIONS}
+        self._last_t = 0.0
+
+    @classmethod
+    def from_env(cls, path, rng, environ):
+        return cls(
+            path,
+            rng,
+            time_scale=environ.get('SIM_TRACE_SCALE', '1'),
+            fps=environ.get('SIM_TRACE_FPS', '30'),
+            dwell=environ.get('SIM_TRACE_DWELL', '4'),
+            default_direction=environ.get('SIM_TRACE_APPROACH', 'right'),
+        )
+
+    def _read_sample(self):
+        """Next valid sample as (time, direction, lane totals, class mix), or None at end of file"""
+        for line in self._file:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            t = _sample_time(record, self.fps)
+            if t is None:
+                continue
+            direction = record.get('approach', self.default_direction)
+            if direction not in DIRECTIONS:
+                continue
+            self.samples_read += 1
+            return (t, direction, _lane_totals(record.get('lane_counts') or {}), _class_mix(record))
+        return None
+
+    def _advance(self, trace_t):
+        while self._lookahead is not None and self._lookahead[0] <= trace_t:
+            sample = self._lookahead
+            self._window[sample[1]] = [sample, None]
+            self._lookahead = self._read_sample()
+        if self._lookahead is None:
+            if not self.finished:
+                self.finished = True
+                self._file.close()
+                print(f"🏁 Traffic trace finished after {self.samples_read} samples: {self.path}")
+            return
+        self._window[self._lookahead[1]][1] = self._lookahead
+
+    def _lane_counts(self, direction, trace_t):
+        prev, nxt = self._window[direction]
+        if prev is None:
+            return [0.0, 0.0, 0.0], DEFAULT_MIX
+        if nxt is None or nxt[0] <= prev[0]:
+            return prev[2], prev[3]
+        w = (trace_t - prev[0]) / (nxt[0] - prev[0])
+        return [a + (b - a) * w for a, b in zip(prev[2], nxt[2])], prev[3]
+
+    def _pick_class(self, mix):
+        r = self.rng.random() * sum(mix.values())
+        for name, weight in mix.items():
+            r -= weight
+            if r < 0:
+                return name
+        return name
+
+    def arrivals(self, t):
+        """Vehicles arriving since the previous call, as (class, lane, direction, will_turn)"""
+        dt = t - self._last_t
+        self._last_t = t
+        if self._origin is None or self.finished or dt <= 0:
+            return []
+        trace_t = self._origin + t * self.time_scale
+        self._advance(trace_t)
+        if self.finished:
+            return []
+
+        spawned = []
+        for direction in DIRECTIONS:
+            lanes, mix = self._lane_counts(direction, trace_t)
+            # Little's law: arrival rate = vehicles in view / time each spends in view
+            self._carry[direction] += sum(lanes) / self.dwell * dt * self.time_scale
+            while self._carry[direction] >= 1.0:
+                self._carry[direction] -= 1.0
+                vehicle_class = self._pick_class(mix)
+                if vehicle_class == 'bike':
+                    lane = 0  # bikes use the kerb-side lane in the simulation
+                else:
+                    share = lanes[1] + lanes[2]
+                    lane = 1 if share <= 0 or self.rng.random() * share < lanes[1] else 2
+                will_turn = 1 if lane == 2 and self.rng.randint(0, 4) <= 2 else 0
+                spawned.append((vehicle_class, lane, direction, will_turn))
+        return spawned
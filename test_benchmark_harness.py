@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Test script for the benchmark harness (benchmarks/harness.py)
+Checks that results are written with their revision and that regressions are flagged
+"""
+
+import json
+import os
+import tempfile
+
+from benchmarks.harness import compare, write_results
+
+
+def test_results_round_trip_and_regressions():
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline = [
+            {"path": "cv_module", "model": "n", "fps": 20.0, "p95_ms": 60.0},
+            {"path": "detector", "model": "n", "fps": 10.0, "p95_ms": 120.0},
+        ]
+        path = write_results("cv", {"frames": 10}, baseline, out_dir=tmp)
+        payload = json.loads(path.read_text())
+        assert os.path.basename(path).startswith("cv-")
+        assert payload["params"] == {"frames": 10} and "commit" in payload["git"]
+
+        current = [
+            {"path": "cv_module", "model": "n", "fps": 21.0, "p95_ms": 59.0},   # within threshold
+            {"path": "detector", "model": "n", "fps": 7.0, "p95_ms": 150.0},    # both worse
+            {"path": "detector", "model": "m", "fps": 3.0, "p95_ms": 300.0},    # not in baseline
+        ]
+        regressions = compare(current, path, ("path", "model"), {"fps": True, "p95_ms": False}, threshold=0.1)
+        assert regressions == 2
+
+
+if __name__ == "__main__":
+    test_results_round_trip_and_regressions()
+    print("✅ Benchmark harness tests passed")
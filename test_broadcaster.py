@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test script for the Socket.IO broadcaster (dashboard/backend/broadcaster.py)
+Checks rate limiting, coalescing and per-client backpressure with a fake server
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "dashboard", "backend"))
+from broadcaster import Broadcaster  # noqa: E402
+
+
+class FakeSocketIO:
+    def __init__(self):
+        self.sent = []
+
+    def emit(self, event, data, to=None, callback=None):
+        self.sent.append((event, data, to, callback))
+
+
+def test_rate_limit_and_coalescing():
+    sio = FakeSocketIO()
+    broadcaster = Broadcaster(sio)
+    broadcaster.topic("signals", max_rate=2)  # at most every 0.5 s
+    broadcaster.add_client("a")
+
+    broadcaster.publish("signals", 1)
+    assert broadcaster.flush(now=10.0) == 1
+    sio.sent[-1][3]()  # ack
+
+    broadcaster.publish("signals", 2)
+    broadcaster.publish("signals", 3)
+    assert broadcaster.flush(now=10.2) == 0  # too soon
+    assert broadcaster.flush(now=10.5) == 1
+    assert [data for _, data, _, _ in sio.sent] == [1, 3]
+    stats = broadcaster.stats()
+    assert stats["topics"]["signals"]["coalesced"] == 1
+    assert stats["dropped"] == 1
+
+
+def test_slow_client_is_skipped_until_it_acks():
+    sio = FakeSocketIO()
+    broadcaster = Broadcaster(sio, max_inflight=1, ack_timeout=5.0)
+    broadcaster.topic("cv", max_rate=0)
+    broadcaster.add_client("fast")
+    broadcaster.add_client("slow")
+
+    acks = {}
+    for t, value in enumerate(range(1, 5)):
+        broadcaster.publish("cv", value)
+        broadcaster.flush(now=float(t))
+        for event, data, sid, ack in sio.sent:
+            acks.setdefault(sid, []).append(data)
+            if sid == "fast":
+                ack()
+        sio.sent.clear()
+
+    assert acks["fast"] == [1, 2, 3, 4]
+    assert acks["slow"] == [1]  # never acked, so it is held back instead of queueing frames
+
+    # once the ack arrives the slow client jumps straight to the newest value
+    broadcaster.clients["slow"].inflight["cv"] = 0
+    broadcaster.flush(now=4.0)
+    assert [(sid, data) for _, data, sid, _ in sio.sent] == [("slow", 4)]
+    assert broadcaster.clients["slow"].dropped == 2
+
+
+def test_start_launches_one_flush_loop():
+    sio = FakeSocketIO()
+    sio.tasks = []
+    sio.start_background_task = sio.tasks.append
+    broadcaster = Broadcaster(sio)
+    for _ in range(3):
+        broadcaster.start()  # every client connect calls it
+    assert sio.tasks == [broadcaster._run]
+
+
+if __name__ == "__main__":
+    test_rate_limit_and_coalescing()
+    test_slow_client_is_skipped_until_it_acks()
+    test_start_launches_one_flush_loop()
+    print("✅ Broadcaster tests passed")
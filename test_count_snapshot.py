@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared count snapshot (common/count_snapshot.py)
+Checks the Mapping views, publishing and that controllers accept snapshots unchanged
+"""
+
+from array import array
+
+from common.count_snapshot import CountPublisher, CountSnapshot
+from controllers.rl_agent import RLAgent
+from controllers.rule_based import RuleBasedController
+
+
+def test_views_and_payload():
+    snapshot = CountSnapshot()
+    snapshot.counts[0:3] = array("i", [2, 5, 1])  # right
+    snapshot.counts[9:12] = array("i", [0, 3, 0])  # up
+    snapshot.ambulance_index = 3
+
+    assert snapshot["right"]["lane1"] == 5
+    assert dict(snapshot["right"]) == {"lane0": 2, "lane1": 5, "lane2": 1}
+    assert snapshot.count(3, 1) == 3
+    assert dict(snapshot.totals) == {"right": 8, "down": 0, "left": 0, "up": 3}
+    assert snapshot["right"] is snapshot["right"]  # views are reused, not rebuilt
+
+    payload = snapshot.to_payload()
+    assert payload["counts"]["up"] == {"lane0": 0, "lane1": 3, "lane2": 0}
+    assert payload["ambulance"] == {"direction": "up", "present": True}
+
+
+def test_publisher_swaps_buffers():
+    publisher = CountPublisher()
+    first = publisher.current
+
+    back = publisher.begin()
+    back.counts[4] = 7
+    published = publisher.publish()
+    assert published is back
+    assert published.version == 1
+    assert publisher.current["down"]["lane1"] == 7
+
+    # the next update starts from the published values and reuses the other buffer
+    back = publisher.begin()
+    assert back is first
+    assert back.counts[4] == 7
+    back.counts[4] = 2
+    publisher.publish()
+    assert publisher.current.version == 2
+    assert publisher.current["down"]["lane1"] == 2
+
+
+def test_controllers_accept_snapshot_views():
+    snapshot = CountSnapshot()
+    snapshot.counts[0] = 3
+    snapshot.counts[4] = 1
+
+    assert RuleBasedController(fixed_green=15).decide(snapshot["right"]) == {
+        "lane0": 15, "lane1": 15, "lane2": 15}
+    plan = RLAgent(base_time=10, max_time=60).decide(snapshot.totals)
+    assert plan["right"] > plan["down"] > plan["left"] == 10
+
+
+if __name__ == "__main__":
+    test_views_and_payload()
+    test_publisher_swaps_buffers()
+    test_controllers_accept_snapshot_views()
+    print("✅ Count snapshot tests passed")
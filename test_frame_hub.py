@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared MJPEG fan-out (dashboard/backend/frame_hub.py)
+Checks that many viewers share one encoded chunk per frame and skip duplicates
+"""
+
+import base64
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "dashboard", "backend"))
+from frame_hub import FrameHub  # noqa: E402
+
+JPEG = b"\xff\xd8" + b"fake jpeg body" + b"\xff\xd9"
+
+
+def test_viewers_share_one_encode_per_frame():
+    hub = FrameHub(max_fps=0)
+    viewers = [hub.frames() for _ in range(50)]
+    received = [[] for _ in viewers]
+
+    def publish_later():
+        time.sleep(0.05)
+        hub.publish(1, base64.b64encode(JPEG).decode())
+        hub.publish(1, base64.b64encode(JPEG).decode())  # same frame number again
+
+    threading.Thread(target=publish_later).start()
+    for i, viewer in enumerate(viewers):
+        received[i].append(next(viewer))
+
+    assert hub.frames_encoded == 1
+    assert hub.frames_skipped == 1
+    first = received[0][0]
+    assert first.startswith(b"--frame\r\n") and JPEG in first
+    assert all(chunk[0] is first for chunk in received)  # the very same bytes object
+    assert hub.stats()["subscribers"] == 50
+
+    for viewer in viewers:
+        viewer.close()
+    assert hub.stats()["subscribers"] == 0
+
+
+def test_slow_viewer_gets_newest_frame_only():
+    hub = FrameHub(max_fps=0)
+    viewer = hub.frames()
+    hub.publish(1, base64.b64encode(JPEG + b"1").decode())
+    assert next(viewer).endswith(JPEG + b"1\r\n")
+    hub.publish(2, base64.b64encode(JPEG + b"2").decode())
+    hub.publish(3, base64.b64encode(JPEG + b"3").decode())
+    assert next(viewer).endswith(JPEG + b"3\r\n")
+    assert hub.frames_encoded == 2  # frame 2 was never needed, so never decoded
+    viewer.close()
+
+
+if __name__ == "__main__":
+    test_viewers_share_one_encode_per_frame()
+    test_slow_viewer_gets_newest_frame_only()
+    print("✅ Frame hub tests passed")
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test script for the junction metadata cache (dashboard/backend/junction_cache.py)
+Checks frozen snapshots, copy-on-write overlays and reload on file change
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "dashboard", "backend"))
+from junction_cache import JunctionCache  # noqa: E402
+
+
+def write(path, doc, mtime):
+    with open(path, "w") as f:
+        json.dump(doc, f)
+    os.utime(path, (mtime, mtime))
+
+
+def test_snapshot_is_frozen_and_overlays_share_data():
+    path = os.path.join(tempfile.mkdtemp(), "junctions.json")
+    write(path, {"signals_vehicle_data": [{"id": 1, "lanes": {"a": 3}}], "system_totals": {}}, 1000)
+    snapshot = JunctionCache(path).get()
+
+    signal = snapshot.data["signals_vehicle_data"][0]
+    for mutate in (lambda: signal.__setitem__("id", 2), lambda: signal.update(id=2), lambda: signal["lanes"].pop("a")):
+        try:
+            mutate()
+        except TypeError:
+            pass
+        else:
+            raise AssertionError("snapshot data must be read-only")
+
+    view = dict(signal, total_current=7)
+    assert view["lanes"] is signal["lanes"]  # untouched subtrees are shared, not copied
+    assert "total_current" not in signal
+    assert json.loads(json.dumps(snapshot.data))["signals_vehicle_data"][0]["lanes"] == {"a": 3}
+
+
+def test_reload_on_mtime_change_keeps_last_good_version():
+    path = os.path.join(tempfile.mkdtemp(), "junctions.json")
+    write(path, {"system_totals": {"total_vehicles_detected": 5}}, 1000)
+    cache = JunctionCache(path, check_interval=0)
+    first = cache.get()
+    assert cache.get() is first  # unchanged file: same snapshot
+
+    write(path, {"system_totals": {"total_vehicles_detected": 9}}, 2000)
+    second = cache.get()
+    assert second.version == first.version + 1
+    assert second.data["system_totals"]["total_vehicles_detected"] == 9
+    assert first.data["system_totals"]["total_vehicles_detected"] == 5  # old readers unaffected
+
+    with open(path, "w") as f:
+        f.write("{broken")
+    os.utime(path, (3000, 3000))
+    assert cache.get() is second
+
+
+if __name__ == "__main__":
+    test_snapshot_is_frozen_and_overlays_share_data()
+    test_reload_on_mtime_change_keeps_last_good_version()
+    print("✅ Junction cache tests passed")
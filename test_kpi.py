@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Test script for the streaming KPI aggregator (dashboard/backend/kpi.py)
+Checks sliding-window means and percentiles and the precomputed stats
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "dashboard", "backend"))
+from kpi import KpiAggregator, SlidingWindow  # noqa: E402
+
+
+def test_sliding_window_expires_old_samples():
+    window = SlidingWindow(span=10)
+    for t, value in enumerate([5, 1, 9, 3]):
+        window.add(value, ts=t)
+    assert window.mean() == 4.5
+    assert window.percentile(50) == 5
+    assert window.summary()["max"] == 9
+
+    window.add(2, ts=12)  # samples older than t=2 drop out
+    assert len(window) == 3
+    assert window.mean() == (9 + 3 + 2) / 3
+    assert window.percentile(0) == 2
+
+
+def test_stats_are_precomputed_on_ingest():
+    kpis = KpiAggregator(window=60)
+    assert kpis.stats() is None
+
+    for t in range(10):
+        kpis.on_counts({"lane0": t, "lane1": 2}, scale=4, ts=t)
+    stats = kpis.stats()
+    assert stats is kpis.stats()  # reads return the same precomputed dict
+    assert stats["vehicles_detected"] == (9 + 2) * 4
+    assert stats["co2_saved"] == 11.0
+    assert stats["avg_wait_time"] == 20  # no wait samples yet: estimated from the count
+    queue = stats["kpis"]["queue_length"]
+    assert queue["current"] == 11 and queue["max"] == 11 and queue["mean"] == 6.5
+
+    kpis.on_wait(12, ts=10)
+    kpis.on_wait(30, ts=11)
+    assert kpis.stats()["avg_wait_time"] == 21.0
+    assert kpis.stats()["kpis"]["wait_time"]["p95"] == 30
+
+
+if __name__ == "__main__":
+    test_sliding_window_expires_old_samples()
+    test_stats_are_precomputed_on_ingest()
+    print("✅ KPI aggregator tests passed")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test script for the backend metrics (dashboard/backend/metrics.py)
+Checks histogram buckets, the Socket.IO handler decorator and collectors
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "dashboard", "backend"))
+from metrics import Histogram, Metrics  # noqa: E402
+
+
+def test_histogram_renders_cumulative_buckets():
+    hist = Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        hist.observe("/api/stats", value=value)
+    lines = hist.render()
+    assert 'latency_seconds_bucket{route="/api/stats",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/api/stats",le="1.0"} 3' in lines
+    assert 'latency_seconds_bucket{route="/api/stats",le="+Inf"} 4' in lines
+    assert 'latency_seconds_count{route="/api/stats"} 4' in lines
+    assert 'latency_seconds_sum{route="/api/stats"} 4.05' in lines
+
+
+def test_socket_event_counts_outcomes():
+    metrics = Metrics()
+
+    @metrics.socket_event("cv_frame")
+    def handler(data):
+        if data.get("fail"):
+            raise ValueError("bad frame")
+        return "ok"
+
+    assert handler({"image": "x" * 100}) == "ok"
+    try:
+        handler({"fail": True})
+    except ValueError:
+        pass
+    page = metrics.render()
+    assert 'socketio_events_total{event="cv_frame",outcome="ok"} 1' in page
+    assert 'socketio_events_total{event="cv_frame",outcome="error"} 1' in page
+    assert 'socketio_payload_size_bytes_bucket{event="cv_frame",le="1000"} 2' in page
+
+
+def test_collectors_are_read_at_scrape_time():
+    metrics = Metrics()
+    state = {"viewers": 1}
+
+    @metrics.collector
+    def viewers():
+        yield "mjpeg_viewers", "Open viewers", {(): state["viewers"]}
+        yield "published_total", "Published", {(("topic", "cv"),): 7}, "counter"
+
+    @metrics.collector
+    def unknown_kind():
+        yield "odd", "Odd", {(): 1}, "summary"
+
+    @metrics.collector
+    def broken():
+        raise RuntimeError("boom")
+
+    state["viewers"] = 3
+    page = metrics.render()
+    assert "mjpeg_viewers 3" in page
+    assert 'published_total{topic="cv"} 7' in page
+    assert "# TYPE mjpeg_viewers gauge" in page
+    assert "# TYPE published_total counter" in page
+    assert "# collector unknown_kind failed" in page and "\nodd " not in page
+    assert "# collector broken failed: boom" in page
+
+
+if __name__ == "__main__":
+    test_histogram_renders_cumulative_buckets()
+    test_socket_event_counts_outcomes()
+    test_collectors_are_read_at_scrape_time()
+    print("✅ Metrics tests passed")
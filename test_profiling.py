@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test script for the CV stage profiler (ai_module/profiling.py)
+Checks lap accounting, rolling stats, the CSV dump, sampled cProfile runs and the endpoint
+"""
+
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "ai_module"))
+from profiling import STAGES, StageProfiler  # noqa: E402
+
+
+def run_frame(profiler, frame_no, detections=2):
+    profiler.begin(frame_no)
+    time.sleep(0.002)
+    profiler.lap("decode")
+    for _ in range(detections):
+        profiler.lap("classification")
+        time.sleep(0.001)
+        profiler.lap("draw")
+    profiler.end()
+
+
+def test_laps_accumulate_into_rolling_stats():
+    profiler = StageProfiler(window=3)
+    for frame_no in range(5):
+        run_frame(profiler, frame_no)
+    stats = profiler.stats()
+    assert stats["frames_timed"] == 5 and stats["window"] == 3
+    assert list(stats["stages"])[:len(STAGES)] == list(STAGES)
+    assert stats["stages"]["decode"]["mean_ms"] >= 2
+    assert stats["stages"]["draw"]["p50_ms"] >= 2  # two detections' worth per frame
+    assert stats["stages"]["inference"]["max_ms"] == 0
+    assert stats["frame"]["mean_ms"] >= stats["stages"]["decode"]["mean_ms"]
+
+
+def test_csv_and_sampled_profiles():
+    with tempfile.TemporaryDirectory() as tmp:
+        profiler = StageProfiler(csv_path=os.path.join(tmp, "stages.csv"), profile_every=4,
+                                 profile_frames=2, profile_dir=os.path.join(tmp, "profiles"))
+        for frame_no in range(1, 9):
+            run_frame(profiler, frame_no)
+        profiler.close()
+
+        # frames 4-5 and 8 (still open) are profiled and left out of the stats
+        assert profiler.profiled_count == 3 and profiler.frame_count == 5
+        assert os.listdir(os.path.join(tmp, "profiles")) == ["profile_4-5.txt"]
+        assert "frames 4-5" in profiler.last_profile and "sleep" in profiler.last_profile
+
+        with open(os.path.join(tmp, "stages.csv")) as f:
+            rows = list(csv.DictReader(f))
+        assert len(rows) == 8 and float(rows[0]["decode"]) >= 2
+
+
+def test_endpoint_serves_stats_and_arms_profiles():
+    profiler = StageProfiler()
+    assert profiler.serve(0)
+    port = profiler._server.server_address[1]
+    try:
+        run_frame(profiler, 0)
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/stats") as resp:
+            assert json.load(resp)["frames_timed"] == 1
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/profile?frames=1") as resp:
+            assert resp.status == 202
+        run_frame(profiler, 1)
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/profile") as resp:
+            assert resp.read().decode().startswith("# frames 1-1")
+    finally:
+        profiler.close()
+
+
+if __name__ == "__main__":
+    test_laps_accumulate_into_rolling_stats()
+    test_csv_and_sampled_profiles()
+    test_endpoint_serves_stats_and_arms_profiles()
+    print("✅ Stage profiler tests passed")
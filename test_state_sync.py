@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test script for the versioned dashboard state (dashboard/backend/state_sync.py)
+Checks minimal JSON-patch diffs, catching up from a version and snapshot fallback
+"""
+
+import copy
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "dashboard", "backend"))
+from state_sync import VersionedState, apply_patch, diff  # noqa: E402
+
+
+def test_diff_is_minimal_and_applies():
+    old = {"signals": [{"id": 1, "queue": 3}, {"id": 2, "queue": 5}], "mode": "automation", "a/b": 1}
+    new = copy.deepcopy(old)
+    new["signals"][1]["queue"] = 6
+    new["mode"] = "manual"
+    del new["a/b"]
+    new["extra"] = True
+
+    ops = diff(old, new)
+    assert {"op": "replace", "path": "/signals/1/queue", "value": 6} in ops
+    assert {"op": "remove", "path": "/a~1b"} in ops
+    assert len(ops) == 4
+    assert apply_patch(copy.deepcopy(old), ops) == new
+    assert diff(new, new) == []
+
+
+def test_client_catches_up_from_version():
+    state = VersionedState(history=2)
+    signals = [{"id": 1, "queue": 0}]
+    state.update(signals=signals, stats={"vehicles": 0})
+    client = copy.deepcopy(state.snapshot())
+
+    assert state.update(signals=signals) is None  # unchanged: no version bump
+    for queue in (1, 2):
+        signals[0]["queue"] = queue
+        state.update(signals=signals)
+    assert state.version == 3
+
+    patch = state.since(client["version"], epoch=client["epoch"])
+    assert patch["from"] == 1 and patch["version"] == 3
+    assert apply_patch(client["state"], patch["ops"]) == state.snapshot()["state"]
+
+    state.update(stats={"vehicles": 4})
+    assert state.since(1, epoch=state.epoch) is None  # older than the ring buffer: snapshot
+    assert state.since(3, epoch="other") is None  # server restarted: snapshot
+    assert state.since(4, epoch=state.epoch)["ops"] == []
+
+
+def test_read_pairs_etag_with_its_sections():
+    state = VersionedState()
+    alerts = [{"id": 1}]
+    state.update(alerts=alerts)
+    etag, sections = state.read("alerts")
+    alerts.append({"id": 2})  # live data moves on before the next sync
+    assert sections == {"alerts": [{"id": 1}]} and etag == state.etag
+    state.update(alerts=alerts)
+    assert state.read("alerts") == (state.etag, {"alerts": alerts}) and state.etag != etag
+
+
+if __name__ == "__main__":
+    test_diff_is_minimal_and_applies()
+    test_client_catches_up_from_version()
+    test_read_pairs_etag_with_its_sections()
+    print("✅ State sync tests passed")
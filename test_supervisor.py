@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test script for the process supervisor (common/supervisor.py)
+Checks on-demand dedupe, restart with backoff and readiness probes
+"""
+
+import socket
+import sys
+import time
+
+from common.supervisor import ProcessSpec, Supervisor, port_probe
+
+
+def test_spawn_is_deduplicated_by_name():
+    supervisor = Supervisor()
+    spec = ProcessSpec(name="sleeper", cmd=[sys.executable, "-c", "import time; time.sleep(30)"], restart="never")
+    try:
+        first, started = supervisor.spawn(spec)
+        assert started
+        second, started = supervisor.spawn(spec)
+        assert not started
+        assert second is first
+        assert supervisor.name_of(first.pid) == "sleeper"
+    finally:
+        supervisor.stop_all()
+    assert not supervisor.is_running("sleeper")
+
+
+def test_failed_child_restarts_with_backoff():
+    supervisor = Supervisor()
+    managed = supervisor.start(ProcessSpec(
+        name="crasher", cmd=[sys.executable, "-c", "raise SystemExit(3)"],
+        backoff=0.05, max_restarts=2), wait_ready=False)
+
+    deadline = time.monotonic() + 10
+    while managed.state != "failed" and time.monotonic() < deadline:
+        supervisor.poll()
+        time.sleep(0.02)
+    assert managed.state == "failed"
+    assert managed.restarts == 2
+    assert managed.exit_code == 3
+
+
+def test_clean_exit_is_not_restarted_on_failure_policy():
+    supervisor = Supervisor()
+    managed = supervisor.start(ProcessSpec(name="oneshot", cmd=[sys.executable, "-c", "pass"]), wait_ready=False)
+    managed.proc.wait()
+    supervisor.poll()
+    assert managed.state == "exited"
+    assert managed.restarts == 0
+
+
+def test_port_probe():
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    port = server.getsockname()[1]
+    try:
+        assert port_probe("127.0.0.1", port)()
+    finally:
+        server.close()
+    assert not port_probe("127.0.0.1", port)()
+
+
+if __name__ == "__main__":
+    test_spawn_is_deduplicated_by_name()
+    test_failed_child_restarts_with_backoff()
+    test_clean_exit_is_not_restarted_on_failure_policy()
+    test_port_probe()
+    print("✅ Supervisor tests passed")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test script for the time-series store (dashboard/backend/timeseries.py)
+Checks rollups at every resolution, event storage and the analytics payload
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "dashboard", "backend"))
+from timeseries import TimeSeriesStore  # noqa: E402
+
+HOUR = 3600
+T0 = 1_700_000_000 // HOUR * HOUR  # an hour boundary
+
+
+def make_store():
+    return TimeSeriesStore(os.path.join(tempfile.mkdtemp(), "ts.db"), autostart=False)  # tests flush by hand
+
+
+def test_rollups_are_precomputed_per_resolution():
+    store = make_store()
+    for i in range(120):  # two minutes of one sample per second
+        store.record_counts("vehicles", {"lane0": 2, "lane1": i % 4}, ts=T0 + i)
+    assert store.flush() > 0
+    store.record("vehicles", 10, key="lane0", ts=T0 + 30)  # late sample merges into the stored cell
+    store.flush()
+
+    minutes = store.series("vehicles", key="lane0", res=60, since=T0, until=T0 + HOUR)
+    assert [(bucket, count) for bucket, count, *_ in minutes] == [(T0, 61), (T0 + 60, 60)]
+    bucket, count, total, low, high, last = minutes[0]
+    assert (total, low, high) == (130, 2, 10)
+
+    (hour,) = store.series("vehicles", res=HOUR, since=T0, until=T0 + HOUR)
+    assert hour[1] == 120  # the per-frame totals
+    assert hour[3] == 2 and hour[4] == 5
+
+
+def test_events_and_analytics():
+    store = make_store()
+    assert store.analytics(now=T0) is None  # nothing recorded: callers fall back to mock data
+
+    for minute in range(120):
+        ts = T0 - HOUR + minute * 60
+        busy = 8 if minute >= 60 else 4  # lane1 doubles in the last hour
+        store.record_counts("vehicles", {"lane0": 4, "lane1": busy}, ts=ts)
+    store.record_event("signal_changed", {"from": "right", "to": "down"}, ts=T0)
+    store.flush()
+
+    analytics = store.analytics(now=T0 + HOUR - 1)
+    assert [h["vehicles"] for h in analytics["hourly_traffic"]] == [8, 12]
+    assert analytics["co2_trends"][-1]["co2_saved"] > 0
+    hotspots = {h["location"]: h for h in analytics["congestion_hotspots"]}
+    assert hotspots["lane1"]["congestion_level"] == 100
+    assert hotspots["lane1"]["trend"] == "increasing"
+    assert hotspots["lane0"]["trend"] == "stable"
+
+    (event,) = store.events("signal_changed")
+    assert event["to"] == "down"
+    assert store.series("events", key="signal_changed", res=60, since=T0, until=T0 + 60)[0][1] == 1
+
+
+def test_first_record_starts_the_writer():
+    store = TimeSeriesStore(os.path.join(tempfile.mkdtemp(), "ts.db"), flush_interval=0.05)
+    store.record("vehicles", 3)  # now: the writer prunes buckets older than the retention
+    deadline = time.monotonic() + 5
+    while store._cells and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert store._thread is not None and not store._cells  # flushed by the writer, not by close()
+    store.close()
+    assert store.series("vehicles", res=60, since=time.time() - HOUR)[0][1:3] == (1, 3.0)
+
+
+if __name__ == "__main__":
+    test_rollups_are_precomputed_per_resolution()
+    test_events_and_analytics()
+    test_first_record_starts_the_writer()
+    print("✅ Time-series store tests passed")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test script for detection -> signal latency tracing (common/tracing.py, common/trace_report.py)
+Checks stamping, sampling and the per-hop report
+"""
+
+import json
+import os
+import tempfile
+
+from common.trace_report import load, percentile, report
+from common.tracing import DEFAULT_SAMPLE, DEFAULT_TRACE_LOG, Tracer, tracer_from_env
+
+
+def test_stamps_are_appended_per_process():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "trace.jsonl")
+        cv = Tracer(path, "cv_module")
+        backend = Tracer(path, "backend")
+
+        trace_id = cv.start("capture", t=10.0, frame=7)
+        cv.stamp(trace_id, "publish", t=10.2)
+        backend.stamp(trace_id, "actuate", t=10.5)
+        backend.stamp(None, "actuate")  # counts without a trace ID are ignored
+        cv.close()
+        backend.close()
+
+        with open(path) as f:
+            lines = [json.loads(line) for line in f]
+        assert [r["stage"] for r in lines] == ["capture", "publish", "actuate"]
+        assert lines[0]["frame"] == 7 and lines[2]["component"] == "backend"
+        assert load(path)[trace_id] == {"capture": [10.0], "publish": [10.2], "actuate": [10.5]}
+
+
+def test_sampling_and_disabled_tracer():
+    with tempfile.TemporaryDirectory() as tmp:
+        tracer = Tracer(os.path.join(tmp, "trace.jsonl"), "cv_module", sample=3)
+        ids = [tracer.start() for _ in range(6)]
+        assert [i is not None for i in ids] == [True, False, False, True, False, False]
+        tracer.close()
+    assert Tracer(None, "cv_module").start() is None
+
+
+def test_tracing_is_off_unless_enabled():
+    saved = {key: os.environ.pop(key, None) for key in ("TRACE_LOG", "TRACE_SAMPLE")}
+    try:
+        assert not tracer_from_env("cv_module").enabled
+        os.environ["TRACE_LOG"] = "on"
+        tracer = tracer_from_env("cv_module")
+        assert tracer.path == DEFAULT_TRACE_LOG and tracer.sample == DEFAULT_SAMPLE > 1
+        os.environ.update({"TRACE_LOG": "/tmp/other_trace.jsonl", "TRACE_SAMPLE": "1"})
+        tracer = tracer_from_env("cv_module")
+        assert str(tracer.path) == "/tmp/other_trace.jsonl" and tracer.sample == 1
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def test_report_hops_and_staleness():
+    traces = {
+        "a": {"capture": [0.0], "inference": [0.1], "publish": [0.15],
+              "plan": [0.5, 2.5], "actuate": [0.6, 2.6]},
+        "b": {"capture": [1.0], "inference": [1.3], "publish": [1.4]},
+    }
+    rows = {row["name"]: row for row in report(traces)}
+    assert rows["capture → inference"]["n"] == 2
+    assert round(rows["capture → inference"]["max"]) == 300
+    assert round(rows["plan → actuate"]["p50"]) == 100  # first plan to first actuate
+    assert round(rows["capture → actuate"]["p50"]) == 600
+    assert rows["counts age at plan"]["n"] == 2  # every re-plan from the same counts
+    assert round(rows["counts age at plan"]["max"]) == 2500
+    assert percentile(list(range(1, 101)), 99) == 99
+
+
+if __name__ == "__main__":
+    test_stamps_are_appended_per_process()
+    test_sampling_and_disabled_tracer()
+    test_tracing_is_off_unless_enabled()
+    test_report_hops_and_staleness()
+    print("✅ Tracing tests passed")
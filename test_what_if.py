@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test script for the what-if runner (dashboard/backend/what_if.py)
+Checks request validation, a short headless run and that a timed-out run is killed
+Needs pygame (the simulation runs on SDL's dummy driver)
+"""
+
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "dashboard", "backend"))
+import what_if  # noqa: E402
+
+
+def test_normalize_params_validates_and_fills_defaults():
+    job = what_if.normalize_params({"duration": 120, "demand": {"right": 600}})
+    assert job["controller"] == "adaptive" and job["demand"] == [{"duration": 120.0, "rates": {"right": 600.0}}]
+    assert job["mix"] == {name: 1.0 for name in what_if.DEFAULT_MIX}
+    for bad in ({"duration": 10, "demand": {}}, {"demand": {"north": 10}}, {"controller": "magic", "demand": {}},
+                {}, {"demand": {"right": 10}, "mix": {"tram": 1}}, {"demand": [5]}, {"demand": [{"rates": [1]}]},
+                {"demand": {"right": 10}, "mix": [1, 2]}, {"demand": {"right": "lots"}}, {"duration": [60], "demand": {}},
+                [{"demand": {"right": 10}}]):
+        try:
+            what_if.normalize_params(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"accepted {bad}")
+
+
+def test_short_run_returns_kpis_and_progress():
+    job = what_if.normalize_params({"duration": 120, "demand": {"right": 900, "down": 600},
+                                    "progress_interval": 30, "seed": 3})
+    updates = []
+    kpis = what_if.run_job(job, on_progress=updates.append, timeout=120)
+    assert kpis["throughput"] >= 0 and "max_queue" in kpis
+    assert updates and updates[-1]["sim_time"] <= 120
+
+
+def test_timed_out_run_is_killed():
+    job = what_if.normalize_params({"duration": what_if.MAX_DURATION, "demand": {"right": 3600, "down": 3600}})
+    started = time.monotonic()
+    try:
+        what_if.run_job(job, timeout=1.0)
+    except TimeoutError:
+        pass
+    else:
+        raise AssertionError("run did not time out")
+    assert time.monotonic() - started < 15
+    assert not multiprocessing.active_children()  # the worker and its slot are free again
+
+
+if __name__ == "__main__":
+    test_normalize_params_validates_and_fills_defaults()
+    test_short_run_returns_kpis_and_progress()
+    test_timed_out_run_is_killed()
+    print("✅ What-if tests passed")